@@ -1,11 +1,10 @@
 from datetime import datetime, timedelta
 from typing import Optional
 import os
-from jose import JWTError, jwt
-from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from app.db import db
+from app.db import DEFAULT_LOCATION, current_location, db
+from app.metrics import timed
 from app.models import TokenData, User, Role
 
 # Configuration
@@ -13,19 +12,36 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-keep-it-secret")
 ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
+# passlib (and the bcrypt backend) and jose are only imported when first
+# needed, so an instance serving tokens never loads passlib and startup loads
+# neither.
+_pwd_context = None
+
+def _password_context():
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+        _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    return _pwd_context
+
+def warm_up():
+    import jose.jwt  # noqa: F401
+    _password_context().handler("bcrypt").get_backend()
+
 def verify_password(plain_password, hashed_password):
     try:
-        return pwd_context.verify(plain_password, hashed_password)
+        with timed("verify_password"):
+            return _password_context().verify(plain_password, hashed_password)
     except Exception:
         return False
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return _password_context().hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
+    from jose import jwt
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -35,14 +51,32 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme)):
+# Users work in their home location. Super admins may pick another one with
+# the X-Location header; anyone else naming a different location is refused.
+def resolve_location(user: User, requested: Optional[str] = None) -> str:
+    home = user.location or DEFAULT_LOCATION
+    location = requested or home
+    if location not in db.locations():
+        raise HTTPException(status_code=404, detail="Unknown location")
+    if location != home and user.role != Role.SUPER_ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Operation not permitted for this location"
+        )
+    return location
+
+# Also selects the request's location, so every JsonDB call after it goes to
+# that location's partition.
+async def get_current_user(token: str = Depends(oauth2_scheme), x_location: Optional[str] = Header(None)):
+    from jose import JWTError, jwt
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        with timed("jwt_decode"):
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
         role: str = payload.get("role")
         if username is None:
@@ -54,7 +88,9 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     user = db.get_by_field("users", "email", token_data.username)
     if user is None:
         raise credentials_exception
-    return User(**user)
+    user = User(**user)
+    current_location.set(resolve_location(user, x_location))
+    return user
 
 async def get_current_active_user(current_user: User = Depends(get_current_user)):
     if not current_user.is_active:
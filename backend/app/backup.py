@@ -0,0 +1,289 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tarfile
+import tempfile
+import time
+import zlib
+from contextlib import ExitStack
+from datetime import datetime
+from typing import Any, BinaryIO, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from app.db import COMMIT_JOURNAL_PREFIX, PartitionedDB, _pid_alive, db
+
+BACKUP_FORMAT = 1
+MANIFEST_NAME = "MANIFEST.json"
+BACKUP_GZIP_LEVEL = int(os.getenv("BACKUP_GZIP_LEVEL", "6"))
+CHUNK_SIZE = 1 << 16
+SNAPSHOT_ATTEMPTS = 20
+
+
+class BackupError(Exception):
+    pass
+
+
+class SnapshotFile(NamedTuple):
+    location: str
+    collection: str
+    file: BinaryIO
+    size: int
+    mtime: float
+
+
+def _collection_names(path: str) -> List[str]:
+    return sorted(
+        name[:-len(".json")] for name in os.listdir(path)
+        if name.endswith(".json") and not name.startswith(".")
+    )
+
+
+def _commit_in_progress(path: str) -> bool:
+    return any(
+        name.startswith(COMMIT_JOURNAL_PREFIX) and _pid_alive(name[len(COMMIT_JOURNAL_PREFIX):])
+        for name in os.listdir(path)
+    )
+
+
+# Opens every collection file of a partition. Writers never modify a file in
+# place, they rename a new one over it, so an open file keeps the contents it
+# had when opened. The set is consistent if no file was replaced or added
+# while they were being opened and no other process is halfway through a
+# multi-file commit; None otherwise.
+def _open_partition(location: str, path: str) -> Optional[List[SnapshotFile]]:
+    names = _collection_names(path)
+    files: List[SnapshotFile] = []
+    try:
+        for collection in names:
+            f = open(os.path.join(path, f"{collection}.json"), "rb")
+            st = os.fstat(f.fileno())
+            files.append(SnapshotFile(location, collection, f, st.st_size, st.st_mtime))
+        replaced = any(
+            os.stat(os.path.join(path, f"{entry.collection}.json")).st_ino != os.fstat(entry.file.fileno()).st_ino
+            for entry in files
+        )
+        if not replaced and _collection_names(path) == names and not _commit_in_progress(path):
+            return files
+    except FileNotFoundError:
+        pass
+    for entry in files:
+        entry.file.close()
+    return None
+
+
+def _tar_header(name: str, size: int, mtime: float) -> bytes:
+    info = tarfile.TarInfo(name)
+    info.size = size
+    info.mtime = int(mtime)
+    info.mode = 0o644
+    return info.tobuf(format=tarfile.PAX_FORMAT)
+
+
+def _tar_padding(size: int) -> bytes:
+    return b"\0" * (-size % tarfile.BLOCKSIZE)
+
+
+# Point-in-time view of every location's collections, held as open files.
+# stream() renders it as a gzipped tar with a manifest of checksums at the
+# end, and closes the files when done.
+class Snapshot:
+    def __init__(self, files: List[SnapshotFile]):
+        self.files = files
+        self.created_at = datetime.now()
+
+    def close(self):
+        for entry in self.files:
+            entry.file.close()
+
+    def stream(self, level: int = BACKUP_GZIP_LEVEL) -> Iterator[bytes]:
+        gz = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        manifest: Dict[str, Any] = {
+            "format": BACKUP_FORMAT,
+            "created_at": self.created_at.isoformat(),
+            "locations": {},
+        }
+        try:
+            for entry in self.files:
+                name = f"{entry.location}/{entry.collection}.json"
+                digest = hashlib.sha256()
+                yield gz.compress(_tar_header(name, entry.size, entry.mtime))
+                remaining = entry.size
+                while remaining:
+                    chunk = entry.file.read(min(CHUNK_SIZE, remaining))
+                    if not chunk:
+                        raise BackupError(f"{name} ended early")
+                    digest.update(chunk)
+                    remaining -= len(chunk)
+                    data = gz.compress(chunk)
+                    if data:
+                        yield data
+                yield gz.compress(_tar_padding(entry.size))
+                manifest["locations"].setdefault(entry.location, {})[entry.collection] = {
+                    "size": entry.size,
+                    "sha256": digest.hexdigest(),
+                }
+            body = json.dumps(manifest, indent=4).encode()
+            yield gz.compress(_tar_header(MANIFEST_NAME, len(body), time.time()) + body + _tar_padding(len(body)))
+            # End of archive: two zero blocks.
+            yield gz.compress(b"\0" * (2 * tarfile.BLOCKSIZE))
+            yield gz.flush()
+        finally:
+            self.close()
+
+
+# Captures every configured location at one instant. Writers in this process
+# are held off by the partitions' write locks, but only while the files are
+# opened; reading and compressing happen afterwards.
+def take_snapshot(database: PartitionedDB = db) -> Snapshot:
+    partitions = sorted(
+        ((location, database.partition(location)) for location in database.locations()),
+        key=lambda item: item[1].db_path,
+    )
+    for attempt in range(SNAPSHOT_ATTEMPTS):
+        files: List[SnapshotFile] = []
+        with ExitStack() as stack:
+            for _, partition in partitions:
+                stack.enter_context(partition._write_lock)
+            for location, partition in partitions:
+                opened = _open_partition(location, partition.db_path)
+                if opened is None:
+                    break
+                files.extend(opened)
+            else:
+                files.sort(key=lambda e: (e.location, e.collection))
+                return Snapshot(files)
+        for entry in files:
+            entry.file.close()
+        # Another process is writing; give it a moment.
+        time.sleep(0.005 * (attempt + 1))
+    raise BackupError("Could not capture a consistent snapshot, collections kept changing")
+
+
+def _check_member(member: tarfile.TarInfo, locations: List[str]) -> Tuple[str, str]:
+    location, _, filename = member.name.partition("/")
+    if (not member.isfile() or location not in locations or "/" in filename
+            or not filename.endswith(".json") or filename.startswith(".")):
+        raise BackupError(f"Unexpected archive member: {member.name}")
+    return location, filename[:-len(".json")]
+
+
+# Reads a snapshot archive and checks every collection against the
+# manifest's size and SHA-256 before anything is touched. With `apply`, each
+# location in the archive is then replaced by its snapshot: every collection
+# of a partition in one journaled commit, collections missing from the
+# snapshot emptied. Listeners are told to rebuild, and other workers pick the
+# new files up through their watchers. Returns the row counts restored (or
+# that would be) by location and collection.
+def restore(source: BinaryIO, database: PartitionedDB = db, apply: bool = True) -> Dict[str, Dict[str, int]]:
+    locations = database.locations()
+    staging = tempfile.mkdtemp(prefix=".restore-", dir=database.root_path)
+    try:
+        staged: Dict[Tuple[str, str], Tuple[str, str, int]] = {}
+        manifest: Optional[Dict[str, Any]] = None
+        try:
+            with tarfile.open(fileobj=source, mode="r|gz") as tar:
+                for member in tar:
+                    if member.name == MANIFEST_NAME:
+                        manifest = json.load(tar.extractfile(member))
+                        continue
+                    key = _check_member(member, locations)
+                    path = os.path.join(staging, f"{len(staged)}.json")
+                    digest = hashlib.sha256()
+                    with tar.extractfile(member) as src, open(path, "wb") as dst:
+                        for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+                            digest.update(chunk)
+                            dst.write(chunk)
+                    staged[key] = (path, digest.hexdigest(), member.size)
+        except (tarfile.TarError, EOFError, OSError, zlib.error) as exc:
+            raise BackupError(f"Unreadable archive: {exc}")
+
+        if manifest is None or manifest.get("format") != BACKUP_FORMAT:
+            raise BackupError("Missing or unsupported manifest")
+        expected = {
+            (location, collection): entry
+            for location, collections in manifest.get("locations", {}).items()
+            for collection, entry in collections.items()
+        }
+        if set(expected) != set(staged):
+            raise BackupError("Archive contents don't match its manifest")
+        for (location, collection), (path, sha256, size) in staged.items():
+            entry = expected[(location, collection)]
+            if entry.get("sha256") != sha256 or entry.get("size") != size:
+                raise BackupError(f"Checksum mismatch for {location}/{collection}")
+
+        batches: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+        for (location, collection), (path, _, _) in staged.items():
+            with open(path) as f:
+                try:
+                    rows = json.load(f)
+                except json.JSONDecodeError:
+                    rows = None
+            if not isinstance(rows, list):
+                raise BackupError(f"{location}/{collection} is not a JSON list")
+            batches.setdefault(location, {})[collection] = rows
+        counts = {
+            location: {collection: len(rows) for collection, rows in batch.items()}
+            for location, batch in batches.items()
+        }
+        if not apply:
+            return counts
+
+        partitions = sorted(
+            ((location, database.partition(location)) for location in batches),
+            key=lambda item: item[1].db_path,
+        )
+        with ExitStack() as stack:
+            for _, partition in partitions:
+                stack.enter_context(partition._write_lock)
+            for location, partition in partitions:
+                batch = batches[location]
+                for collection in _collection_names(partition.db_path):
+                    batch.setdefault(collection, [])
+                if batch:
+                    partition._write_files(batch)
+        return counts
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Online snapshots of DB_PATH and restores from them.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    snapshot = commands.add_parser("snapshot", help="write a consistent snapshot of every location")
+    snapshot.add_argument("--out", default="-", help="archive path, '-' for stdout (default)")
+    snapshot.add_argument("--level", type=int, default=BACKUP_GZIP_LEVEL, help="gzip level")
+    restore_cmd = commands.add_parser("restore", help="verify an archive and restore it")
+    restore_cmd.add_argument("archive", help="archive path, '-' for stdin")
+    restore_cmd.add_argument("--verify-only", action="store_true", help="check the checksums, change nothing")
+    args = parser.parse_args(argv)
+
+    if args.command == "snapshot":
+        out = sys.stdout.buffer if args.out == "-" else open(args.out, "wb")
+        try:
+            for chunk in take_snapshot().stream(args.level):
+                out.write(chunk)
+        finally:
+            if out is not sys.stdout.buffer:
+                out.close()
+        return 0
+
+    source = sys.stdin.buffer if args.archive == "-" else open(args.archive, "rb")
+    try:
+        counts = restore(source, apply=not args.verify_only)
+    except BackupError as exc:
+        print(f"restore failed: {exc}", file=sys.stderr)
+        return 1
+    finally:
+        if source is not sys.stdin.buffer:
+            source.close()
+    verb = "verified" if args.verify_only else "restored"
+    for location, collections in sorted(counts.items()):
+        summary = ", ".join(f"{c}={n}" for c, n in sorted(collections.items()))
+        print(f"{verb} {location}: {summary}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+import functools
+import inspect
+import os
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from fastapi import Request, Response
+from fastapi.params import Depends as DependsParam
+from pydantic import TypeAdapter
+
+from app.db import current_location, db
+
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "512"))
+
+CacheKey = Tuple[str, ...]
+
+
+# Keys are scoped to the current location, and a write to a collection only
+# invalidates entries of the location it was written in.
+class ResponseCache:
+    def __init__(self, max_entries: int = RESPONSE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[CacheKey, bytes]" = OrderedDict()
+        self._keys_by_collection: Dict[Tuple[str, str], Set[CacheKey]] = {}
+        self._collections_by_key: Dict[CacheKey, Tuple[str, ...]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: CacheKey) -> Optional[bytes]:
+        key = (current_location.get(),) + key
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            collections = self._collections_by_key.get(key, ())
+        for collection in collections:
+            db.record_cache_hit(collection)
+        return body
+
+    def put(self, key: CacheKey, body: bytes, collections: Tuple[str, ...], versions: List[int]):
+        key = (current_location.get(),) + key
+        with self._lock:
+            # A write that landed while the body was being computed makes it
+            # stale before it is even stored.
+            if [db.version(c) for c in collections] != versions:
+                return
+            self._drop(key)
+            self._entries[key] = body
+            self._collections_by_key[key] = collections
+            for collection in collections:
+                self._keys_by_collection.setdefault((key[0], collection), set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def invalidate(self, collection: str):
+        with self._lock:
+            for key in list(self._keys_by_collection.get((current_location.get(), collection), ())):
+                self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_collection.clear()
+            self._collections_by_key.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _drop(self, key: CacheKey):
+        self._entries.pop(key, None)
+        for collection in self._collections_by_key.pop(key, ()):
+            keys = self._keys_by_collection.get((key[0], collection))
+            if keys is not None:
+                keys.discard(key)
+
+
+response_cache = ResponseCache()
+db.add_write_listener(response_cache.invalidate)
+
+_adapters: Dict[Any, TypeAdapter] = {}
+
+
+def _adapter_for(response_model: Any) -> TypeAdapter:
+    adapter = _adapters.get(response_model)
+    if adapter is None:
+        adapter = TypeAdapter(response_model)
+        _adapters[response_model] = adapter
+    return adapter
+
+
+# Caches the serialized body of a sync GET endpoint until one of `collections`
+# is written. Entries are shared per role unless `per_user` is set; the
+# endpoint must take a `current_user` dependency. Dependencies (role checks,
+# ETags) still run on every request.
+def cached_response(*collections: str, per_user: bool = False, daily: bool = False):
+    def decorator(func: Callable[..., Any]):
+        signature = inspect.signature(func)
+        key_params = [
+            name for name, param in signature.parameters.items()
+            if not isinstance(param.default, DependsParam) and param.annotation not in (Request, Response)
+        ]
+        # FastAPI injects only one Request and one Response per endpoint, so
+        # hand ours on to a wrapped function that asks for them too.
+        forwarded = {
+            name: param.annotation for name, param in signature.parameters.items()
+            if param.annotation in (Request, Response)
+        }
+
+        @functools.wraps(func)
+        def wrapper(*args, _cache_request: Request, _cache_response: Response, **kwargs):
+            current_user = kwargs["current_user"]
+            scope = current_user.id if per_user else current_user.role.value
+            key: CacheKey = (func.__module__, func.__qualname__, scope)
+            key += tuple(f"{name}={kwargs.get(name)!r}" for name in key_params)
+            if daily:
+                key += (date.today().isoformat(),)
+
+            for name, annotation in forwarded.items():
+                kwargs[name] = _cache_request if annotation is Request else _cache_response
+
+            body = response_cache.get(key)
+            if body is None:
+                versions = [db.version(c) for c in collections]
+                result = func(*args, **kwargs)
+                if isinstance(result, Response):
+                    # Plain bodies rendered by the endpoint itself (e.g. a
+                    # sparse fieldset) are cached as they are.
+                    if type(result) is not Response or result.status_code != 200:
+                        return result
+                    body = bytes(result.body)
+                else:
+                    adapter = _adapter_for(_cache_request.scope["route"].response_model)
+                    body = adapter.dump_json(adapter.validate_python(result))
+                response_cache.put(key, body, collections, versions)
+
+            return Response(
+                content=body,
+                media_type="application/json",
+                headers=dict(_cache_response.headers),
+            )
+
+        wrapper.__signature__ = signature.replace(parameters=[
+            *signature.parameters.values(),
+            inspect.Parameter("_cache_request", inspect.Parameter.KEYWORD_ONLY, annotation=Request),
+            inspect.Parameter("_cache_response", inspect.Parameter.KEYWORD_ONLY, annotation=Response),
+        ])
+        return wrapper
+    return decorator
@@ -0,0 +1,134 @@
+import os
+import zlib
+from typing import Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+_COMPRESSIBLE_TYPES = ("application/json", "text/csv", "text/plain", "text/html")
+
+
+def _accepted(accept_encoding: str) -> Dict[str, float]:
+    accepted: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+    return accepted
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    accepted = _accepted(accept_encoding)
+    fallback = accepted.get("*", 0.0)
+    options = [("br", accepted.get("br", fallback))] if brotli is not None else []
+    options.append(("gzip", accepted.get("gzip", fallback)))
+    encoding, quality = max(options, key=lambda option: option[1])
+    return encoding if quality > 0 else None
+
+
+class _Encoder:
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._zlib = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def chunk(self, data: bytes) -> bytes:
+        # Flushed per chunk so streamed responses reach the client as they
+        # are produced.
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.finish()
+        return self._zlib.compress(data) + self._zlib.flush()
+
+
+def _compressible(status: int, headers: Headers) -> bool:
+    if status < 200 or status in (204, 304) or "content-encoding" in headers:
+        return False
+    content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+    return content_type in _COMPRESSIBLE_TYPES
+
+
+# Compresses JSON, CSV and text responses with brotli (when installed) or gzip,
+# whichever the client prefers, once the body reaches `minimum_size` bytes.
+# Streamed bodies are compressed chunk by chunk.
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        encoder: Optional[_Encoder] = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, encoder, passthrough
+            if passthrough or message["type"] not in ("http.response.start", "http.response.body"):
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                # Held back until the first body chunk shows how large the
+                # response is.
+                start_message = message
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if encoder is not None:
+                data = encoder.chunk(body) if more_body else encoder.finish(body)
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+                return
+
+            headers = MutableHeaders(raw=list(start_message["headers"]))
+            if not _compressible(start_message["status"], headers) or (not more_body and len(body) < self.minimum_size):
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            encoder = _Encoder(encoding)
+            headers["content-encoding"] = encoding
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                # The compressed bytes differ from the identity body.
+                headers["etag"] = f"W/{etag}"
+            if more_body:
+                del headers["content-length"]
+                data = encoder.chunk(body)
+            else:
+                data = encoder.finish(body)
+                headers["content-length"] = str(len(data))
+            await send({**start_message, "headers": headers.raw})
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
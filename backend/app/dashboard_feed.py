@@ -0,0 +1,112 @@
+import json
+import os
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+from app.db import Change, LocationLocal, db
+from app.models_dashboard import DashboardActivity, DashboardEmployee
+from app.pubsub import RESYNC, Broker
+
+DASHBOARD_WS_QUEUE = int(os.getenv("DASHBOARD_WS_QUEUE", "64"))
+
+# What the dashboard summary is computed from.
+SUMMARY_COLLECTIONS = ("employees", "attendance_records", "leave_requests")
+
+dashboard_feed = LocationLocal(db, lambda _: Broker(max_queue=DASHBOARD_WS_QUEUE))
+
+
+def employee_view(employee: Dict[str, Any]) -> DashboardEmployee:
+    return DashboardEmployee(
+        id=str(employee.get("id") or ""),
+        first_name=str(employee.get("first_name") or ""),
+        last_name=str(employee.get("last_name") or ""),
+        email=employee.get("email"),
+        department=employee.get("department"),
+    )
+
+
+def _employee_name(employee: Optional[Dict[str, Any]]) -> str:
+    if not employee:
+        return "Employee"
+    name = f"{employee.get('first_name', '')} {employee.get('last_name', '')}".strip()
+    return name or "Employee"
+
+
+def _publish_delta(event: str, employee_id: str, message: str, timestamp: datetime, changes: Dict[str, int]):
+    employee = db.get_by_id("employees", employee_id)
+    activity = DashboardActivity(
+        id=str(uuid4()),
+        type=event,
+        message=f"{_employee_name(employee)} {message}",
+        timestamp=timestamp,
+        employee=employee_view(employee) if employee else None,
+    )
+    dashboard_feed.publish(json.dumps({
+        "type": "delta",
+        "event": event,
+        "activity": activity.model_dump(mode="json"),
+        "changes": changes,
+    }))
+
+
+def _as_datetime(value: Any) -> datetime:
+    return value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+
+
+def _covers_today(leave: Dict[str, Any]) -> bool:
+    try:
+        return date.fromisoformat(str(leave.get("start_date"))) <= date.today() <= date.fromisoformat(str(leave.get("end_date")))
+    except ValueError:
+        return False
+
+
+# The publish helpers are no-ops without subscribers, so handlers can call
+# them unconditionally.
+
+def publish_punch_in(record: Dict[str, Any], first_today: bool):
+    if not dashboard_feed.has_subscribers:
+        return
+    changes = {"present_today": 1} if first_today else {}
+    _publish_delta("attendance_punch_in", record["employee_id"], "punched in", _as_datetime(record["punch_in"]), changes)
+
+
+def publish_punch_out(record: Dict[str, Any]):
+    if not dashboard_feed.has_subscribers:
+        return
+    _publish_delta("attendance_punch_out", record["employee_id"], "punched out", _as_datetime(record["punch_out"]), {})
+
+
+def publish_leave_applied(leave: Dict[str, Any]):
+    if not dashboard_feed.has_subscribers:
+        return
+    message = f"applied for {leave.get('leave_type') or 'leave'} leave ({leave.get('start_date')} to {leave.get('end_date')})"
+    _publish_delta("leave_applied", leave["employee_id"], message, _as_datetime(leave["applied_at"]), {"pending_leave_requests": 1})
+
+
+def publish_leave_decision(leave: Dict[str, Any]):
+    if not dashboard_feed.has_subscribers:
+        return
+    status = str(leave.get("status"))
+    changes = {"pending_leave_requests": -1}
+    if status == "approved" and _covers_today(leave):
+        changes["on_leave_today"] = 1
+    timestamp = _as_datetime(leave.get("reviewed_at") or datetime.now().isoformat())
+    _publish_delta(f"leave_{status}", leave["employee_id"], f"leave request {status}", timestamp, changes)
+
+
+def _on_write(collection: str):
+    # Employee changes move totals the deltas don't describe.
+    if collection == "employees":
+        dashboard_feed.publish(RESYNC)
+
+
+def _on_change(collection: str, changes: Optional[List[Change]]):
+    # No changes means the file was rewritten by another worker or by hand;
+    # nothing was published for it here, so subscribers have to refetch.
+    if changes is None and collection in SUMMARY_COLLECTIONS:
+        dashboard_feed.publish(RESYNC)
+
+
+db.add_write_listener(_on_write)
+db.add_change_listener(_on_change)
@@ -1,13 +1,366 @@
 import json
 import os
-from typing import List, Dict, Any, Optional
+import re
+import threading
+import time
+from collections import deque
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from typing import Callable, Deque, Iterable, Iterator, List, Dict, Any, NamedTuple, Optional, Tuple
 from uuid import uuid4
+import weakref
+
+from app.metrics import record_timing
+
+try:
+    import fcntl
+except ImportError:  # Windows: one process per DB_PATH only.
+    fcntl = None
+
+
+class CollectionStats:
+    __slots__ = ("reads", "writes", "bytes_read", "bytes_written", "read_seconds",
+                 "parse_seconds", "write_seconds", "cache_hits")
+
+    def __init__(self):
+        self.reads = 0
+        self.writes = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.read_seconds = 0.0
+        self.parse_seconds = 0.0
+        self.write_seconds = 0.0
+        self.cache_hits = 0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class TransactionConflict(Exception):
+    pass
+
+
+def _pid_alive(pid: str) -> bool:
+    try:
+        os.kill(int(pid), 0)
+    except (ValueError, ProcessLookupError):
+        return False
+    except PermissionError:
+        return True
+    # Our own pid here belongs to an earlier process that was reused.
+    return pid != str(os.getpid())
+
+
+COMMIT_JOURNAL_PREFIX = "_commit."
+WRITE_LOCK_NAME = ".write.lock"
+
+
+# Held across every read-modify-write and commit. The thread lock orders this
+# process's writers; an flock on a file in the directory orders the processes
+# sharing it (uvicorn workers, scripts), so none of them writes a collection
+# from a copy another has since replaced. Reentrant, like the RLock it wraps.
+class WriteLock:
+    def __init__(self, path: str):
+        self.local = threading.RLock()
+        self._path = path
+        self._fd: Optional[int] = None
+        self._depth = 0
+
+    def __enter__(self) -> "WriteLock":
+        self.local.acquire()
+        try:
+            if self._depth == 0 and fcntl is not None:
+                if self._fd is None:
+                    self._fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o644)
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+        except BaseException:
+            self.local.release()
+            raise
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        self._depth -= 1
+        if self._depth == 0 and self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self.local.release()
+
+
+def _group_commit_window_from_env() -> Optional[float]:
+    value = os.getenv("GROUP_COMMIT_WINDOW_MS", "2").strip().lower()
+    if value in ("", "off", "none"):
+        return None
+    return max(0.0, float(value)) / 1000.0
+
+
+def _watch_interval_from_env() -> Optional[float]:
+    value = os.getenv("DB_WATCH_INTERVAL_MS", "50").strip().lower()
+    if value in ("", "0", "off", "none"):
+        return None
+    return float(value) / 1000.0
+
+
+# inode, mtime and size of a collection file. Every write replaces the file,
+# so a new signature means someone rewrote it.
+FileSignature = Tuple[int, int, int]
+
+
+def _watch(ref: "weakref.ReferenceType[JsonDB]", interval: float):
+    while True:
+        time.sleep(interval)
+        database = ref()
+        if database is None:
+            return
+        try:
+            database.sync()
+        except OSError:
+            pass
+        del database
+
+
+class Change(NamedTuple):
+    op: str  # "insert", "update" or "delete"
+    id: str
+    before: Optional[Dict[str, Any]]
+    after: Optional[Dict[str, Any]]
+
+
+# Receives the row-level changes of a write, or None when the collection
+# changed in ways that weren't tracked and derived state must be rebuilt.
+ChangeListener = Callable[[str, Optional[List[Change]]], None]
+
+class LoggedChange(NamedTuple):
+    seq: int
+    collection: str
+    change: Change
+    at: float
+
+
+CHANGE_LOG_SIZE = int(os.getenv("CHANGE_LOG_SIZE", "10000"))
+CHANGE_LOG_NAME = ".changes.jsonl"
+
+
+# Bounded per-collection log of row changes under one sequence shared by all
+# collections. Once entries have been dropped, or a write wasn't tracked,
+# readers behind that point are told to resync the collection instead.
+#
+# With a `path` the log is a file of JSON lines next to the collections, so
+# every process sharing the directory hands out the same sequence numbers
+# and epoch. Writers append under `write_lock` and each process reads back
+# what was appended since it last looked. A collection file that changed
+# without a matching append (a hand edit, a restore) is logged as untracked
+# by whichever process notices first. Once half the file is entries already
+# dropped from memory it is rewritten with just the rest.
+class ChangeLog:
+    def __init__(self, max_entries: int = CHANGE_LOG_SIZE, path: Optional[str] = None,
+                 write_lock: Optional["WriteLock"] = None):
+        self.max_entries = max_entries
+        self.path = path
+        self.epoch = uuid4().hex
+        self._write_lock = write_lock
+        self._entries: Dict[str, Deque[LoggedChange]] = {}
+        self._truncated_through: Dict[str, int] = {}
+        self._seq = 0
+        self._lock = threading.Lock()
+        # Signature of each collection file as of its latest logged write.
+        self._signatures: Dict[str, Optional[FileSignature]] = {}
+        self._file_id: Optional[int] = None
+        self._offset = 0
+        self._file_entries = 0
+        if path is not None:
+            with write_lock:
+                if not os.path.exists(path):
+                    self._rewrite(uuid4().hex)
+            with self._lock:
+                self._catch_up()
+
+    @property
+    def last_seq(self) -> int:
+        return self._seq
+
+    def _apply(self, collection: str, changes: Optional[List[Change]], seq: int, at: float):
+        if changes is None:
+            self._seq = max(self._seq, seq)
+            self._entries.pop(collection, None)
+            self._truncated_through[collection] = seq
+            return
+        log = self._entries.setdefault(collection, deque())
+        for change in changes:
+            log.append(LoggedChange(seq, collection, change, at))
+            self._seq = max(self._seq, seq)
+            seq += 1
+        while len(log) > self.max_entries:
+            self._truncated_through[collection] = log.popleft().seq
+
+    def record(self, collection: str, changes: Optional[List[Change]]):
+        if self.path is None:
+            with self._lock:
+                self._apply(collection, changes, self._seq + 1, time.time())
+            return
+        if changes is None:
+            # Usually another process's write we've yet to read back.
+            with self._lock:
+                self._catch_up()
+                if self._signatures.get(collection) == self._file_signature(collection):
+                    return
+        with self._write_lock, self._lock:
+            self._catch_up()
+            signature = self._file_signature(collection)
+            if changes is None and self._signatures.get(collection) == signature:
+                return
+            line = {
+                "seq": self._seq + 1,
+                "collection": collection,
+                "at": time.time(),
+                "sig": signature,
+                "changes": None if changes is None else [_logged_change(c) for c in changes],
+            }
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, (json.dumps(line, default=str) + "\n").encode())
+            finally:
+                os.close(fd)
+            self._catch_up()
+            retained = sum(len(log) for log in self._entries.values())
+            if self._file_entries > max(self.max_entries, 2 * retained):
+                self._rewrite(self.epoch)
+
+    def _file_signature(self, collection: str) -> Optional[FileSignature]:
+        try:
+            st = os.stat(os.path.join(os.path.dirname(self.path), f"{collection}.json"))
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    # Reads whatever other processes (or this one) appended since the last
+    # call; a replaced file is read again from the start.
+    def _catch_up(self):
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            file_id = os.fstat(f.fileno()).st_ino
+            if file_id != self._file_id:
+                self._file_id = file_id
+                self._offset = 0
+                self._file_entries = 0
+                self._entries.clear()
+                self._truncated_through.clear()
+                self._signatures.clear()
+                self._seq = 0
+            f.seek(self._offset)
+            data = f.read()
+        # A line still being appended is read next time.
+        end = data.rfind(b"\n") + 1
+        for raw in data[:end].splitlines():
+            line = json.loads(raw)
+            if "epoch" in line:
+                self.epoch = line["epoch"]
+                self._seq = line["seq"]
+                self._truncated_through.update(line["truncated"])
+                self._signatures.update({c: tuple(sig) if sig else None for c, sig in line["signatures"].items()})
+                continue
+            changes = line["changes"]
+            if "sig" in line:
+                self._signatures[line["collection"]] = tuple(line["sig"]) if line["sig"] else None
+            self._apply(line["collection"], None if changes is None else [Change(*c) for c in changes],
+                        line["seq"], line["at"])
+            self._file_entries += len(changes) if changes else 1
+        self._offset += end
+
+    def _rewrite(self, epoch: str):
+        header = {
+            "epoch": epoch,
+            "seq": self._seq,
+            "truncated": self._truncated_through,
+            "signatures": self._signatures,
+        }
+        entries = sorted((e for log in self._entries.values() for e in log), key=lambda e: e.seq)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(json.dumps(header) + "\n")
+            for entry in entries:
+                f.write(json.dumps({
+                    "seq": entry.seq,
+                    "collection": entry.collection,
+                    "at": entry.at,
+                    "changes": [_logged_change(entry.change)],
+                }, default=str) + "\n")
+        os.replace(tmp_path, self.path)
+        self._catch_up()
+
+    def since(self, collections: List[str], seq: int) -> Tuple[List[LoggedChange], List[str], int]:
+        with self._lock:
+            if self.path is not None:
+                self._catch_up()
+            resync = [c for c in collections if self._truncated_through.get(c, 0) > seq]
+            entries: List[LoggedChange] = []
+            for collection in collections:
+                if collection in resync:
+                    continue
+                for entry in reversed(self._entries.get(collection, ())):
+                    if entry.seq <= seq:
+                        break
+                    entries.append(entry)
+            entries.sort(key=lambda e: e.seq)
+            return entries, resync, self._seq
+
+
+def _logged_change(change: Change) -> list:
+    # Readers only need the old row of a delete.
+    return [change.op, change.id, change.before if change.after is None else None, change.after]
+
+
+# Applies one staged write to a collection's rows in place and returns
+# (result, changes).
+WriteOp = Callable[[List[Dict[str, Any]]], tuple]
+
+
+class _PendingWrite:
+    __slots__ = ("apply", "result", "error", "done")
+
+    def __init__(self, apply: WriteOp):
+        self.apply = apply
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.done = threading.Event()
+
 
 class JsonDB:
-    def __init__(self, db_path: str = "data"):
+    def __init__(self, db_path: str = "data", group_commit_window: Optional[float] = _group_commit_window_from_env(),
+                 watch_interval: Optional[float] = _watch_interval_from_env()):
         self.db_path = db_path
         if not os.path.exists(db_path):
             os.makedirs(db_path)
+        # Versions start from zero in every process, so the epoch keeps
+        # identifiers derived from them unique across restarts.
+        self.epoch = uuid4().hex
+        self._versions: Dict[str, int] = {}
+        self._versions_lock = threading.Lock()
+        self._write_listeners: List[Callable[[str], None]] = []
+        self._change_listeners: List[ChangeListener] = []
+        self._stats: Dict[str, CollectionStats] = {}
+        self._stats_lock = threading.Lock()
+        # Serializes read-modify-write cycles and transaction commits, across
+        # processes too.
+        self._write_lock = WriteLock(os.path.join(db_path, WRITE_LOCK_NAME))
+        self.change_log = ChangeLog(path=os.path.join(db_path, CHANGE_LOG_NAME), write_lock=self._write_lock)
+        # Seconds a write waits for others to the same collection before
+        # flushing them together; None writes every change on its own.
+        self.group_commit_window = group_commit_window
+        self._pending: Dict[str, List[_PendingWrite]] = {}
+        self._pending_lock = threading.Lock()
+        self._recover()
+        # Signatures of the collection files as this process last wrote or
+        # saw them; sync() compares against them to spot other processes'
+        # writes. Polled every `watch_interval` seconds when set.
+        self._signatures: Dict[str, FileSignature] = self._scan()
+        self.watch_interval = watch_interval
+        if watch_interval:
+            threading.Thread(
+                target=_watch, args=(weakref.ref(self), watch_interval), name="jsondb-watch", daemon=True,
+            ).start()
 
     def _get_file_path(self, collection: str) -> str:
         return os.path.join(self.db_path, f"{collection}.json")
@@ -16,16 +369,181 @@ class JsonDB:
         file_path = self._get_file_path(collection)
         if not os.path.exists(file_path):
             return []
+        started = time.perf_counter()
+        with open(file_path, 'r') as f:
+            raw = f.read()
+        read_done = time.perf_counter()
         try:
-            with open(file_path, 'r') as f:
-                return json.load(f)
+            data = json.loads(raw)
         except json.JSONDecodeError:
-            return []
+            data = []
+        parse_done = time.perf_counter()
 
-    def _write_file(self, collection: str, data: List[Dict[str, Any]]):
-        file_path = self._get_file_path(collection)
-        with open(file_path, 'w') as f:
-            json.dump(data, f, indent=4, default=str)
+        with self._stats_lock:
+            stats = self._collection_stats(collection)
+            stats.reads += 1
+            stats.bytes_read += len(raw)
+            stats.read_seconds += read_done - started
+            stats.parse_seconds += parse_done - read_done
+        record_timing("db_read", read_done - started)
+        record_timing("db_parse", parse_done - read_done)
+        return data
+
+    def _write_file(self, collection: str, data: List[Dict[str, Any]], changes: Optional[List[Change]] = None):
+        self._write_files({collection: data}, {collection: changes} if changes is not None else None)
+
+    def _write_files(self, batch: Dict[str, List[Dict[str, Any]]],
+                     changes: Optional[Dict[str, List[Change]]] = None):
+        # Every collection is written to a temp file and fsynced first. A
+        # single file is then swapped in with an atomic rename; several are
+        # swapped under a journal so _recover() can finish an interrupted
+        # commit instead of leaving half of it applied.
+        started = time.perf_counter()
+        suffix = f".{os.getpid()}.tmp"
+        sizes: Dict[str, int] = {}
+        for collection, data in batch.items():
+            payload = json.dumps(data, indent=4, default=str)
+            with open(self._get_file_path(collection) + suffix, 'w') as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            sizes[collection] = len(payload)
+
+        journal_path = os.path.join(self.db_path, f"{COMMIT_JOURNAL_PREFIX}{os.getpid()}")
+        if len(batch) > 1:
+            with open(journal_path, 'w') as f:
+                json.dump([os.path.basename(self._get_file_path(c)) + suffix for c in batch], f)
+                f.flush()
+                os.fsync(f.fileno())
+            self._fsync_dir()
+        for collection in batch:
+            file_path = self._get_file_path(collection)
+            os.replace(file_path + suffix, file_path)
+            st = os.stat(file_path)
+            self._signatures[collection] = (st.st_ino, st.st_mtime_ns, st.st_size)
+        self._fsync_dir()
+        if len(batch) > 1:
+            os.remove(journal_path)
+        elapsed = time.perf_counter() - started
+
+        with self._stats_lock:
+            for collection, size in sizes.items():
+                stats = self._collection_stats(collection)
+                stats.writes += 1
+                stats.bytes_written += size
+                stats.write_seconds += elapsed / len(sizes)
+        record_timing("db_write", elapsed)
+        for collection in batch:
+            self._bump_version(collection, changes.get(collection) if changes is not None else None)
+
+    def _fsync_dir(self):
+        try:
+            fd = os.open(self.db_path, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def _recover(self):
+        # Leftovers of writers that died mid-commit: journaled temp files are
+        # rolled forward, anything else is discarded. Files owned by live
+        # processes (other workers) are left alone.
+        names = os.listdir(self.db_path)
+        for name in names:
+            if not name.startswith(COMMIT_JOURNAL_PREFIX) or _pid_alive(name[len(COMMIT_JOURNAL_PREFIX):]):
+                continue
+            journal_path = os.path.join(self.db_path, name)
+            try:
+                with open(journal_path) as f:
+                    committed: List[str] = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                # A torn journal means the commit never reached the swap.
+                committed = []
+            for tmp_name in committed:
+                tmp_path = os.path.join(self.db_path, tmp_name)
+                if os.path.exists(tmp_path):
+                    os.replace(tmp_path, tmp_path.rsplit(".", 2)[0])
+            os.remove(journal_path)
+        for name in names:
+            parts = name.rsplit(".", 3)
+            if len(parts) == 4 and parts[1] == "json" and parts[3] == "tmp" and not _pid_alive(parts[2]):
+                tmp_path = os.path.join(self.db_path, name)
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+    def _scan(self) -> Dict[str, FileSignature]:
+        signatures: Dict[str, FileSignature] = {}
+        with os.scandir(self.db_path) as entries:
+            for entry in entries:
+                if not entry.name.endswith(".json") or entry.name.startswith("."):
+                    continue
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                signatures[entry.name[:-len(".json")]] = (st.st_ino, st.st_mtime_ns, st.st_size)
+        return signatures
+
+    # Picks up collections another process (another uvicorn worker, a
+    # script) has written since we last looked. Each gets a new version and
+    # an untracked-change notification, so cached responses, ETags and
+    # indexes built on it are dropped and rebuilt from the file. Returns the
+    # collections that changed.
+    def sync(self) -> List[str]:
+        # Only this process's writers need holding off; the watcher shouldn't
+        # queue behind other processes.
+        with self._write_lock.local:
+            signatures = self._scan()
+            changed = [
+                c for c in set(signatures) | set(self._signatures)
+                if signatures.get(c) != self._signatures.get(c)
+            ]
+            self._signatures = signatures
+            for collection in sorted(changed):
+                self._bump_version(collection, None)
+        return changed
+
+    def _collection_stats(self, collection: str) -> CollectionStats:
+        stats = self._stats.get(collection)
+        if stats is None:
+            stats = CollectionStats()
+            self._stats[collection] = stats
+        return stats
+
+    def record_cache_hit(self, collection: str):
+        with self._stats_lock:
+            self._collection_stats(collection).cache_hits += 1
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._stats_lock:
+            return {name: stats.as_dict() for name, stats in self._stats.items()}
+
+    def _bump_version(self, collection: str, changes: Optional[List[Change]] = None):
+        with self._versions_lock:
+            self._versions[collection] = self._versions.get(collection, 0) + 1
+        self.change_log.record(collection, changes)
+        for listener in self._write_listeners:
+            listener(collection)
+        for change_listener in self._change_listeners:
+            change_listener(collection, changes)
+
+    def add_write_listener(self, listener: Callable[[str], None]):
+        self._write_listeners.append(listener)
+
+    def add_change_listener(self, listener: ChangeListener):
+        self._change_listeners.append(listener)
+
+    def version(self, collection: str) -> int:
+        return self._versions.get(collection, 0)
+
+    # The collection file as this process last wrote or saw it. Unlike
+    # version(), it's the same in every worker once they've synced.
+    def signature(self, collection: str) -> Optional[FileSignature]:
+        return self._signatures.get(collection)
 
     def get_all(self, collection: str) -> List[Dict[str, Any]]:
         return self._read_file(collection)
@@ -45,29 +563,489 @@ class JsonDB:
         return None
 
     def add(self, collection: str, item: Dict[str, Any]) -> Dict[str, Any]:
-        data = self._read_file(collection)
+        if "id" not in item:
+            item["id"] = str(uuid4())
+
+        def apply(data: List[Dict[str, Any]]) -> tuple:
+            data.append(item)
+            return item, [Change("insert", item["id"], None, dict(item))]
+        return self._submit_write(collection, apply)
+
+    def update(self, collection: str, item_id: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        def apply(data: List[Dict[str, Any]]) -> tuple:
+            for item in data:
+                if item.get("id") == item_id:
+                    before = dict(item)
+                    item.update(updates)
+                    return item, [Change("update", item_id, before, dict(item))]
+            return None, []
+        return self._submit_write(collection, apply)
+
+    def delete(self, collection: str, item_id: str) -> bool:
+        def apply(data: List[Dict[str, Any]]) -> tuple:
+            removed = [item for item in data if item.get("id") == item_id]
+            if not removed:
+                return False, []
+            data[:] = [item for item in data if item.get("id") != item_id]
+            return True, [Change("delete", item_id, item, None) for item in removed]
+        return self._submit_write(collection, apply)
+
+    # One pass over the collection however many rows go; returns how many did.
+    def delete_many(self, collection: str, item_ids: Iterable[str]) -> int:
+        ids = set(item_ids)
+        if not ids:
+            return 0
+
+        def apply(data: List[Dict[str, Any]]) -> tuple:
+            removed = [item for item in data if item.get("id") in ids]
+            if removed:
+                data[:] = [item for item in data if item.get("id") not in ids]
+            return len(removed), [Change("delete", item["id"], item, None) for item in removed]
+        return self._submit_write(collection, apply)
+
+    # Compare-and-swap: applies `updates` only if the row's current values
+    # for every field in `expected` still match, all under the write lock.
+    # Returns the updated row, or None if it is gone or was changed.
+    def update_if(self, collection: str, item_id: str, expected: Dict[str, Any],
+                  updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        def apply(data: List[Dict[str, Any]]) -> tuple:
+            for item in data:
+                if item.get("id") == item_id:
+                    if any(item.get(field) != value for field, value in expected.items()):
+                        return None, []
+                    before = dict(item)
+                    item.update(updates)
+                    return item, [Change("update", item_id, before, dict(item))]
+            return None, []
+        return self._submit_write(collection, apply)
+
+    def _submit_write(self, collection: str, apply: WriteOp) -> Any:
+        if self.group_commit_window is None:
+            with self._write_lock:
+                # Once we've written, another process's earlier write would
+                # no longer show up as a changed file.
+                self.sync()
+                data = self._read_file(collection)
+                result, changes = apply(data)
+                if changes:
+                    self._write_file(collection, data, changes)
+            return result
+
+        # Group commit: the first writer to arrive leads, waits out the
+        # window, then applies every write queued for the collection in one
+        # read-modify-write and one durable flush. Writers that queue while
+        # a flush is running form the next group, so batching also happens
+        # naturally under load.
+        pending = _PendingWrite(apply)
+        with self._pending_lock:
+            group = self._pending.get(collection)
+            leader = group is None
+            if leader:
+                group = []
+                self._pending[collection] = group
+            group.append(pending)
+
+        if leader:
+            if self.group_commit_window:
+                time.sleep(self.group_commit_window)
+            with self._write_lock:
+                with self._pending_lock:
+                    batch = self._pending.pop(collection)
+                self._flush_group(collection, batch)
+        else:
+            pending.done.wait()
+
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _flush_group(self, collection: str, batch: List[_PendingWrite]):
+        try:
+            self.sync()
+            while True:
+                data = self._read_file(collection)
+                changes: List[Change] = []
+                for pending in batch:
+                    if pending.error is not None:
+                        continue
+                    try:
+                        pending.result, op_changes = pending.apply(data)
+                    except Exception as exc:
+                        # It may have changed rows before failing: start over
+                        # from the file without it.
+                        pending.error = exc
+                        break
+                    changes.extend(op_changes)
+                else:
+                    break
+            if changes:
+                self._write_file(collection, data, changes)
+        except BaseException as exc:
+            for pending in batch:
+                if pending.error is None:
+                    pending.error = exc
+            raise
+        finally:
+            for pending in batch:
+                pending.done.set()
+
+    @contextmanager
+    def transaction(self) -> Iterator["Transaction"]:
+        tx = Transaction(self)
+        yield tx
+        tx.commit()
+
+
+# Unit of work over several collections: each collection is read at most
+# once, every change is staged in memory, and commit() writes each touched
+# collection once, all or nothing. Leaving `db.transaction()` through an
+# exception discards everything. Commit fails with TransactionConflict if a
+# collection it read was written by someone else in the meantime.
+class Transaction:
+    def __init__(self, db: JsonDB):
+        self._db = db
+        self._data: Dict[str, List[Dict[str, Any]]] = {}
+        self._read_versions: Dict[str, int] = {}
+        # Collections with staged writes, in the order they were touched.
+        self._changes: Dict[str, List[Change]] = {}
+        self._committed = False
+
+    def _load(self, collection: str) -> List[Dict[str, Any]]:
+        data = self._data.get(collection)
+        if data is not None:
+            self._db.record_cache_hit(collection)
+            return data
+        # Taking the version first means a concurrent write can only cause a
+        # spurious conflict, never a missed one.
+        self._read_versions[collection] = self._db.version(collection)
+        data = self._db._read_file(collection)
+        self._data[collection] = data
+        return data
+
+    def _record(self, collection: str, change: Change):
+        self._changes.setdefault(collection, []).append(change)
+
+    def get_all(self, collection: str) -> List[Dict[str, Any]]:
+        return list(self._load(collection))
+
+    def get_by_id(self, collection: str, item_id: str) -> Optional[Dict[str, Any]]:
+        for item in self._load(collection):
+            if item.get("id") == item_id:
+                return item
+        return None
+
+    def get_by_field(self, collection: str, field: str, value: Any) -> Optional[Dict[str, Any]]:
+        for item in self._load(collection):
+            if item.get(field) == value:
+                return item
+        return None
+
+    def add(self, collection: str, item: Dict[str, Any]) -> Dict[str, Any]:
+        data = self._load(collection)
         if "id" not in item:
             item["id"] = str(uuid4())
         data.append(item)
-        self._write_file(collection, data)
+        self._record(collection, Change("insert", item["id"], None, dict(item)))
         return item
 
     def update(self, collection: str, item_id: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        data = self._read_file(collection)
-        for i, item in enumerate(data):
+        for item in self._load(collection):
             if item.get("id") == item_id:
-                data[i].update(updates)
-                self._write_file(collection, data)
-                return data[i]
+                before = dict(item)
+                item.update(updates)
+                self._record(collection, Change("update", item_id, before, dict(item)))
+                return item
         return None
 
     def delete(self, collection: str, item_id: str) -> bool:
-        data = self._read_file(collection)
-        initial_len = len(data)
-        data = [item for item in data if item.get("id") != item_id]
-        if len(data) < initial_len:
-            self._write_file(collection, data)
-            return True
-        return False
+        data = self._load(collection)
+        removed = [item for item in data if item.get("id") == item_id]
+        if not removed:
+            return False
+        data[:] = [item for item in data if item.get("id") != item_id]
+        for item in removed:
+            self._record(collection, Change("delete", item_id, item, None))
+        return True
+
+    # One pass over the collection however many rows go; returns how many did.
+    def delete_many(self, collection: str, item_ids: Iterable[str]) -> int:
+        ids = set(item_ids)
+        if not ids:
+            return 0
+        data = self._load(collection)
+        removed = [item for item in data if item.get("id") in ids]
+        if not removed:
+            return 0
+        data[:] = [item for item in data if item.get("id") not in ids]
+        for item in removed:
+            self._record(collection, Change("delete", item["id"], item, None))
+        return len(removed)
+
+    def commit(self):
+        if self._committed:
+            return
+        self._committed = True
+        if not self._changes:
+            return
+        with self._db._write_lock:
+            self._check_conflicts()
+            self._write_changes()
+
+    # Both need the database's write lock held.
+    def _check_conflicts(self):
+        # Writes from other processes only show up in versions once synced.
+        self._db.sync()
+        for collection, version in self._read_versions.items():
+            if self._db.version(collection) != version:
+                raise TransactionConflict(f"{collection} changed during the transaction")
+
+    def _write_changes(self):
+        if self._changes:
+            self._db._write_files({c: self._data[c] for c in self._changes}, self._changes)
+
+
+DEFAULT_LOCATION = "default"
+
+# Accounts and their sessions are shared by every location; everything else
+# lives in the location's own partition.
+SHARED_COLLECTIONS = frozenset({"users", "refresh_tokens"})
+
+_LOCATION_RE = re.compile(r"^[A-Za-z0-9_-]+$")
+
+# The location the current request or task works on.
+current_location: ContextVar[str] = ContextVar("current_location", default=DEFAULT_LOCATION)
+
+
+class UnknownLocation(Exception):
+    pass
+
+
+@contextmanager
+def use_location(location: str) -> Iterator[None]:
+    token = current_location.set(location)
+    try:
+        yield
+    finally:
+        current_location.reset(token)
+
+
+# LOCATIONS lists the locations besides "default", comma separated. Each
+# partition lives under <DB_PATH>/locations/<name> unless given as
+# name=/path, so a busy location can sit on its own disk or mount.
+def _locations_from_env(db_path: str) -> Dict[str, str]:
+    locations: Dict[str, str] = {}
+    for entry in os.getenv("LOCATIONS", "").split(","):
+        name, _, path = entry.strip().partition("=")
+        name = name.strip()
+        if not name:
+            continue
+        if not _LOCATION_RE.match(name) or name == DEFAULT_LOCATION:
+            raise ValueError(f"Invalid location name: {name!r}")
+        locations[name] = path.strip() or os.path.join(db_path, "locations", name)
+    return locations
+
+
+def _bound(location: str, listener: Callable[..., None]) -> Callable[..., None]:
+    def call(*args):
+        with use_location(location):
+            listener(*args)
+    return call
+
+
+# Routes every JsonDB call to a partition: shared collections to the root
+# directory, the rest to the current location's partition. The default
+# location shares the root directory, so a single-location install keeps its
+# files where they always were. Listeners registered here are attached to
+# every partition and run with current_location set to the one written.
+class PartitionedDB:
+    def __init__(self, db_path: str = "data", locations: Optional[Dict[str, str]] = None,
+                 group_commit_window: Optional[float] = _group_commit_window_from_env()):
+        self.root_path = db_path
+        self.group_commit_window = group_commit_window
+        self.shared = JsonDB(db_path, group_commit_window)
+        self._paths: Dict[str, str] = {DEFAULT_LOCATION: db_path, **(locations or {})}
+        self._partitions: Dict[str, JsonDB] = {DEFAULT_LOCATION: self.shared}
+        self._lock = threading.Lock()
+        self._write_listeners: List[Callable[[str], None]] = []
+        self._change_listeners: List[ChangeListener] = []
+
+    def locations(self) -> List[str]:
+        return list(self._paths)
+
+    def partition(self, location: Optional[str] = None) -> JsonDB:
+        location = location or current_location.get()
+        partition = self._partitions.get(location)
+        if partition is not None:
+            return partition
+        if location not in self._paths:
+            raise UnknownLocation(location)
+        with self._lock:
+            partition = self._partitions.get(location)
+            if partition is None:
+                partition = JsonDB(self._paths[location], self.group_commit_window)
+                for listener in self._write_listeners:
+                    partition.add_write_listener(_bound(location, listener))
+                for change_listener in self._change_listeners:
+                    partition.add_change_listener(_bound(location, change_listener))
+                self._partitions[location] = partition
+        return partition
+
+    # Partitions opened so far, by location.
+    def partitions(self) -> Dict[str, JsonDB]:
+        with self._lock:
+            return dict(self._partitions)
+
+    def _route(self, collection: str) -> JsonDB:
+        return self.shared if collection in SHARED_COLLECTIONS else self.partition()
+
+    def add_write_listener(self, listener: Callable[[str], None]):
+        with self._lock:
+            self._write_listeners.append(listener)
+            for location, partition in self._partitions.items():
+                partition.add_write_listener(_bound(location, listener))
+
+    def add_change_listener(self, listener: ChangeListener):
+        with self._lock:
+            self._change_listeners.append(listener)
+            for location, partition in self._partitions.items():
+                partition.add_change_listener(_bound(location, listener))
+
+    @property
+    def db_path(self) -> str:
+        return self.partition().db_path
+
+    @property
+    def epoch(self) -> str:
+        return self.partition().epoch
+
+    @property
+    def change_log(self) -> ChangeLog:
+        return self.partition().change_log
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return self.partition().stats()
+
+    def record_cache_hit(self, collection: str):
+        self._route(collection).record_cache_hit(collection)
+
+    def version(self, collection: str) -> int:
+        return self._route(collection).version(collection)
+
+    def signature(self, collection: str) -> Optional[FileSignature]:
+        return self._route(collection).signature(collection)
+
+    def get_all(self, collection: str) -> List[Dict[str, Any]]:
+        return self._route(collection).get_all(collection)
+
+    def get_by_id(self, collection: str, item_id: str) -> Optional[Dict[str, Any]]:
+        return self._route(collection).get_by_id(collection, item_id)
+
+    def get_by_field(self, collection: str, field: str, value: Any) -> Optional[Dict[str, Any]]:
+        return self._route(collection).get_by_field(collection, field, value)
+
+    def add(self, collection: str, item: Dict[str, Any]) -> Dict[str, Any]:
+        return self._route(collection).add(collection, item)
+
+    def update(self, collection: str, item_id: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        return self._route(collection).update(collection, item_id, updates)
+
+    def delete(self, collection: str, item_id: str) -> bool:
+        return self._route(collection).delete(collection, item_id)
+
+    def delete_many(self, collection: str, item_ids: Iterable[str]) -> int:
+        return self._route(collection).delete_many(collection, item_ids)
+
+    def update_if(self, collection: str, item_id: str, expected: Dict[str, Any],
+                  updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        return self._route(collection).update_if(collection, item_id, expected, updates)
+
+    @contextmanager
+    def transaction(self) -> Iterator["PartitionedTransaction"]:
+        tx = PartitionedTransaction(self)
+        yield tx
+        tx.commit()
+
+
+# A Transaction per partition it touches. Commit takes every partition's
+# write lock (in path order) and checks them all for conflicts before writing
+# any. Each partition's writes are atomic; one spanning the shared partition
+# and a location is written one partition after the other.
+class PartitionedTransaction:
+    def __init__(self, router: PartitionedDB):
+        self._router = router
+        self._txs: Dict[str, Transaction] = {}
+
+    def _tx(self, collection: str) -> Transaction:
+        partition = self._router._route(collection)
+        tx = self._txs.get(partition.db_path)
+        if tx is None:
+            tx = Transaction(partition)
+            self._txs[partition.db_path] = tx
+        return tx
+
+    def get_all(self, collection: str) -> List[Dict[str, Any]]:
+        return self._tx(collection).get_all(collection)
+
+    def get_by_id(self, collection: str, item_id: str) -> Optional[Dict[str, Any]]:
+        return self._tx(collection).get_by_id(collection, item_id)
+
+    def get_by_field(self, collection: str, field: str, value: Any) -> Optional[Dict[str, Any]]:
+        return self._tx(collection).get_by_field(collection, field, value)
+
+    def add(self, collection: str, item: Dict[str, Any]) -> Dict[str, Any]:
+        return self._tx(collection).add(collection, item)
+
+    def update(self, collection: str, item_id: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        return self._tx(collection).update(collection, item_id, updates)
+
+    def delete(self, collection: str, item_id: str) -> bool:
+        return self._tx(collection).delete(collection, item_id)
+
+    def delete_many(self, collection: str, item_ids: Iterable[str]) -> int:
+        return self._tx(collection).delete_many(collection, item_ids)
+
+    def commit(self):
+        txs = [self._txs[path] for path in sorted(self._txs)]
+        if len(txs) == 1:
+            txs[0].commit()
+            return
+        if not any(tx._changes for tx in txs):
+            return
+        with ExitStack() as stack:
+            for tx in txs:
+                stack.enter_context(tx._db._write_lock)
+            for tx in txs:
+                tx._check_conflicts()
+            for tx in txs:
+                tx._committed = True
+                tx._write_changes()
+
+
+# Derived state kept per location (indexes, pub/sub brokers): one instance
+# per location, built from its partition on first use. Attribute access goes
+# to the current location's instance.
+class LocationLocal:
+    def __init__(self, router: PartitionedDB, factory: Callable[[JsonDB], Any]):
+        self._router = router
+        self._factory = factory
+        self._instances: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def get(self, location: Optional[str] = None) -> Any:
+        location = location or current_location.get()
+        instance = self._instances.get(location)
+        if instance is None:
+            partition = self._router.partition(location)
+            with self._lock:
+                instance = self._instances.get(location)
+                if instance is None:
+                    instance = self._factory(partition)
+                    self._instances[location] = instance
+        return instance
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.get(), name)
+
 
-db = JsonDB(db_path=os.getenv("DB_PATH", "data"))
+_db_path = os.getenv("DB_PATH", "data")
+db = PartitionedDB(db_path=_db_path, locations=_locations_from_env(_db_path))
@@ -0,0 +1,48 @@
+from datetime import date
+from hashlib import sha1
+from typing import List
+
+from fastapi import Depends, HTTPException, Request, Response, status
+
+from app.auth import get_current_user
+from app.db import db
+from app.models import User
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    candidates: List[str] = [c.strip() for c in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+# Versions count from zero in each worker, so the tag is built from the
+# files' signatures instead: any worker gives the same tag for the same data.
+def compute_etag(collections: List[str], *scope: str) -> str:
+    parts = [f"{c}:{db.signature(c)}" for c in collections]
+    parts.extend(scope)
+    return '"' + sha1("|".join(parts).encode()).hexdigest() + '"'
+
+
+# Declare after the route's role check so unauthorised callers still get
+# 401/403 instead of a 304. `daily` is for views that depend on today's date.
+def conditional_get(*collections: str, daily: bool = False):
+    def etag_checker(
+        request: Request,
+        response: Response,
+        current_user: User = Depends(get_current_user),
+    ) -> str:
+        scope = [current_user.id, request.url.path, str(request.url.query)]
+        if daily:
+            scope.append(date.today().isoformat())
+        etag = compute_etag(list(collections), *scope)
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _matches(if_none_match, etag):
+            raise HTTPException(
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers={"ETag": etag, "Cache-Control": "private, no-cache"},
+            )
+
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "private, no-cache"
+        return etag
+    return etag_checker
@@ -0,0 +1,96 @@
+import threading
+from typing import Any, Dict, List, Optional
+
+from app.db import Change, JsonDB, LocationLocal, db
+
+
+# In-memory secondary index: rows of `collection` grouped by the value of
+# `field`. Built lazily from the collection file on first use and then kept
+# current from JsonDB change events; an untracked change drops it so the
+# next lookup rebuilds.
+class FieldIndex:
+    def __init__(self, database: JsonDB, collection: str, field: str):
+        self._db = database
+        self.collection = collection
+        self.field = field
+        self._lock = threading.RLock()
+        self._buckets: Dict[Any, Dict[str, Dict[str, Any]]] = {}
+        self._value_by_id: Dict[str, Any] = {}
+        self._built = False
+        database.add_change_listener(self._on_change)
+
+    def _on_change(self, collection: str, changes: Optional[List[Change]]):
+        if collection != self.collection:
+            return
+        with self._lock:
+            if not self._built:
+                return
+            if changes is None:
+                self._built = False
+                return
+            for change in changes:
+                self._discard(change.id)
+                if change.after is not None:
+                    self._insert(change.after)
+
+    def _ensure_built(self):
+        if self._built:
+            return
+        self._buckets.clear()
+        self._value_by_id.clear()
+        for row in self._db.get_all(self.collection):
+            self._insert(row)
+        self._built = True
+
+    def warm(self):
+        with self._lock:
+            self._ensure_built()
+
+    def _insert(self, row: Dict[str, Any]):
+        row_id = row.get("id")
+        value = row.get(self.field)
+        if not row_id or value is None:
+            return
+        self._buckets.setdefault(value, {})[str(row_id)] = self._stored(row)
+        self._value_by_id[str(row_id)] = value
+
+    def _stored(self, row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        return dict(row)
+
+    def _discard(self, row_id: str):
+        value = self._value_by_id.pop(row_id, None)
+        if value is None:
+            return
+        bucket = self._buckets.get(value)
+        if bucket is not None:
+            bucket.pop(row_id, None)
+            if not bucket:
+                del self._buckets[value]
+
+    def rows(self, value: Any) -> List[Dict[str, Any]]:
+        with self._lock:
+            self._ensure_built()
+            return [dict(row) for row in self._buckets.get(value, {}).values()]
+
+    def ids(self, value: Any) -> List[str]:
+        with self._lock:
+            self._ensure_built()
+            return list(self._buckets.get(value, {}))
+
+    def count(self, value: Any) -> int:
+        with self._lock:
+            self._ensure_built()
+            return len(self._buckets.get(value, {}))
+
+
+# A FieldIndex that keeps only the ids under each value, for lookups that
+# never need the rows themselves.
+class IdIndex(FieldIndex):
+    def _stored(self, row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        return None
+
+    def rows(self, value: Any) -> List[Dict[str, Any]]:
+        raise TypeError("IdIndex keeps no rows; use ids()")
+
+
+leave_status_index = LocationLocal(db, lambda database: FieldIndex(database, "leave_requests", "status"))
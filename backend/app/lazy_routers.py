@@ -0,0 +1,54 @@
+import importlib
+import threading
+from typing import Dict, List, Optional
+
+from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+
+
+# Routers by path prefix, imported and included the first time a request
+# needs one. Importing a router module is most of the app's startup cost
+# (models, schemas, auth dependencies), so an instance only pays for the
+# routes it actually serves.
+class LazyRouters:
+    def __init__(self, modules: Dict[str, str]):
+        self._pending = dict(modules)
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> bool:
+        return bool(self._pending)
+
+    def matching(self, path: str) -> List[str]:
+        return [p for p in self._pending if path == p or path.startswith(p + "/")]
+
+    # Includes the routers for `prefixes`, or all that are left; keeps the
+    # declared order either way.
+    def load(self, app: FastAPI, prefixes: Optional[List[str]] = None):
+        with self._lock:
+            for prefix, module in list(self._pending.items()):
+                if prefixes is not None and prefix not in prefixes:
+                    continue
+                app.include_router(importlib.import_module(module).router)
+                del self._pending[prefix]
+                app.openapi_schema = None
+
+
+class LazyRouterMiddleware:
+    def __init__(self, app, routers: LazyRouters):
+        self.app = app
+        self.routers = routers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] in ("http", "websocket") and self.routers.pending:
+            fastapi_app: FastAPI = scope["app"]
+            path = scope["path"]
+            # The docs need every route.
+            docs = (fastapi_app.openapi_url, fastapi_app.docs_url, fastapi_app.redoc_url)
+            if path in docs or (fastapi_app.docs_url and path.startswith(fastapi_app.docs_url + "/")):
+                await run_in_threadpool(self.routers.load, fastapi_app)
+            else:
+                prefixes = self.routers.matching(path)
+                if prefixes:
+                    await run_in_threadpool(self.routers.load, fastapi_app, prefixes)
+        await self.app(scope, receive, send)
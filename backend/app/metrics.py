@@ -0,0 +1,132 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING", "").lower() in ("1", "true", "yes")
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self._series: Dict[Labels, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, **labels: str):
+        key: Labels = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # One slot per bucket, then sum and count.
+                series = [0.0] * (len(self.buckets) + 2)
+                self._series[key] = series
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series[i] += 1
+            series[-2] += seconds
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {k: list(v) for k, v in self._series.items()}
+        for labels, series in sorted(snapshot.items()):
+            for i, bound in enumerate(self.buckets):
+                lines.append(f"{self.name}_bucket{format_labels(labels, le=repr(bound))} {int(series[i])}")
+            lines.append(f"{self.name}_bucket{format_labels(labels, le='+Inf')} {int(series[-1])}")
+            lines.append(f"{self.name}_sum{format_labels(labels)} {series[-2]:.6f}")
+            lines.append(f"{self.name}_count{format_labels(labels)} {int(series[-1])}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(labels: Labels, **extra: str) -> str:
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in pairs) + "}"
+
+
+request_latency = Histogram(
+    "http_request_duration_seconds",
+    "Time spent handling HTTP requests, by route template.",
+)
+operation_latency = Histogram(
+    "operation_duration_seconds",
+    "Time spent in expensive operations such as password hashing and JWT decoding.",
+)
+
+# Per-request breakdown for the Server-Timing header; None outside a request
+# or when the header is disabled.
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+
+
+def record_timing(name: str, seconds: float):
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+
+@contextmanager
+def timed(operation: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        operation_latency.observe(elapsed, operation=operation)
+        record_timing(operation, elapsed)
+
+
+class MetricsMiddleware:
+    def __init__(self, app, server_timing: bool = SERVER_TIMING_ENABLED):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        timings: Optional[Dict[str, float]] = {} if self.server_timing else None
+        token = _request_timings.set(timings)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if timings is not None:
+                    total = time.perf_counter() - started
+                    entries = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in timings.items()]
+                    entries.append(f"total;dur={total * 1000:.2f}")
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", ", ".join(entries).encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_timings.reset(token)
+            route = scope.get("route")
+            request_latency.observe(
+                time.perf_counter() - started,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=str(status_code),
+            )
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List
+from typing import Optional, List, Dict
 from enum import Enum
 from datetime import datetime
 
@@ -19,11 +19,18 @@ class UserCreate(UserBase):
 
 class User(UserBase):
     id: str
+    # Home location; None means the default one.
+    location: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.now)
 
 class Token(BaseModel):
     access_token: str
     token_type: str
+    expires_in: Optional[int] = None
+    refresh_token: Optional[str] = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
 class TokenData(BaseModel):
     username: Optional[str] = None
@@ -50,3 +57,8 @@ class Employee(EmployeeBase):
     user_id: Optional[str] = None
     joining_date: datetime = Field(default_factory=datetime.now)
     is_active: bool = True
+
+class EmployeeSearchResult(BaseModel):
+    total: int
+    results: List[Employee]
+    facets: Dict[str, Dict[str, int]]
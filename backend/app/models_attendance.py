@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime
+from typing import List, Optional
 from enum import Enum
 
 class AttendanceStatus(str, Enum):
@@ -35,3 +35,46 @@ class EmployeeSummary(BaseModel):
 
 class AttendanceAdminRecord(AttendanceRecord):
     employee: EmployeeSummary
+
+
+class PresenceCount(BaseModel):
+    date: date
+    department: Optional[str] = None
+    present: int
+    active_employees: int
+    attendance_rate: float
+
+
+class EmployeePresence(BaseModel):
+    employee: EmployeeSummary
+    # Days of the month, 1-based.
+    present_days: List[int]
+    days_present: int
+    # Days with a shift so far this month; None without a roster, in which
+    # case attendance_rate is over calendar days.
+    days_scheduled: Optional[int] = None
+    attendance_rate: float
+    # Days in a row without presence up to today, or the month's last day.
+    absence_streak: int
+
+
+class PresenceMonth(BaseModel):
+    month: str
+    department: Optional[str] = None
+    # Days of the month so far, the denominator of the rates.
+    days_elapsed: int
+    present_by_day: List[int]
+    employees: List[EmployeePresence]
+
+
+class DepartmentPresence(BaseModel):
+    department: str
+    headcount: int
+    # Present employees for each day of the month.
+    present: List[int]
+
+
+class PresenceHeatmap(BaseModel):
+    month: str
+    days: int
+    departments: List[DepartmentPresence]
@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+
+class ChangeEntry(BaseModel):
+    seq: int
+    collection: str
+    op: str
+    id: str
+    data: Optional[Dict[str, Any]] = None
+    at: datetime
+
+
+class ChangeFeed(BaseModel):
+    epoch: str
+    next: int
+    has_more: bool
+    resync: List[str]
+    changes: List[ChangeEntry]
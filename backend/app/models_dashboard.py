@@ -28,3 +28,13 @@ class DashboardSummary(BaseModel):
     on_leave_today: int
     recent_activity: List[DashboardActivity]
 
+
+class LocationSummary(BaseModel):
+    location: str
+    summary: DashboardSummary
+
+
+class LocationsDashboard(BaseModel):
+    totals: DashboardSummary
+    locations: List[LocationSummary]
+    unavailable: List[str] = []
@@ -1,8 +1,10 @@
 from pydantic import BaseModel, Field
 from enum import Enum
-from typing import Optional
+from typing import Dict, List, Optional
 from datetime import date, datetime
 
+from app.models_attendance import EmployeeSummary
+
 
 class LeaveType(str, Enum):
     CASUAL = "casual"
@@ -55,3 +57,30 @@ class Holiday(BaseModel):
     id: str
     date: date
     name: str
+
+
+class PendingLeaveRequest(LeaveRequest):
+    employee: Optional[EmployeeSummary] = None
+
+
+class PendingLeaveQueue(BaseModel):
+    total: int
+    offset: int
+    limit: int
+    items: List[PendingLeaveRequest]
+
+
+class LeaveDecision(str, Enum):
+    APPROVE = "approve"
+    REJECT = "reject"
+
+
+class BulkLeaveDecision(BaseModel):
+    leave_ids: List[str]
+    decision: LeaveDecision
+    review_notes: str = ""
+
+
+class BulkLeaveDecisionResult(BaseModel):
+    updated: List[LeaveRequest]
+    skipped: Dict[str, str]
@@ -0,0 +1,28 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Dict
+
+
+class ProfileSummary(BaseModel):
+    id: str
+    # "slow" or "sampled"
+    reason: str
+    method: str
+    path: str
+    route: str
+    path_params: Dict[str, str] = {}
+    query: Dict[str, str] = {}
+    status: int
+    started_at: datetime
+    duration_ms: float
+    # Most requests in flight at once during this one; above 1, the stacks
+    # include the others' too.
+    concurrent_requests: int
+    interval_ms: float
+    samples: int
+    pid: int
+
+
+class Profile(ProfileSummary):
+    # Collapsed stacks ("outer;...;inner") and how many samples each.
+    stacks: Dict[str, int]
@@ -0,0 +1,23 @@
+from pydantic import BaseModel
+from datetime import datetime
+from enum import Enum
+from typing import Dict, Optional
+
+
+class ReportStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class ReportJob(BaseModel):
+    id: str
+    report: str
+    params: Dict[str, Optional[str]]
+    status: ReportStatus
+    cached: bool = False
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+    download_url: Optional[str] = None
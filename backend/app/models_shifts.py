@@ -0,0 +1,34 @@
+from pydantic import BaseModel, Field
+from datetime import date, datetime, time
+from typing import Dict, List, Optional
+
+from app.models_attendance import AttendanceRecord
+
+
+class ShiftTime(BaseModel):
+    start: time
+    # An end at or before the start means the shift runs past midnight.
+    end: time
+
+
+class ShiftRosterUpdate(BaseModel):
+    # Monday first; None is a day off.
+    days: List[Optional[ShiftTime]] = Field(default_factory=lambda: [None] * 7, min_length=7, max_length=7)
+    # Per-date exceptions to the weekly pattern; None is a day off.
+    overrides: Dict[date, Optional[ShiftTime]] = Field(default_factory=dict)
+
+
+class ShiftRoster(ShiftRosterUpdate):
+    id: str
+    employee_id: str
+    updated_at: datetime = Field(default_factory=datetime.now)
+
+
+class ExpectedShift(BaseModel):
+    employee_id: str
+    start: datetime
+    end: datetime
+
+
+class SweepResult(BaseModel):
+    closed: List[AttendanceRecord]
@@ -0,0 +1,141 @@
+import calendar
+import threading
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.db import Change, JsonDB, LocationLocal, db
+
+Month = Tuple[int, int]
+
+
+def _presence_day(row: Optional[Dict[str, Any]]) -> Optional[date]:
+    if not row or not row.get("employee_id") or str(row.get("status")) == "absent":
+        return None
+    try:
+        return date.fromisoformat(str(row.get("punch_in"))[:10])
+    except ValueError:
+        return None
+
+
+# Which employees were present on which days, as bits. Each employee gets a
+# slot number; per month there is one int per day with the slots of everyone
+# present that day set, and one int per employee with a bit per day. A count
+# of present employees, optionally within a group, is then an AND and a
+# bit_count() over the whole roster at once. Built from attendance_records on
+# first use and kept current from punch-ins; edits or deletes that could
+# clear a bit make the next lookup rebuild.
+class PresenceIndex:
+    def __init__(self, database: JsonDB):
+        self._db = database
+        self._lock = threading.RLock()
+        self._slots: Dict[str, int] = {}
+        self._by_day: Dict[Month, List[int]] = {}
+        self._by_employee: Dict[Month, Dict[str, int]] = {}
+        self._built = False
+        database.add_change_listener(self._on_change)
+
+    def _on_change(self, collection: str, changes: Optional[List[Change]]):
+        if collection != "attendance_records":
+            return
+        with self._lock:
+            if not self._built:
+                return
+            if changes is None:
+                self._built = False
+                return
+            for change in changes:
+                before = _presence_day(change.before)
+                after = _presence_day(change.after)
+                if before is not None and (
+                    before != after or change.before.get("employee_id") != change.after.get("employee_id")
+                ):
+                    # Another record may still cover that day; only a rebuild knows.
+                    self._built = False
+                    return
+                if after is not None:
+                    self._mark(change.after["employee_id"], after)
+
+    def _ensure_built(self):
+        if self._built:
+            return
+        self._slots.clear()
+        self._by_day.clear()
+        self._by_employee.clear()
+        for row in self._db.get_all("attendance_records"):
+            day = _presence_day(row)
+            if day is not None:
+                self._mark(row["employee_id"], day)
+        self._built = True
+
+    def warm(self):
+        with self._lock:
+            self._ensure_built()
+
+    def rebuild(self):
+        with self._lock:
+            self._built = False
+            self._ensure_built()
+
+    def _mark(self, employee_id: str, day: date):
+        slot = self._slots.get(employee_id)
+        if slot is None:
+            slot = len(self._slots)
+            self._slots[employee_id] = slot
+        month = (day.year, day.month)
+        days = self._by_day.get(month)
+        if days is None:
+            days = [0] * calendar.monthrange(day.year, day.month)[1]
+            self._by_day[month] = days
+        days[day.day - 1] |= 1 << slot
+        employees = self._by_employee.setdefault(month, {})
+        employees[employee_id] = employees.get(employee_id, 0) | 1 << (day.day - 1)
+
+    # Slots of `employee_ids` as one bitset, to narrow counts to a group.
+    def mask(self, employee_ids: Iterable[str]) -> int:
+        with self._lock:
+            self._ensure_built()
+            bits = 0
+            for employee_id in employee_ids:
+                slot = self._slots.get(employee_id)
+                if slot is not None:
+                    bits |= 1 << slot
+            return bits
+
+    def present_count(self, day: date, mask: int) -> int:
+        with self._lock:
+            self._ensure_built()
+            days = self._by_day.get((day.year, day.month))
+            return (days[day.day - 1] & mask).bit_count() if days else 0
+
+    # Present employees within each mask, for every day of the month.
+    def daily_counts(self, year: int, month: int, masks: Dict[str, int]) -> Dict[str, List[int]]:
+        with self._lock:
+            self._ensure_built()
+            days = self._by_day.get((year, month)) or [0] * calendar.monthrange(year, month)[1]
+            return {group: [(bits & mask).bit_count() for bits in days] for group, mask in masks.items()}
+
+    # Bit d-1 set when the employee was present on day d of the month.
+    def days_present(self, employee_id: str, year: int, month: int) -> int:
+        with self._lock:
+            self._ensure_built()
+            return self._by_employee.get((year, month), {}).get(employee_id, 0)
+
+    # Days in a row without presence, ending on `day`; 0 if present that day.
+    # Counts back no further than the earliest month with any presence.
+    def absence_streak(self, employee_id: str, day: date) -> int:
+        with self._lock:
+            self._ensure_built()
+            earliest = min(self._by_day, default=(day.year, day.month))
+            year, month, through = day.year, day.month, day.day
+            streak = 0
+            while (year, month) >= earliest:
+                bits = self._by_employee.get((year, month), {}).get(employee_id, 0) & ((1 << through) - 1)
+                if bits:
+                    return streak + through - bits.bit_length()
+                streak += through
+                year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+                through = calendar.monthrange(year, month)[1]
+            return streak
+
+
+presence_index = LocationLocal(db, PresenceIndex)
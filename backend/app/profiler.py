@@ -0,0 +1,263 @@
+import itertools
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl
+from uuid import uuid4
+
+from fastapi.concurrency import run_in_threadpool
+
+
+def _float_from_env(name: str, default: str) -> float:
+    value = os.getenv(name, default).strip().lower()
+    if value in ("", "off", "none"):
+        return 0.0
+    return float(value)
+
+
+# Off unless one of the first two is set: the fraction of requests to keep a
+# profile of, and the duration from which every request is kept.
+PROFILE_SAMPLE_RATE = _float_from_env("PROFILE_SAMPLE_RATE", "0")
+PROFILE_SLOW_MS = _float_from_env("PROFILE_SLOW_MS", "off")
+PROFILE_INTERVAL_MS = _float_from_env("PROFILE_INTERVAL_MS", "10")
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "100"))
+PROFILE_DIR = os.getenv("PROFILE_DIR") or os.path.join(os.getenv("DB_PATH", "data"), "profiles")
+PROFILING = PROFILE_SAMPLE_RATE > 0 or PROFILE_SLOW_MS > 0
+
+# Stack samples older than this can't belong to a request still worth saving.
+PROFILE_WINDOW_SECONDS = 120.0
+
+# Query parameters never written to disk.
+REDACTED_PARAMS = frozenset({"token", "access_token", "refresh_token", "password"})
+
+# Innermost frames of a thread with nothing to do: an idle threadpool worker
+# or an event loop waiting for I/O.
+IDLE_FRAMES = frozenset({("threading.py", "wait"), ("selectors.py", "select")})
+
+# Code objects from the outermost frame in.
+Stack = Tuple[Any, ...]
+
+
+class _Sample:
+    __slots__ = ("at", "stacks")
+
+    def __init__(self, at: float, stacks: List[Stack]):
+        self.at = at
+        self.stacks = stacks
+
+
+def _is_idle(code) -> bool:
+    return (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+# Wall-clock sampling profiler for request threads. While any request is in
+# flight, a background thread reads the stacks of the event loop and the
+# threadpool workers every interval, skipping idle ones, into a short ring.
+# Requests only note when they started and finished, so one that turns out
+# to be slow still has its samples. Threads are shared, so when requests
+# overlap their samples are mixed; saved profiles record the overlap.
+class Sampler:
+    def __init__(self, interval: float = PROFILE_INTERVAL_MS / 1000.0):
+        self.interval = interval
+        self._samples: Deque[_Sample] = deque(maxlen=max(1, int(PROFILE_WINDOW_SECONDS / interval)))
+        self._lock = threading.Lock()
+        self._active = threading.Event()
+        self._in_flight = 0
+        self._peak_since: Dict[int, int] = {}
+        self._loop_threads: Set[int] = set()
+        self._thread: Optional[threading.Thread] = None
+        self._tokens = itertools.count()
+
+    def _targets(self) -> Set[int]:
+        targets = set(self._loop_threads)
+        for thread in threading.enumerate():
+            # anyio's threadpool, which runs sync endpoints and dependencies.
+            if type(thread).__name__ == "WorkerThread" and thread.ident is not None:
+                targets.add(thread.ident)
+        return targets
+
+    def _run(self):
+        me = threading.get_ident()
+        while True:
+            self._active.wait()
+            started = time.perf_counter()
+            frames = sys._current_frames()
+            stacks: List[Stack] = []
+            for ident in self._targets():
+                frame = frames.get(ident)
+                if ident == me or frame is None or _is_idle(frame.f_code):
+                    continue
+                codes = []
+                while frame is not None:
+                    codes.append(frame.f_code)
+                    frame = frame.f_back
+                codes.reverse()
+                stacks.append(tuple(codes))
+            del frames
+            if stacks:
+                self._samples.append(_Sample(time.time(), stacks))
+            time.sleep(max(0.0, self.interval - (time.perf_counter() - started)))
+
+    def begin(self) -> int:
+        with self._lock:
+            token = next(self._tokens)
+            self._loop_threads.add(threading.get_ident())
+            self._in_flight += 1
+            for key in self._peak_since:
+                self._peak_since[key] = max(self._peak_since[key], self._in_flight)
+            self._peak_since[token] = self._in_flight
+            self._active.set()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+        return token
+
+    # Returns the most requests in flight at once while this one was.
+    def end(self, token: int) -> int:
+        with self._lock:
+            self._in_flight -= 1
+            if not self._in_flight:
+                self._active.clear()
+            return self._peak_since.pop(token, 1)
+
+    def samples(self, since: float, until: float) -> List[_Sample]:
+        return [s for s in list(self._samples) if since <= s.at <= until]
+
+
+def folded(samples: List[_Sample]) -> Dict[str, int]:
+    counts: Counter = Counter()
+    for sample in samples:
+        for stack in sample.stacks:
+            counts[stack] += 1
+    return {";".join(_frame_label(code) for code in stack): n for stack, n in counts.most_common()}
+
+
+# Saved profiles, one JSON file each, newest names sorting last. Every
+# worker writes to the same directory; past `max_files` the oldest go.
+class ProfileStore:
+    def __init__(self, path: str = PROFILE_DIR, max_files: int = PROFILE_MAX_FILES):
+        self.path = path
+        self.max_files = max_files
+
+    def _names(self) -> List[str]:
+        try:
+            return sorted(n for n in os.listdir(self.path) if n.endswith(".json"))
+        except FileNotFoundError:
+            return []
+
+    def save(self, profile: Dict[str, Any]):
+        os.makedirs(self.path, exist_ok=True)
+        file_path = os.path.join(self.path, f"{profile['id']}.json")
+        with open(file_path + ".tmp", "w") as f:
+            json.dump(profile, f)
+        os.replace(file_path + ".tmp", file_path)
+        names = self._names()
+        for name in names[:max(0, len(names) - self.max_files)]:
+            try:
+                os.remove(os.path.join(self.path, name))
+            except FileNotFoundError:
+                pass
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        if os.path.basename(profile_id) != profile_id or profile_id.startswith("."):
+            return None
+        try:
+            with open(os.path.join(self.path, f"{profile_id}.json")) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    # Newest first, without the stacks.
+    def list(self) -> List[Dict[str, Any]]:
+        summaries = []
+        for name in reversed(self._names()):
+            profile = self.get(name[:-len(".json")])
+            if profile is not None:
+                profile.pop("stacks", None)
+                summaries.append(profile)
+        return summaries
+
+
+sampler = Sampler()
+profile_store = ProfileStore()
+
+
+def _profile_id() -> str:
+    # Sorts by capture time across workers.
+    return f"{time.time_ns():020d}-{uuid4().hex[:8]}"
+
+
+def _query(scope) -> Dict[str, str]:
+    pairs = parse_qsl(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True)
+    return {k: ("[redacted]" if k.lower() in REDACTED_PARAMS else v) for k, v in pairs}
+
+
+class ProfilerMiddleware:
+    def __init__(self, app, sample_rate: float = PROFILE_SAMPLE_RATE, slow_ms: float = PROFILE_SLOW_MS,
+                 store: ProfileStore = profile_store):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.store = store
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        token = sampler.begin()
+        started_at = time.time()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000.0
+            concurrent = sampler.end(token)
+            if self.slow_ms and duration_ms >= self.slow_ms:
+                reason = "slow"
+            elif self.sample_rate and random.random() < self.sample_rate:
+                reason = "sampled"
+            else:
+                reason = None
+            if reason is not None:
+                route = scope.get("route")
+                profile = {
+                    "id": _profile_id(),
+                    "reason": reason,
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "route": getattr(route, "path", "unmatched"),
+                    "path_params": {k: str(v) for k, v in scope.get("path_params", {}).items()},
+                    "query": _query(scope),
+                    "status": status_code,
+                    "started_at": datetime.fromtimestamp(started_at).isoformat(),
+                    "duration_ms": round(duration_ms, 2),
+                    "concurrent_requests": concurrent,
+                    "interval_ms": sampler.interval * 1000.0,
+                    "pid": os.getpid(),
+                }
+                await run_in_threadpool(self._save, profile, started_at, started_at + duration_ms / 1000.0)
+
+    def _save(self, profile: Dict[str, Any], since: float, until: float):
+        samples = sampler.samples(since, until)
+        profile["samples"] = len(samples)
+        profile["stacks"] = folded(samples)
+        self.store.save(profile)
@@ -0,0 +1,111 @@
+import functools
+import inspect
+import typing
+from typing import Any, Callable, Dict, Optional, Tuple, Type
+
+from fastapi import HTTPException, Query, Response
+from pydantic import BaseModel, create_model
+
+from app.serialization import RowSerializer, serializer_for
+
+# Selected field name -> None for the whole value, or the selection inside a
+# nested model (`employee.last_name`).
+FieldSet = Dict[str, Optional["FieldSet"]]
+
+FIELDS_DESCRIPTION = "Comma-separated fields to return, e.g. id,punch_in,employee.last_name"
+
+_projections: Dict[Tuple[Type[BaseModel], str], RowSerializer] = {}
+
+
+def _nested_model(annotation: Any) -> Optional[Type[BaseModel]]:
+    candidates = typing.get_args(annotation) or (annotation,)
+    for candidate in candidates:
+        if isinstance(candidate, type) and issubclass(candidate, BaseModel):
+            return candidate
+    return None
+
+
+def parse_fields(model: Type[BaseModel], fields: Optional[str]) -> Optional[FieldSet]:
+    if fields is None or not fields.strip():
+        return None
+    selected: FieldSet = {}
+    for raw in fields.split(","):
+        path = [part.strip() for part in raw.split(".")]
+        if not all(path):
+            continue
+        current_model, current = model, selected
+        for depth, name in enumerate(path):
+            field = current_model.model_fields.get(name) if current_model else None
+            if field is None:
+                raise HTTPException(status_code=400, detail=f"Unknown field: {'.'.join(path[:depth + 1])}")
+            last = depth == len(path) - 1
+            if last:
+                current[name] = None
+                break
+            current_model = _nested_model(field.annotation)
+            if current_model is None:
+                raise HTTPException(status_code=400, detail=f"Field has no subfields: {'.'.join(path[:depth + 1])}")
+            if name in current and current[name] is None:
+                # The whole value is already selected.
+                break
+            current = current.setdefault(name, {})
+    return selected or None
+
+
+def _fields_key(selected: FieldSet) -> str:
+    return ",".join(
+        name if sub is None else f"{name}({_fields_key(sub)})"
+        for name, sub in sorted(selected.items())
+    )
+
+
+def _projected_model(model: Type[BaseModel], selected: FieldSet) -> Type[BaseModel]:
+    definitions: Dict[str, Any] = {}
+    for name, sub in selected.items():
+        field = model.model_fields[name]
+        annotation = field.annotation
+        if sub is not None:
+            nested = _nested_model(annotation)
+            projected = _projected_model(nested, sub)
+            annotation = Optional[projected] if type(None) in typing.get_args(annotation) else projected
+        definitions[name] = (annotation, field)
+    return create_model(f"{model.__name__}Fields", **definitions)
+
+
+def _serializer_for(model: Type[BaseModel], selected: Optional[FieldSet]) -> RowSerializer:
+    if selected is None:
+        return serializer_for(model)
+    key = (model, _fields_key(selected))
+    serializer = _projections.get(key)
+    if serializer is None:
+        serializer = serializer_for(_projected_model(model, selected))
+        _projections[key] = serializer
+    return serializer
+
+
+# Adds a `fields` query parameter to a list endpoint returning rows of
+# `model` and renders the rows through the trusted-row serializer instead of
+# FastAPI's response validation. A selection renders against a model holding
+# only those fields, so the rest of each row is never looked at. Apply below
+# @cached_response so the selection is part of the cache key.
+def sparse_fields(model: Type[BaseModel]):
+    def decorator(func: Callable[..., Any]):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, fields: Optional[str] = None, _fields_response: Response, **kwargs):
+            selected = parse_fields(model, fields)
+            rows = func(*args, **kwargs)
+            if isinstance(rows, Response):
+                return rows
+            body = _serializer_for(model, selected).render(rows)
+            return Response(content=body, media_type="application/json", headers=dict(_fields_response.headers))
+
+        wrapper.__signature__ = signature.replace(parameters=[
+            *signature.parameters.values(),
+            inspect.Parameter("fields", inspect.Parameter.KEYWORD_ONLY, annotation=Optional[str],
+                              default=Query(None, description=FIELDS_DESCRIPTION)),
+            inspect.Parameter("_fields_response", inspect.Parameter.KEYWORD_ONLY, annotation=Response),
+        ])
+        return wrapper
+    return decorator
@@ -0,0 +1,75 @@
+import asyncio
+import threading
+from typing import Optional, Set
+
+# Queued in place of dropped messages when a subscriber falls behind; the
+# consumer should replace its state with a fresh snapshot.
+RESYNC = object()
+
+
+class Subscription:
+    def __init__(self, max_queue: int):
+        self.queue: "asyncio.Queue[object]" = asyncio.Queue(maxsize=max_queue)
+        self.dropped = 0
+
+    async def get(self) -> object:
+        return await self.queue.get()
+
+    def _offer(self, message: object):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Never wait on a slow consumer: throw away its backlog and tell
+            # it to resync instead.
+            while not self.queue.empty():
+                self.queue.get_nowait()
+                self.dropped += 1
+            self.queue.put_nowait(RESYNC)
+
+
+class Broker:
+    def __init__(self, max_queue: int = 64):
+        self.max_queue = max_queue
+        self._subscriptions: Set[Subscription] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    @property
+    def has_subscribers(self) -> bool:
+        return bool(self._subscriptions)
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self.max_queue)
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    # Safe to call from sync endpoints running in the threadpool. Messages
+    # should be pre-serialized so fan-out costs one queue put per subscriber.
+    def publish(self, message: object):
+        loop = self._loop
+        if loop is None or not self._subscriptions:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._fan_out(message)
+        else:
+            try:
+                loop.call_soon_threadsafe(self._fan_out, message)
+            except RuntimeError:
+                # The loop that owned the subscribers has shut down.
+                pass
+
+    def _fan_out(self, message: object):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            subscription._offer(message)
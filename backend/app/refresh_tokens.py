@@ -0,0 +1,99 @@
+import hashlib
+import os
+import secrets
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from app.db import JsonDB, db
+from app.indexes import FieldIndex
+
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
+REFRESH_MAX_SESSIONS = int(os.getenv("REFRESH_MAX_SESSIONS", "10"))
+
+
+class InvalidRefreshToken(Exception):
+    pass
+
+
+def _hash(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _expired(session: Dict[str, Any], now: datetime) -> bool:
+    return datetime.fromisoformat(str(session["expires_at"])) <= now
+
+
+# One refresh_tokens row per login session, holding only hashes: the current
+# token and the one it replaced. Each refresh rotates the session to a new
+# token; presenting the replaced one again means the token was copied, so the
+# session is revoked. Sessions are found through in-memory indexes rather
+# than by scanning the collection.
+class RefreshTokenStore:
+    def __init__(self, database: JsonDB):
+        self._db = database
+        self._by_hash = FieldIndex(database, "refresh_tokens", "token_hash")
+        self._by_previous = FieldIndex(database, "refresh_tokens", "previous_hash")
+        self._by_user = FieldIndex(database, "refresh_tokens", "user_id")
+
+    def issue(self, user_id: str) -> str:
+        token = secrets.token_urlsafe(32)
+        now = datetime.now()
+        sessions = self._by_user.rows(user_id)
+        drop = [s for s in sessions if _expired(s, now)]
+        live = sorted((s for s in sessions if not _expired(s, now)), key=lambda s: str(s.get("created_at")))
+        # Oldest sessions make room once a user is at the limit.
+        drop.extend(live[:max(0, len(live) - REFRESH_MAX_SESSIONS + 1)])
+        # Plain writes rather than one transaction: every login appends to
+        # refresh_tokens, so concurrent logins would keep failing each
+        # other's transactions. Each write is a locked read-modify-write.
+        for session in drop:
+            self._db.delete("refresh_tokens", session["id"])
+        self._db.add("refresh_tokens", {
+            "user_id": user_id,
+            "token_hash": _hash(token),
+            "previous_hash": None,
+            "created_at": now,
+            "rotated_at": now,
+            "expires_at": now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+        })
+        return token
+
+    # Returns the session's user id and its new token.
+    def rotate(self, token: str) -> Tuple[str, str]:
+        token_hash = _hash(token)
+        session = self._find(token_hash)
+        if session is None:
+            reused = next(iter(self._by_previous.rows(token_hash)), None)
+            if reused is not None:
+                self._db.delete("refresh_tokens", reused["id"])
+            raise InvalidRefreshToken()
+        now = datetime.now()
+        if _expired(session, now):
+            self._db.delete("refresh_tokens", session["id"])
+            raise InvalidRefreshToken()
+
+        new_token = secrets.token_urlsafe(32)
+        # Swapped only if the session still holds this token, so of two
+        # refreshes racing with the same token exactly one wins. Other
+        # sessions' writes don't get in the way.
+        rotated = self._db.update_if("refresh_tokens", session["id"], {"token_hash": token_hash}, {
+            "token_hash": _hash(new_token),
+            "previous_hash": token_hash,
+            "rotated_at": now,
+        })
+        if rotated is None:
+            raise InvalidRefreshToken()
+        return session["user_id"], new_token
+
+    def revoke(self, token: str) -> bool:
+        session = self._find(_hash(token))
+        return session is not None and self._db.delete("refresh_tokens", session["id"])
+
+    def revoke_user(self, user_id: str) -> int:
+        return self._db.delete_many("refresh_tokens", self._by_user.ids(user_id))
+
+    def _find(self, token_hash: str) -> Optional[Dict[str, Any]]:
+        return next(iter(self._by_hash.rows(token_hash)), None)
+
+
+refresh_tokens = RefreshTokenStore(db)
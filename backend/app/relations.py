@@ -0,0 +1,152 @@
+import argparse
+import sys
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set
+
+from app.db import (
+    DEFAULT_LOCATION, SHARED_COLLECTIONS, LocationLocal, PartitionedDB, PartitionedTransaction,
+    TransactionConflict, current_location, db, use_location,
+)
+from app.indexes import IdIndex
+
+
+# Rows of `child` belong to the `parent` row whose `parent_field` equals
+# their `field`. Deleting a parent deletes everything that belongs to it.
+# `needs_parent` picks the child rows that are orphans without one; an
+# account, say, only needs an employee if it's a staff login. Orphans of a
+# relation with `purge` off are only reported, never purged.
+class Relation(NamedTuple):
+    child: str
+    field: str
+    parent: str
+    parent_field: str = "id"
+    needs_parent: Callable[[Dict[str, Any]], bool] = lambda row: True
+    purge: bool = True
+
+
+# Parents before children, so a purge sees the rows earlier relations removed.
+RELATIONS: List[Relation] = [
+    Relation("attendance_records", "employee_id", "employees"),
+    Relation("leave_requests", "employee_id", "employees"),
+    Relation("shift_rosters", "employee_id", "employees"),
+    # A staff login with no employee may have registered itself and never
+    # been linked, rather than lost its employee: report it, keep it.
+    Relation("users", "id", "employees", "user_id", needs_parent=lambda user: user.get("role") == "staff",
+             purge=False),
+    Relation("refresh_tokens", "user_id", "users"),
+]
+REPORT_ONLY: Set[str] = {relation.child for relation in RELATIONS if not relation.purge}
+
+
+def _reverse_index(relation: Relation) -> Callable[[], IdIndex]:
+    if relation.child in SHARED_COLLECTIONS:
+        index = IdIndex(db.shared, relation.child, relation.field)
+        return lambda: index
+    local = LocationLocal(db, lambda database: IdIndex(database, relation.child, relation.field))
+    return local.get
+
+
+# Child row ids by foreign key, per relation, kept current like any FieldIndex.
+reverse_indexes: Dict[Relation, Callable[[], IdIndex]] = {
+    relation: _reverse_index(relation) for relation in RELATIONS
+}
+
+
+def _collect(tx: PartitionedTransaction, collection: str, rows: List[Dict[str, Any]],
+             found: Dict[str, Set[str]]):
+    for relation in RELATIONS:
+        if relation.parent != collection:
+            continue
+        # Loaded before the index is asked: a write that lands in between is
+        # a conflict at commit, one that landed before is in the index.
+        tx.get_all(relation.child)
+        index = reverse_indexes[relation]()
+        ids: Set[str] = set()
+        for row in rows:
+            key = row.get(relation.parent_field)
+            if key is not None:
+                ids.update(index.ids(key))
+        ids -= found.setdefault(relation.child, set())
+        if not ids:
+            continue
+        # Rows that can stand on their own (an admin's login) outlive it.
+        children = [r for r in tx.get_all(relation.child) if r.get("id") in ids and relation.needs_parent(r)]
+        found[relation.child] |= {r["id"] for r in children}
+        if children and any(r.parent == relation.child for r in RELATIONS):
+            _collect(tx, relation.child, children, found)
+
+
+# Deletes `row` and everything that belongs to it, transitively, as part of
+# `tx`: one write per collection touched when it commits. Returns the number
+# of rows removed by collection.
+def delete_cascade(tx: PartitionedTransaction, collection: str, row: Dict[str, Any]) -> Dict[str, int]:
+    found: Dict[str, Set[str]] = {collection: {row["id"]}}
+    _collect(tx, collection, [row], found)
+    removed = {name: tx.delete_many(name, ids) for name, ids in found.items()}
+    return {name: count for name, count in removed.items() if count}
+
+
+def _parent_keys(tx: PartitionedTransaction, relation: Relation, locations: List[str]) -> Set[Any]:
+    # Shared rows can belong to a parent in any location.
+    if relation.child in SHARED_COLLECTIONS and relation.parent not in SHARED_COLLECTIONS:
+        scopes = locations
+    else:
+        scopes = [current_location.get()]
+    keys: Set[Any] = set()
+    for location in scopes:
+        with use_location(location):
+            keys.update(row.get(relation.parent_field) for row in tx.get_all(relation.parent))
+    keys.discard(None)
+    return keys
+
+
+# Rows left behind by deletes that didn't cascade, in every location, found
+# and (with `apply`) deleted in one transaction. Returns the counts by
+# location and collection; shared collections are reported under the default
+# location. Orphans of relations in REPORT_ONLY are counted but kept.
+def purge_orphans(database: PartitionedDB = db, apply: bool = True) -> Dict[str, Dict[str, int]]:
+    locations = database.locations()
+    tx = PartitionedTransaction(database)
+    counts: Dict[str, Dict[str, int]] = {}
+    for relation in RELATIONS:
+        scopes = [DEFAULT_LOCATION] if relation.child in SHARED_COLLECTIONS else locations
+        for location in scopes:
+            with use_location(location):
+                keys = _parent_keys(tx, relation, locations)
+                orphans = [
+                    row["id"] for row in tx.get_all(relation.child)
+                    if relation.needs_parent(row) and row.get(relation.field) not in keys
+                ]
+                found = tx.delete_many(relation.child, orphans) if relation.purge else len(orphans)
+            if found:
+                location_counts = counts.setdefault(location, {})
+                location_counts[relation.child] = location_counts.get(relation.child, 0) + found
+    if apply:
+        tx.commit()
+    return counts
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Find rows whose employee or account no longer exists, in every location."
+    )
+    parser.add_argument("--purge", action="store_true", help="delete them (default: only report)")
+    args = parser.parse_args(argv)
+
+    try:
+        counts = purge_orphans(apply=args.purge)
+    except TransactionConflict:
+        print("data changed during the purge, run it again", file=sys.stderr)
+        return 1
+    if not counts:
+        print("no orphans", file=sys.stderr)
+    for location, collections in sorted(counts.items()):
+        for verb, names in (("purged" if args.purge else "found", collections.keys() - REPORT_ONLY),
+                            ("kept", collections.keys() & REPORT_ONLY)):
+            if names:
+                summary = ", ".join(f"{c}={collections[c]}" for c in sorted(names))
+                print(f"{verb} {location}: {summary}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
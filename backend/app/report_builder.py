@@ -0,0 +1,149 @@
+# Report builders that run in worker processes. This module reads the
+# collection files directly and imports nothing from the app, so a spawned
+# worker never sets up its own JsonDB.
+import csv
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+ATTENDANCE_REPORT_SOURCES = ("attendance_records", "employees")
+
+ATTENDANCE_REPORT_HEADER = [
+    "employee_id",
+    "employee_name",
+    "email",
+    "department",
+    "position",
+    "date",
+    "punch_in",
+    "punch_out",
+    "worked_hours",
+    "status",
+    "notes",
+]
+
+
+def month_range(month: str) -> Tuple[datetime, datetime]:
+    month_start = datetime.fromisoformat(f"{month}-01T00:00:00")
+    if month_start.month == 12:
+        return month_start, month_start.replace(year=month_start.year + 1, month=1)
+    return month_start, month_start.replace(month=month_start.month + 1)
+
+
+# Collection files are only ever replaced whole, so inode, mtime and size
+# change with every write, in any process and across restarts.
+def source_version(db_path: str, collection: str) -> str:
+    try:
+        st = os.stat(os.path.join(db_path, f"{collection}.json"))
+    except FileNotFoundError:
+        return "missing"
+    return f"{st.st_ino}:{st.st_mtime_ns}:{st.st_size}"
+
+
+def report_key(db_path: str, report: str, params: Dict[str, Any], versions: Dict[str, str]) -> str:
+    payload = json.dumps(
+        {"db": os.path.abspath(db_path), "report": report, "params": params, "versions": versions},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+def cached_path(cache_dir: str, key: str) -> str:
+    return os.path.join(cache_dir, f"{key}.csv")
+
+
+def _load(db_path: str, collections: Tuple[str, ...]) -> Tuple[Dict[str, List[Dict[str, Any]]], Dict[str, str]]:
+    # Re-read until no file changed underneath us, so the data matches the
+    # versions the artifact is filed under.
+    for _ in range(5):
+        versions = {c: source_version(db_path, c) for c in collections}
+        data: Dict[str, List[Dict[str, Any]]] = {}
+        for collection in collections:
+            try:
+                with open(os.path.join(db_path, f"{collection}.json")) as f:
+                    data[collection] = json.load(f)
+            except FileNotFoundError:
+                data[collection] = []
+        if versions == {c: source_version(db_path, c) for c in collections}:
+            return data, versions
+    raise RuntimeError("Source data kept changing while the report was read")
+
+
+def _write_attendance_csv(f, records: List[Dict[str, Any]], employees: List[Dict[str, Any]], month: str,
+                          employee_id: Optional[str], department: Optional[str]) -> int:
+    month_start, next_month = month_range(month)
+    employee_by_id: Dict[str, Dict[str, Any]] = {e.get("id"): e for e in employees if e.get("id")}
+
+    writer = csv.writer(f)
+    writer.writerow(ATTENDANCE_REPORT_HEADER)
+    rows = 0
+    for record in records:
+        rec_employee_id = record.get("employee_id")
+        if not rec_employee_id:
+            continue
+        if employee_id and rec_employee_id != employee_id:
+            continue
+
+        employee = employee_by_id.get(rec_employee_id)
+        if not employee:
+            continue
+        if department and employee.get("department") != department:
+            continue
+
+        try:
+            punch_in_dt = datetime.fromisoformat(str(record.get("punch_in")))
+        except Exception:
+            continue
+        if not (month_start <= punch_in_dt < next_month):
+            continue
+
+        punch_out_raw = record.get("punch_out")
+        punch_out_dt: Optional[datetime] = None
+        if punch_out_raw:
+            try:
+                punch_out_dt = datetime.fromisoformat(str(punch_out_raw))
+            except Exception:
+                punch_out_dt = None
+
+        worked_hours = ""
+        if punch_out_dt:
+            worked_hours = f"{max(0.0, (punch_out_dt - punch_in_dt).total_seconds() / 3600.0):.2f}"
+
+        full_name = f"{employee.get('first_name', '')} {employee.get('last_name', '')}".strip()
+        writer.writerow([
+            rec_employee_id,
+            full_name,
+            employee.get("email", ""),
+            employee.get("department", ""),
+            employee.get("position", ""),
+            punch_in_dt.date().isoformat(),
+            punch_in_dt.isoformat(sep=" "),
+            punch_out_dt.isoformat(sep=" ") if punch_out_dt else "",
+            worked_hours,
+            record.get("status", ""),
+            record.get("notes", "") or "",
+        ])
+        rows += 1
+    return rows
+
+
+# Builds the attendance CSV into the cache unless it is already there for the
+# data as it is now, and returns its path.
+def build_attendance_report(db_path: str, cache_dir: str, month: str,
+                            employee_id: Optional[str] = None, department: Optional[str] = None) -> str:
+    params = {"month": month, "employee_id": employee_id, "department": department}
+    versions = {c: source_version(db_path, c) for c in ATTENDANCE_REPORT_SOURCES}
+    path = cached_path(cache_dir, report_key(db_path, "attendance", params, versions))
+    if os.path.exists(path):
+        return path
+
+    data, versions = _load(db_path, ATTENDANCE_REPORT_SOURCES)
+    path = cached_path(cache_dir, report_key(db_path, "attendance", params, versions))
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", newline="") as f:
+        _write_attendance_csv(f, data["attendance_records"], data["employees"], month, employee_id, department)
+    os.replace(tmp_path, path)
+    return path
@@ -0,0 +1,223 @@
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Any, Dict, Optional
+from uuid import uuid4
+
+from app.db import JsonDB, current_location, db
+from app.models_reports import ReportStatus
+from app.report_builder import (
+    ATTENDANCE_REPORT_SOURCES, build_attendance_report, cached_path, report_key, source_version,
+)
+
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", "2"))
+REPORT_MAX_PENDING = int(os.getenv("REPORT_MAX_PENDING", "32"))
+REPORT_CACHE_DIR = os.getenv("REPORT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "resto-reports"))
+REPORT_CACHE_FILES = int(os.getenv("REPORT_CACHE_FILES", "64"))
+REPORT_JOB_HISTORY = int(os.getenv("REPORT_JOB_HISTORY", "256"))
+
+
+class ReportQueueFull(Exception):
+    pass
+
+
+class ReportJob:
+    def __init__(self, report: str, params: Dict[str, Any], owner_id: str, location: str):
+        self.id = str(uuid4())
+        self.report = report
+        self.params = params
+        self.owner_id = owner_id
+        self.location = location
+        self.created_at = datetime.now()
+        self.finished_at: Optional[datetime] = None
+        self.future: Optional[Future] = None
+        self.path: Optional[str] = None
+        self.error: Optional[str] = None
+        self.cached = False
+
+    @property
+    def status(self) -> ReportStatus:
+        if self.path is not None:
+            return ReportStatus.DONE
+        if self.error is not None:
+            return ReportStatus.FAILED
+        if self.future is not None and self.future.running():
+            return ReportStatus.RUNNING
+        return ReportStatus.QUEUED
+
+    # What other workers polling for this job get to see.
+    def record(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "report": self.report,
+            "params": self.params,
+            "owner_id": self.owner_id,
+            "location": self.location,
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "path": self.path,
+            "error": self.error,
+            "cached": self.cached,
+        }
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> "ReportJob":
+        job = cls(record["report"], record["params"], record["owner_id"], record["location"])
+        job.id = record["id"]
+        job.created_at = datetime.fromisoformat(record["created_at"])
+        job.finished_at = datetime.fromisoformat(record["finished_at"]) if record["finished_at"] else None
+        job.path = record["path"]
+        job.error = record["error"]
+        job.cached = record["cached"]
+        return job
+
+    def view(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "report": self.report,
+            "params": self.params,
+            "status": self.status,
+            "cached": self.cached,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "download_url": f"/reports/{self.id}/download" if self.path else None,
+        }
+
+
+# Runs report builds on a small pool of spawned worker processes. Finished
+# files stay in `cache_dir` under a key of the report parameters and the
+# source files' versions, so a repeat request is answered from disk until the
+# data changes, and identical requests in flight share one build. Each job is
+# also saved under `cache_dir`/jobs when submitted and when it finishes, so a
+# poll that lands on another uvicorn worker still finds it.
+class ReportJobs:
+    def __init__(self, database: JsonDB, cache_dir: str = REPORT_CACHE_DIR, workers: int = REPORT_WORKERS,
+                 max_pending: int = REPORT_MAX_PENDING):
+        self._db = database
+        self.cache_dir = cache_dir
+        self.workers = workers
+        self.max_pending = max_pending
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.RLock()
+        self._jobs: "OrderedDict[str, ReportJob]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn, not fork: the server process has threads (group commit,
+            # the threadpool) whose locks must not be copied mid-use.
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def submit_attendance(self, owner_id: str, month: str, employee_id: Optional[str] = None,
+                          department: Optional[str] = None) -> ReportJob:
+        params = {"month": month, "employee_id": employee_id, "department": department}
+        versions = {c: source_version(self._db.db_path, c) for c in ATTENDANCE_REPORT_SOURCES}
+        key = report_key(self._db.db_path, "attendance", params, versions)
+        job = ReportJob("attendance", params, owner_id, current_location.get())
+
+        with self._lock:
+            path = cached_path(self.cache_dir, key)
+            if os.path.exists(path):
+                os.utime(path)
+                job.path, job.cached, job.finished_at = path, True, job.created_at
+            else:
+                future = self._inflight.get(key)
+                if future is None:
+                    if len(self._inflight) >= self.max_pending:
+                        raise ReportQueueFull()
+                    future = self._executor().submit(
+                        build_attendance_report, self._db.db_path, self.cache_dir, month, employee_id, department,
+                    )
+                    self._inflight[key] = future
+                    future.add_done_callback(lambda f: self._build_done(key, f))
+                job.future = future
+                future.add_done_callback(lambda f: self._job_done(job, f))
+            self._jobs[job.id] = job
+            while len(self._jobs) > REPORT_JOB_HISTORY:
+                self._jobs.popitem(last=False)
+        self._save_job(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[ReportJob]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        if os.path.basename(job_id) != job_id or job_id.startswith("."):
+            return None
+        try:
+            with open(os.path.join(self._jobs_dir(), f"{job_id}.json")) as f:
+                job = ReportJob.from_record(json.load(f))
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            return None
+        # The cache directory may be shared; never hand out a file outside it.
+        if job.path is not None and os.path.dirname(os.path.realpath(job.path)) != os.path.realpath(self.cache_dir):
+            return None
+        return job
+
+    def _jobs_dir(self) -> str:
+        return os.path.join(self.cache_dir, "jobs")
+
+    def _save_job(self, job: ReportJob):
+        jobs_dir = self._jobs_dir()
+        os.makedirs(jobs_dir, exist_ok=True)
+        file_path = os.path.join(jobs_dir, f"{job.id}.json")
+        # Submit and the build's callback can save the same job at once.
+        with self._lock:
+            with open(f"{file_path}.{os.getpid()}.tmp", "w") as f:
+                json.dump(job.record(), f)
+            os.replace(f"{file_path}.{os.getpid()}.tmp", file_path)
+        entries = sorted((e for e in os.scandir(jobs_dir) if e.name.endswith(".json")),
+                         key=lambda e: e.stat().st_mtime, reverse=True)
+        for entry in entries[REPORT_JOB_HISTORY:]:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+    def _job_done(self, job: ReportJob, future: Future):
+        job.finished_at = datetime.now()
+        if future.cancelled():
+            job.error = "Cancelled"
+        elif future.exception() is not None:
+            job.error = str(future.exception()) or type(future.exception()).__name__
+        else:
+            job.path = future.result()
+        self._save_job(job)
+
+    def _build_done(self, key: str, future: Future):
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+            if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+                self._pool = None
+        self._prune_cache()
+
+    def _prune_cache(self):
+        try:
+            entries = [e for e in os.scandir(self.cache_dir) if e.name.endswith(".csv")]
+        except FileNotFoundError:
+            return
+        entries.sort(key=lambda e: e.stat().st_mtime, reverse=True)
+        for entry in entries[REPORT_CACHE_FILES:]:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+report_jobs = ReportJobs(db)
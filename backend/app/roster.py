@@ -0,0 +1,203 @@
+import asyncio
+import logging
+import os
+import threading
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.db import Change, JsonDB, LocationLocal, TransactionConflict, db, use_location
+from app.models_attendance import AttendanceStatus
+
+LATE_GRACE_MINUTES = int(os.getenv("LATE_GRACE_MINUTES", "10"))
+SHIFT_SWEEP_INTERVAL = float(os.getenv("SHIFT_SWEEP_INTERVAL", "300"))
+SWEEP_GRACE_MINUTES = int(os.getenv("SWEEP_GRACE_MINUTES", "60"))
+AUTO_CLOSE_NOTE = "Auto-closed: no punch-out recorded"
+
+logger = logging.getLogger(__name__)
+
+# (start minute of the day, length in minutes)
+ShiftWindow = Tuple[int, int]
+
+
+def _minutes(value: str) -> int:
+    parsed = time.fromisoformat(value)
+    return parsed.hour * 60 + parsed.minute
+
+
+def _window(shift: Optional[Dict[str, Any]]) -> Optional[ShiftWindow]:
+    if not shift:
+        return None
+    start = _minutes(shift["start"])
+    length = (_minutes(shift["end"]) - start) % 1440 or 1440
+    return start, length
+
+
+# Every employee's shifts as a weekly pattern of seven windows plus
+# exceptions keyed by date ordinal, so the shift on any date is two dict
+# lookups. Built from shift_rosters on first use and kept current from JsonDB
+# change events.
+class ShiftRosterIndex:
+    def __init__(self, database: JsonDB):
+        self._db = database
+        self._lock = threading.RLock()
+        self._weekly: Dict[str, Tuple[Optional[ShiftWindow], ...]] = {}
+        self._overrides: Dict[str, Dict[int, Optional[ShiftWindow]]] = {}
+        self._built = False
+        database.add_change_listener(self._on_change)
+
+    def _on_change(self, collection: str, changes: Optional[List[Change]]):
+        if collection != "shift_rosters":
+            return
+        with self._lock:
+            if not self._built:
+                return
+            if changes is None:
+                self._built = False
+                return
+            for change in changes:
+                if change.before is not None:
+                    self._discard(change.before.get("employee_id"))
+                if change.after is not None:
+                    self._insert(change.after)
+
+    def _ensure_built(self):
+        if self._built:
+            return
+        self._weekly.clear()
+        self._overrides.clear()
+        for row in self._db.get_all("shift_rosters"):
+            self._insert(row)
+        self._built = True
+
+    def warm(self):
+        with self._lock:
+            self._ensure_built()
+
+    def _insert(self, row: Dict[str, Any]):
+        employee_id = row.get("employee_id")
+        if not employee_id:
+            return
+        self._weekly[employee_id] = tuple(_window(shift) for shift in row.get("days") or [None] * 7)
+        overrides = {
+            date.fromisoformat(day).toordinal(): _window(shift)
+            for day, shift in (row.get("overrides") or {}).items()
+        }
+        if overrides:
+            self._overrides[employee_id] = overrides
+        else:
+            self._overrides.pop(employee_id, None)
+
+    def _discard(self, employee_id: Optional[str]):
+        self._weekly.pop(employee_id, None)
+        self._overrides.pop(employee_id, None)
+
+    def shift_on(self, employee_id: str, day: date) -> Optional[Tuple[datetime, datetime]]:
+        with self._lock:
+            self._ensure_built()
+            overrides = self._overrides.get(employee_id)
+            ordinal = day.toordinal()
+            if overrides is not None and ordinal in overrides:
+                window = overrides[ordinal]
+            else:
+                weekly = self._weekly.get(employee_id)
+                window = weekly[day.weekday()] if weekly else None
+        if window is None:
+            return None
+        start = datetime.combine(day, time()) + timedelta(minutes=window[0])
+        return start, start + timedelta(minutes=window[1])
+
+    # Bit d-1 set when the employee has a shift on day d of the month, for
+    # days 1 to `through`; None if they have no roster.
+    def scheduled_days(self, employee_id: str, year: int, month: int, through: int) -> Optional[int]:
+        with self._lock:
+            self._ensure_built()
+            if employee_id not in self._weekly:
+                return None
+            bits = 0
+            for day in range(1, through + 1):
+                if self.shift_on(employee_id, date(year, month, day)) is not None:
+                    bits |= 1 << (day - 1)
+            return bits
+
+    # The shift `at` falls in or, failing that, the one scheduled for its day:
+    # yesterday's overnight shift if it is still running, else today's.
+    def expected_shift(self, employee_id: str, at: datetime) -> Optional[Tuple[datetime, datetime]]:
+        previous = self.shift_on(employee_id, at.date() - timedelta(days=1))
+        if previous is not None and previous[1] > at:
+            return previous
+        return self.shift_on(employee_id, at.date())
+
+
+shift_roster = LocationLocal(db, ShiftRosterIndex)
+
+
+def punch_in_status(employee_id: str, at: datetime) -> AttendanceStatus:
+    shift = shift_roster.expected_shift(employee_id, at)
+    if shift is None:
+        return AttendanceStatus.PRESENT
+    start, end = shift
+    late_by = at - start
+    if late_by <= timedelta(minutes=LATE_GRACE_MINUTES):
+        return AttendanceStatus.PRESENT
+    if late_by < (end - start) / 2:
+        return AttendanceStatus.LATE
+    return AttendanceStatus.HALF_DAY
+
+
+def _auto_close_at(employee_id: str, punch_in: datetime) -> datetime:
+    shift = shift_roster.expected_shift(employee_id, punch_in)
+    if shift is not None and punch_in < shift[1]:
+        return shift[1]
+    return punch_in.replace(hour=23, minute=59, second=59, microsecond=0)
+
+
+# Closes open punches whose shift (or, unscheduled, whose day) ended more than
+# SWEEP_GRACE_MINUTES ago, punching them out at that end. All of them are
+# written in one transaction; raises TransactionConflict if attendance changed
+# underneath it.
+def sweep_stale_punches(now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    now = now or datetime.now()
+    grace = timedelta(minutes=SWEEP_GRACE_MINUTES)
+    stale: List[Tuple[str, datetime]] = []
+    for record in db.get_all("attendance_records"):
+        if record.get("punch_out") is not None or not record.get("employee_id"):
+            continue
+        try:
+            punch_in = datetime.fromisoformat(str(record["punch_in"]))
+        except Exception:
+            continue
+        close_at = _auto_close_at(record["employee_id"], punch_in)
+        if close_at + grace <= now:
+            stale.append((record["id"], close_at))
+    if not stale:
+        return []
+
+    closed: List[Dict[str, Any]] = []
+    with db.transaction() as tx:
+        for record_id, close_at in stale:
+            record = tx.get_by_id("attendance_records", record_id)
+            if record is None or record.get("punch_out") is not None:
+                continue
+            notes = record.get("notes") or ""
+            updates = {"punch_out": close_at, "notes": f"{notes}; {AUTO_CLOSE_NOTE}" if notes else AUTO_CLOSE_NOTE}
+            closed.append(dict(tx.update("attendance_records", record_id, updates)))
+    return closed
+
+
+def _sweep_location(location: str) -> List[Dict[str, Any]]:
+    with use_location(location):
+        return sweep_stale_punches()
+
+
+async def run_sweeper(interval: float = SHIFT_SWEEP_INTERVAL):
+    while True:
+        for location in db.locations():
+            try:
+                await run_in_threadpool(_sweep_location, location)
+            except TransactionConflict:
+                pass  # picked up again on the next pass
+            except Exception:
+                logger.exception("Stale punch sweep failed for location %s", location)
+        await asyncio.sleep(interval)
@@ -1,13 +1,21 @@
 from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi.responses import FileResponse
 from typing import List, Optional, Dict, Any
-from datetime import datetime
-from io import StringIO
-import csv
+from datetime import date, datetime
+import calendar
 from app.db import db
 from app.models import User, Role
-from app.models_attendance import AttendanceRecord, AttendanceAdminRecord, AttendanceStatus
+from app.models_attendance import (
+    AttendanceRecord, AttendanceAdminRecord, PresenceCount, PresenceHeatmap, PresenceMonth,
+)
 from app.auth import get_current_user, check_role
+from app.dashboard_feed import publish_punch_in, publish_punch_out
+from app.etag import conditional_get
+from app.presence import presence_index
+from app.projection import sparse_fields
+from app.roster import punch_in_status, shift_roster
+from app.report_builder import build_attendance_report
+from app.reports import REPORT_CACHE_DIR
 
 router = APIRouter(prefix="/attendance", tags=["attendance"])
 
@@ -33,7 +41,7 @@ def _get_month_range(month: str) -> tuple[datetime, datetime]:
     return month_start, next_month
 
 
-def _employee_summary(employee: Dict[str, Any]) -> Dict[str, Any]:
+def employee_summary(employee: Dict[str, Any]) -> Dict[str, Any]:
     return {
         "id": employee.get("id", ""),
         "first_name": employee.get("first_name", ""),
@@ -58,21 +66,26 @@ def punch_in(
     today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
     records = db.get_all("attendance_records")
     
+    punched_in_today = False
     for record in records:
         if record["employee_id"] == employee_id:
             punch_in_time = datetime.fromisoformat(str(record["punch_in"]))
-            if punch_in_time >= today_start and record["punch_out"] is None:
-                raise HTTPException(status_code=400, detail="Already punched in")
+            if punch_in_time >= today_start:
+                punched_in_today = True
+                if record["punch_out"] is None:
+                    raise HTTPException(status_code=400, detail="Already punched in")
 
+    now = datetime.now()
     new_record = {
         "employee_id": employee_id,
-        "punch_in": datetime.now(),
+        "punch_in": now,
         "punch_out": None,
-        "status": AttendanceStatus.PRESENT,
+        "status": punch_in_status(employee_id, now),
         "notes": ""
     }
     
     created_record = db.add("attendance_records", new_record)
+    publish_punch_in(created_record, first_today=not punched_in_today)
     return created_record
 
 @router.post("/punch-out", response_model=AttendanceRecord)
@@ -101,11 +114,13 @@ def punch_out(
         
     updates = {"punch_out": datetime.now()}
     updated_record = db.update("attendance_records", active_record["id"], updates)
+    publish_punch_out(updated_record)
     return updated_record
 
 @router.get("/me/today", response_model=Optional[AttendanceRecord])
 def get_my_today_attendance(
-    current_user: User = Depends(check_role([Role.STAFF]))
+    current_user: User = Depends(check_role([Role.STAFF])),
+    etag: str = Depends(conditional_get("employees", "attendance_records", daily=True)),
 ):
     employee_id = _get_employee_for_user(current_user.id)["id"]
     today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
@@ -123,9 +138,11 @@ def get_my_today_attendance(
 
 
 @router.get("/me", response_model=List[AttendanceRecord])
+@sparse_fields(AttendanceRecord)
 def get_my_attendance(
     month: str,
-    current_user: User = Depends(check_role([Role.STAFF]))
+    current_user: User = Depends(check_role([Role.STAFF])),
+    etag: str = Depends(conditional_get("employees", "attendance_records")),
 ):
     employee_id = _get_employee_for_user(current_user.id)["id"]
     month_start, next_month = _get_month_range(month)
@@ -144,11 +161,13 @@ def get_my_attendance(
     return results
 
 @router.get("/admin", response_model=List[AttendanceAdminRecord])
+@sparse_fields(AttendanceAdminRecord)
 def get_attendance_admin(
     month: Optional[str] = None,
     employee_id: Optional[str] = None,
     department: Optional[str] = None,
-    current_user: User = Depends(check_role([Role.SUPER_ADMIN, Role.ADMIN, Role.MANAGER]))
+    current_user: User = Depends(check_role([Role.SUPER_ADMIN, Role.ADMIN, Role.MANAGER])),
+    etag: str = Depends(conditional_get("employees", "attendance_records")),
 ):
     records = db.get_all("attendance_records")
     employees = db.get_all("employees")
@@ -181,7 +200,7 @@ def get_attendance_admin(
             if not (month_start <= punch_in_time < next_month):
                 continue
 
-        results.append({**record, "employee": _employee_summary(employee)})
+        results.append({**record, "employee": employee_summary(employee)})
 
     results.sort(key=lambda r: (r.get("employee", {}).get("last_name", ""), r.get("employee", {}).get("first_name", ""), str(r.get("punch_in", ""))))
     return results
@@ -194,86 +213,128 @@ def download_attendance_report_csv(
     department: Optional[str] = None,
     current_user: User = Depends(check_role([Role.SUPER_ADMIN, Role.ADMIN, Role.MANAGER]))
 ):
-    month_start, next_month = _get_month_range(month)
-    records = db.get_all("attendance_records")
-    employees = db.get_all("employees")
-    employee_by_id: Dict[str, Dict[str, Any]] = {e.get("id"): e for e in employees if e.get("id")}
+    _get_month_range(month)
+    path = build_attendance_report(db.db_path, REPORT_CACHE_DIR, month, employee_id, department)
 
-    output = StringIO()
-    writer = csv.writer(output)
-    writer.writerow([
-        "employee_id",
-        "employee_name",
-        "email",
-        "department",
-        "position",
-        "date",
-        "punch_in",
-        "punch_out",
-        "worked_hours",
-        "status",
-        "notes",
-    ])
+    safe_month = month.replace("/", "-")
+    filename = f"attendance_{safe_month}.csv"
+    return FileResponse(path, media_type="text/csv", filename=filename)
 
-    for record in records:
-        rec_employee_id = record.get("employee_id")
-        if not rec_employee_id:
-            continue
-        if employee_id and rec_employee_id != employee_id:
-            continue
+def _active_employees(department: Optional[str] = None) -> List[Dict[str, Any]]:
+    return [
+        e for e in db.get_all("employees")
+        if e.get("id") and bool(e.get("is_active", True))
+        and (department is None or e.get("department") == department)
+    ]
 
-        employee = employee_by_id.get(rec_employee_id)
-        if not employee:
-            continue
-        if department and employee.get("department") != department:
-            continue
 
-        try:
-            punch_in_dt = datetime.fromisoformat(str(record.get("punch_in")))
-        except Exception:
-            continue
-        if not (month_start <= punch_in_dt < next_month):
-            continue
+def _month_or_current(month: Optional[str]) -> tuple[int, int]:
+    if month is None:
+        today = date.today()
+        return today.year, today.month
+    month_start, _ = _get_month_range(month)
+    return month_start.year, month_start.month
 
-        punch_out_raw = record.get("punch_out")
-        punch_out_dt: Optional[datetime] = None
-        if punch_out_raw:
-            try:
-                punch_out_dt = datetime.fromisoformat(str(punch_out_raw))
-            except Exception:
-                punch_out_dt = None
-
-        worked_hours = ""
-        if punch_out_dt:
-            worked_hours = f"{max(0.0, (punch_out_dt - punch_in_dt).total_seconds() / 3600.0):.2f}"
-
-        full_name = f"{employee.get('first_name', '')} {employee.get('last_name', '')}".strip()
-        writer.writerow([
-            rec_employee_id,
-            full_name,
-            employee.get("email", ""),
-            employee.get("department", ""),
-            employee.get("position", ""),
-            punch_in_dt.date().isoformat(),
-            punch_in_dt.isoformat(sep=" "),
-            punch_out_dt.isoformat(sep=" ") if punch_out_dt else "",
-            worked_hours,
-            record.get("status", ""),
-            record.get("notes", "") or "",
-        ])
-
-    content = output.getvalue()
-    output.close()
 
-    safe_month = month.replace("/", "-")
-    filename = f"attendance_{safe_month}.csv"
-    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
-    return StreamingResponse(iter([content]), media_type="text/csv", headers=headers)
+def _rate(present: int, total: int) -> float:
+    return round(present / total * 100.0, 2) if total else 0.0
+
+
+@router.get("/presence", response_model=PresenceCount)
+def get_presence(
+    day: Optional[date] = None,
+    department: Optional[str] = None,
+    current_user: User = Depends(check_role([Role.SUPER_ADMIN, Role.ADMIN, Role.MANAGER])),
+    etag: str = Depends(conditional_get("employees", "attendance_records", daily=True)),
+):
+    day = day or date.today()
+    employees = _active_employees(department)
+    present = presence_index.present_count(day, presence_index.mask(e["id"] for e in employees))
+    return {
+        "date": day,
+        "department": department,
+        "present": present,
+        "active_employees": len(employees),
+        "attendance_rate": _rate(present, len(employees)),
+    }
+
+
+@router.get("/presence/monthly", response_model=PresenceMonth)
+def get_monthly_presence(
+    month: Optional[str] = None,
+    department: Optional[str] = None,
+    current_user: User = Depends(check_role([Role.SUPER_ADMIN, Role.ADMIN, Role.MANAGER])),
+    etag: str = Depends(conditional_get("employees", "attendance_records", "shift_rosters", daily=True)),
+):
+    year, month_number = _month_or_current(month)
+    days_in_month = calendar.monthrange(year, month_number)[1]
+    today = date.today()
+    if (year, month_number) == (today.year, today.month):
+        days_elapsed = today.day
+    else:
+        days_elapsed = days_in_month if (year, month_number) < (today.year, today.month) else 0
+    last_day = date(year, month_number, max(1, days_elapsed))
+
+    employees = _active_employees(department)
+    mask = presence_index.mask(e["id"] for e in employees)
+    by_day = presence_index.daily_counts(year, month_number, {"all": mask})["all"]
+    rows = []
+    for employee in employees:
+        bits = presence_index.days_present(employee["id"], year, month_number)
+        days_present = bits.bit_count()
+        # Out of the days they were due in when rostered, else every day.
+        scheduled = shift_roster.scheduled_days(employee["id"], year, month_number, days_elapsed)
+        if scheduled is None:
+            rate = _rate(days_present, days_elapsed)
+        else:
+            rate = _rate((bits & scheduled).bit_count(), scheduled.bit_count())
+        rows.append({
+            "employee": employee_summary(employee),
+            "present_days": [d + 1 for d in range(days_in_month) if bits >> d & 1],
+            "days_present": days_present,
+            "days_scheduled": None if scheduled is None else scheduled.bit_count(),
+            "attendance_rate": rate,
+            "absence_streak": presence_index.absence_streak(employee["id"], last_day) if days_elapsed else 0,
+        })
+    rows.sort(key=lambda r: (r["employee"]["last_name"], r["employee"]["first_name"]))
+    return {
+        "month": f"{year:04d}-{month_number:02d}",
+        "department": department,
+        "days_elapsed": days_elapsed,
+        "present_by_day": by_day,
+        "employees": rows,
+    }
+
+
+# Present employees per department per day of the month.
+@router.get("/presence/heatmap", response_model=PresenceHeatmap)
+def get_presence_heatmap(
+    month: Optional[str] = None,
+    current_user: User = Depends(check_role([Role.SUPER_ADMIN, Role.ADMIN, Role.MANAGER])),
+    etag: str = Depends(conditional_get("employees", "attendance_records", daily=True)),
+):
+    year, month_number = _month_or_current(month)
+    by_department: Dict[str, List[str]] = {}
+    for employee in _active_employees():
+        by_department.setdefault(employee.get("department") or "", []).append(employee["id"])
+    masks = {dept: presence_index.mask(ids) for dept, ids in by_department.items()}
+    counts = presence_index.daily_counts(year, month_number, masks)
+    return {
+        "month": f"{year:04d}-{month_number:02d}",
+        "days": calendar.monthrange(year, month_number)[1],
+        "departments": [
+            {"department": dept, "headcount": len(by_department[dept]), "present": counts[dept]}
+            for dept in sorted(by_department)
+        ],
+    }
+
 
 @router.get("/", response_model=List[AttendanceRecord])
+@sparse_fields(AttendanceRecord)
 def get_attendance(
     employee_id: Optional[str] = None,
-    current_user: User = Depends(check_role([Role.SUPER_ADMIN, Role.ADMIN, Role.MANAGER, Role.STAFF]))
+    current_user: User = Depends(check_role([Role.SUPER_ADMIN, Role.ADMIN, Role.MANAGER, Role.STAFF])),
+    etag: str = Depends(conditional_get("employees", "attendance_records")),
 ):
     records = db.get_all("attendance_records")
     if current_user.role == Role.STAFF:
@@ -1,14 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from app.auth import get_password_hash, verify_password, create_access_token, get_current_user
+from app.auth import get_password_hash, verify_password, create_access_token, get_current_user, ACCESS_TOKEN_EXPIRE_MINUTES
 from app.db import db
-from app.models import User, UserCreate, Token, Role
+from app.models import User, UserCreate, Token, RefreshRequest, Role
+from app.refresh_tokens import InvalidRefreshToken, refresh_tokens
 from datetime import timedelta
+from typing import Optional
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
+
+def _issue_tokens(user_data: dict, refresh_token: str) -> dict:
+    access_token = create_access_token(
+        data={"sub": user_data["email"], "role": user_data["role"]},
+        expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        "refresh_token": refresh_token,
+    }
+
+
 @router.post("/register", response_model=User)
-def register(user: UserCreate):
+def register(user: UserCreate, x_location: Optional[str] = Header(None)):
+    if x_location and x_location not in db.locations():
+        raise HTTPException(status_code=404, detail="Unknown location")
+
     # Check if user exists
     if db.get_by_field("users", "email", user.email):
         raise HTTPException(status_code=400, detail="Email already registered")
@@ -28,6 +47,7 @@ def register(user: UserCreate):
     
     # Store with hashed password
     stored_user = user_dict.copy()
+    stored_user["location"] = x_location
     # Create user adds ID and created_at
     new_user = db.add("users", stored_user)
     
@@ -42,13 +62,35 @@ def login(form_data: OAuth2PasswordRequestForm = Depends()):
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
-    access_token_expires = timedelta(minutes=30)
-    access_token = create_access_token(
-        data={"sub": user_data["email"], "role": user_data["role"]},
-        expires_delta=access_token_expires
+
+    return _issue_tokens(user_data, refresh_tokens.issue(user_data["id"]))
+
+@router.post("/refresh", response_model=Token)
+def refresh(payload: RefreshRequest):
+    invalid = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid or expired refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
     )
-    return {"access_token": access_token, "token_type": "bearer"}
+    try:
+        user_id, refresh_token = refresh_tokens.rotate(payload.refresh_token)
+    except InvalidRefreshToken:
+        raise invalid
+    user_data = db.get_by_id("users", user_id)
+    if not user_data or not user_data.get("is_active", True):
+        refresh_tokens.revoke_user(user_id)
+        raise invalid
+    return _issue_tokens(user_data, refresh_token)
+
+@router.post("/logout")
+def logout(payload: RefreshRequest):
+    refresh_tokens.revoke(payload.refresh_token)
+    return {"message": "Logged out"}
+
+@router.post("/logout-all")
+def logout_all(current_user: User = Depends(get_current_user)):
+    revoked = refresh_tokens.revoke_user(current_user.id)
+    return {"message": "Logged out of all sessions", "revoked": revoked}
 
 @router.get("/me", response_model=User)
 def read_users_me(current_user: User = Depends(get_current_user)):
@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from app.models import User, Role
+from app.auth import check_role
+from app.backup import BackupError, take_snapshot
+
+router = APIRouter(prefix="/backup", tags=["backup"])
+
+
+# Every location plus the shared accounts, password hashes included, hence
+# super admins only.
+@router.get("/snapshot")
+def download_snapshot(current_user: User = Depends(check_role([Role.SUPER_ADMIN]))):
+    try:
+        snapshot = take_snapshot()
+    except BackupError as exc:
+        raise HTTPException(status_code=503, detail=str(exc))
+    filename = f"resto-backup-{snapshot.created_at:%Y%m%d-%H%M%S}.tar.gz"
+    return StreamingResponse(
+        snapshot.stream(),
+        media_type="application/gzip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,118 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from typing import List, Optional
+from datetime import datetime
+import asyncio
+import os
+from app.db import LocationLocal, LoggedChange, db
+from app.models import User, Role
+from app.models_changes import ChangeEntry, ChangeFeed
+from app.auth import get_current_active_user
+from app.pubsub import Broker
+
+router = APIRouter(prefix="/changes", tags=["changes"])
+
+# users is left out on purpose: its rows carry password hashes.
+FEED_COLLECTIONS = ("employees", "attendance_records", "leave_requests", "holidays")
+CHANGES_MAX_WAIT = float(os.getenv("CHANGES_MAX_WAIT", "30"))
+
+# Wakes a location's parked long-polls whenever one of its feed collections
+# is written.
+change_feed = LocationLocal(db, lambda _: Broker())
+
+
+def _on_write(collection: str):
+    if collection in FEED_COLLECTIONS:
+        change_feed.publish(collection)
+
+
+db.add_write_listener(_on_write)
+
+
+def _get_employee_id_for_user(user_id: str) -> str:
+    for emp in db.get_all("employees"):
+        if emp.get("user_id") == user_id:
+            return emp["id"]
+    raise HTTPException(status_code=404, detail="Employee profile not found for this user")
+
+
+def _visible(entry: LoggedChange, employee_id: Optional[str]) -> bool:
+    # Staff only follow their own profile, attendance and leave.
+    if employee_id is None or entry.collection == "holidays":
+        return True
+    if entry.collection == "employees":
+        return entry.change.id == employee_id
+    row = entry.change.after or entry.change.before or {}
+    return row.get("employee_id") == employee_id
+
+
+def _entry(entry: LoggedChange) -> ChangeEntry:
+    return ChangeEntry(
+        seq=entry.seq,
+        collection=entry.collection,
+        op=entry.change.op,
+        id=entry.change.id,
+        data=entry.change.after,
+        at=datetime.fromtimestamp(entry.at),
+    )
+
+
+def _read_feed(requested: List[str], since: int, epoch: Optional[str], employee_id: Optional[str], limit: int) -> ChangeFeed:
+    change_log = db.change_log
+    entries, resync, last_seq = change_log.since(requested, since)
+    if (epoch is not None and epoch != change_log.epoch) or since > last_seq:
+        # The cursor came from a log that has since been deleted or lost its
+        # tail; nothing it saw can be matched up with this one.
+        return ChangeFeed(epoch=change_log.epoch, next=last_seq, has_more=False, resync=requested, changes=[])
+    visible = [e for e in entries if _visible(e, employee_id)]
+    has_more = len(visible) > limit
+    visible = visible[:limit]
+    return ChangeFeed(
+        epoch=change_log.epoch,
+        next=visible[-1].seq if has_more else last_seq,
+        has_more=has_more,
+        resync=resync,
+        changes=[_entry(e) for e in visible],
+    )
+
+
+@router.get("/", response_model=ChangeFeed)
+async def get_changes(
+    collections: str = Query(",".join(FEED_COLLECTIONS)),
+    since: int = Query(0, ge=0),
+    epoch: Optional[str] = None,
+    wait: float = Query(0, ge=0),
+    limit: int = Query(500, ge=1, le=5000),
+    current_user: User = Depends(get_current_active_user),
+):
+    requested = [c.strip() for c in collections.split(",") if c.strip()]
+    unknown = [c for c in requested if c not in FEED_COLLECTIONS]
+    if unknown or not requested:
+        raise HTTPException(status_code=400, detail=f"Unknown collections: {', '.join(unknown)}" if unknown else "No collections requested")
+
+    employee_id = None
+    if current_user.role == Role.STAFF:
+        employee_id = await run_in_threadpool(_get_employee_id_for_user, current_user.id)
+
+    wait = min(wait, CHANGES_MAX_WAIT)
+    if not wait:
+        return await run_in_threadpool(_read_feed, requested, since, epoch, employee_id, limit)
+
+    # Subscribe before the first read so a write landing in between still
+    # wakes us.
+    subscription = change_feed.subscribe()
+    try:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + wait
+        while True:
+            feed = await run_in_threadpool(_read_feed, requested, since, epoch, employee_id, limit)
+            remaining = deadline - loop.time()
+            if feed.changes or feed.resync or remaining <= 0:
+                break
+            try:
+                await asyncio.wait_for(subscription.get(), remaining)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        change_feed.unsubscribe(subscription)
+    return feed
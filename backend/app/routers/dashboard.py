@@ -1,25 +1,27 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
 from typing import Dict, Any, List, Optional
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 from uuid import uuid4
+import asyncio
+import logging
 
-from app.auth import check_role
-from app.db import db
+from app.auth import check_role, get_current_user
+from app.db import db, use_location
+from app.cache import cached_response, response_cache
+from app.dashboard_feed import SUMMARY_COLLECTIONS, dashboard_feed, employee_view as _employee_view
+from app.etag import conditional_get
+from app.indexes import leave_status_index
 from app.models import Role, User
-from app.models_dashboard import DashboardSummary, DashboardActivity, DashboardEmployee
+from app.models_dashboard import DashboardSummary, DashboardActivity, LocationSummary, LocationsDashboard
+from app.pubsub import RESYNC
 
 
 router = APIRouter(prefix="/dashboard", tags=["dashboard"])
 
+DASHBOARD_ROLES = [Role.SUPER_ADMIN, Role.ADMIN, Role.MANAGER]
 
-def _employee_view(employee: Dict[str, Any]) -> DashboardEmployee:
-    return DashboardEmployee(
-        id=str(employee.get("id") or ""),
-        first_name=str(employee.get("first_name") or ""),
-        last_name=str(employee.get("last_name") or ""),
-        email=employee.get("email"),
-        department=employee.get("department"),
-    )
+logger = logging.getLogger(__name__)
 
 
 def _parse_dt(value: Any) -> Optional[datetime]:
@@ -34,9 +36,15 @@ def _parse_dt(value: Any) -> Optional[datetime]:
 
 
 @router.get("/summary", response_model=DashboardSummary)
+@cached_response(*SUMMARY_COLLECTIONS, daily=True)
 def get_dashboard_summary(
-    current_user: User = Depends(check_role([Role.SUPER_ADMIN, Role.ADMIN, Role.MANAGER]))
+    current_user: User = Depends(check_role(DASHBOARD_ROLES)),
+    etag: str = Depends(conditional_get(*SUMMARY_COLLECTIONS, daily=True)),
 ):
+    return build_dashboard_summary()
+
+
+def build_dashboard_summary() -> DashboardSummary:
     employees = db.get_all("employees")
     employees_by_id: Dict[str, Dict[str, Any]] = {str(e.get("id")): e for e in employees if e.get("id")}
 
@@ -93,7 +101,7 @@ def get_dashboard_summary(
     attendance_rate_today = float((present_today / active_employees) * 100.0) if active_employees > 0 else 0.0
 
     leave_requests = db.get_all("leave_requests")
-    pending_leave_requests = sum(1 for r in leave_requests if str(r.get("status")) == "pending")
+    pending_leave_requests = leave_status_index.count("pending")
 
     today = date.today()
     on_leave_employee_ids: set[str] = set()
@@ -160,3 +168,126 @@ def get_dashboard_summary(
         recent_activity=recent_activity,
     )
 
+
+
+def _summary_json() -> bytes:
+    # Shared by every subscriber and the cross-location view through the
+    # response cache, so a burst of resyncs costs one recomputation per data
+    # change.
+    key = ("dashboard", "summary_json", date.today().isoformat())
+    body = response_cache.get(key)
+    if body is None:
+        versions = [db.version(c) for c in SUMMARY_COLLECTIONS]
+        body = build_dashboard_summary().model_dump_json().encode()
+        response_cache.put(key, body, SUMMARY_COLLECTIONS, versions)
+    return body
+
+
+def _snapshot_message() -> str:
+    return f'{{"type":"snapshot","data":{_summary_json().decode()}}}'
+
+
+def location_summary(location: str) -> DashboardSummary:
+    with use_location(location):
+        return DashboardSummary.model_validate_json(_summary_json())
+
+
+def _combine(summaries: List[DashboardSummary]) -> DashboardSummary:
+    active_employees = sum(s.active_employees for s in summaries)
+    present_today = sum(s.present_today for s in summaries)
+    activity = [a for s in summaries for a in s.recent_activity]
+    activity.sort(key=lambda a: a.timestamp, reverse=True)
+    return DashboardSummary(
+        total_employees=sum(s.total_employees for s in summaries),
+        active_employees=active_employees,
+        present_today=present_today,
+        attendance_rate_today=round(present_today / active_employees * 100.0, 2) if active_employees else 0.0,
+        pending_leave_requests=sum(s.pending_leave_requests for s in summaries),
+        on_leave_today=sum(s.on_leave_today for s in summaries),
+        recent_activity=activity[:10],
+    )
+
+
+# Every location's summary, computed in parallel on the threadpool, plus the
+# totals across them. A location whose partition can't be read is listed in
+# `unavailable` instead of failing the whole view.
+@router.get("/locations", response_model=LocationsDashboard)
+async def get_locations_dashboard(
+    current_user: User = Depends(check_role([Role.SUPER_ADMIN])),
+):
+    locations = db.locations()
+    results = await asyncio.gather(
+        *(run_in_threadpool(location_summary, location) for location in locations),
+        return_exceptions=True,
+    )
+    summaries: List[LocationSummary] = []
+    unavailable: List[str] = []
+    for location, result in zip(locations, results):
+        if isinstance(result, Exception):
+            logger.error("Dashboard summary failed for location %s", location, exc_info=result)
+            unavailable.append(location)
+        else:
+            summaries.append(LocationSummary(location=location, summary=result))
+    return LocationsDashboard(
+        totals=_combine([s.summary for s in summaries]),
+        locations=summaries,
+        unavailable=unavailable,
+    )
+
+
+def _seconds_until_midnight() -> float:
+    now = datetime.now()
+    midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return (midnight - now).total_seconds()
+
+
+async def _wait_for_disconnect(websocket: WebSocket):
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+
+
+@router.websocket("/ws")
+async def dashboard_ws(websocket: WebSocket, token: str = "", location: str = ""):
+    # Browsers can't set headers on a WebSocket handshake, so the JWT and the
+    # location come in the `token` and `location` query parameters.
+    try:
+        current_user = await get_current_user(token, location or None)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    if not current_user.is_active or current_user.role not in DASHBOARD_ROLES:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    subscription = dashboard_feed.subscribe()
+    disconnected = asyncio.create_task(_wait_for_disconnect(websocket))
+    try:
+        await websocket.send_text(await run_in_threadpool(_snapshot_message))
+        while True:
+            next_message = asyncio.create_task(subscription.get())
+            done, _ = await asyncio.wait(
+                {next_message, disconnected},
+                timeout=_seconds_until_midnight(),
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if disconnected in done:
+                next_message.cancel()
+                return
+            if next_message not in done:
+                # Day rolled over: today's counters start from scratch.
+                next_message.cancel()
+                await websocket.send_text(await run_in_threadpool(_snapshot_message))
+                continue
+            message = next_message.result()
+            if message is RESYNC:
+                await websocket.send_text(await run_in_threadpool(_snapshot_message))
+            else:
+                await websocket.send_text(message)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        dashboard_feed.unsubscribe(subscription)
+        disconnected.cancel()
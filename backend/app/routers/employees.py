@@ -1,15 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
-from app.db import db
-from app.models import Employee, EmployeeCreate, EmployeeLoginCreate, User, Role
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Optional
+from app.db import current_location, db, TransactionConflict
+from app.models import Employee, EmployeeCreate, EmployeeLoginCreate, EmployeeSearchResult, User, Role
+from app.relations import delete_cascade
+from app.search import employee_search
 from app.auth import check_role, get_password_hash
+from app.cache import cached_response
+from app.etag import conditional_get
+from app.projection import sparse_fields
 from datetime import datetime
 
 router = APIRouter(prefix="/employees", tags=["employees"])
 
 @router.get("/", response_model=List[Employee])
+@cached_response("employees")
+@sparse_fields(Employee)
 def get_employees(
-    current_user: User = Depends(check_role([Role.SUPER_ADMIN, Role.ADMIN, Role.MANAGER]))
+    current_user: User = Depends(check_role([Role.SUPER_ADMIN, Role.ADMIN, Role.MANAGER])),
+    etag: str = Depends(conditional_get("employees")),
 ):
     return db.get_all("employees")
 
@@ -28,7 +36,8 @@ def create_employee(
 
 @router.get("/me", response_model=Employee)
 def get_my_employee_profile(
-    current_user: User = Depends(check_role([Role.SUPER_ADMIN, Role.ADMIN, Role.MANAGER, Role.STAFF]))
+    current_user: User = Depends(check_role([Role.SUPER_ADMIN, Role.ADMIN, Role.MANAGER, Role.STAFF])),
+    etag: str = Depends(conditional_get("employees")),
 ):
     employees = db.get_all("employees")
     for emp in employees:
@@ -36,10 +45,22 @@ def get_my_employee_profile(
             return emp
     raise HTTPException(status_code=404, detail="Employee profile not found for this user")
 
+@router.get("/search", response_model=EmployeeSearchResult)
+def search_employees(
+    q: str = "",
+    department: Optional[str] = None,
+    position: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(check_role([Role.SUPER_ADMIN, Role.ADMIN, Role.MANAGER]))
+):
+    return employee_search.search(q, department=department, position=position, limit=limit)
+
 @router.get("/{employee_id}", response_model=Employee)
+@cached_response("employees")
 def get_employee(
     employee_id: str,
-    current_user: User = Depends(check_role([Role.SUPER_ADMIN, Role.ADMIN, Role.MANAGER]))
+    current_user: User = Depends(check_role([Role.SUPER_ADMIN, Role.ADMIN, Role.MANAGER])),
+    etag: str = Depends(conditional_get("employees")),
 ):
     employee = db.get_by_id("employees", employee_id)
     if not employee:
@@ -64,9 +85,16 @@ def delete_employee(
     employee_id: str,
     current_user: User = Depends(check_role([Role.SUPER_ADMIN, Role.ADMIN]))
 ):
-    if not db.delete("employees", employee_id):
-        raise HTTPException(status_code=404, detail="Employee not found")
-    return {"message": "Employee deleted successfully"}
+    # Their login, sessions, attendance, leave and roster go with them.
+    try:
+        with db.transaction() as tx:
+            employee = tx.get_by_id("employees", employee_id)
+            if not employee:
+                raise HTTPException(status_code=404, detail="Employee not found")
+            removed = delete_cascade(tx, "employees", employee)
+    except TransactionConflict:
+        raise HTTPException(status_code=409, detail="Employee was modified concurrently, please retry")
+    return {"message": "Employee deleted successfully", "removed": removed}
 
 @router.post("/{employee_id}/create-login")
 def create_employee_login(
@@ -74,24 +102,29 @@ def create_employee_login(
     payload: EmployeeLoginCreate,
     current_user: User = Depends(check_role([Role.SUPER_ADMIN, Role.ADMIN]))
 ):
-    employee = db.get_by_id("employees", employee_id)
-    if not employee:
-        raise HTTPException(status_code=404, detail="Employee not found")
+    try:
+        with db.transaction() as tx:
+            employee = tx.get_by_id("employees", employee_id)
+            if not employee:
+                raise HTTPException(status_code=404, detail="Employee not found")
 
-    if employee.get("user_id"):
-        raise HTTPException(status_code=400, detail="Login already created for this employee")
+            if employee.get("user_id"):
+                raise HTTPException(status_code=400, detail="Login already created for this employee")
 
-    email = employee["email"]
-    if db.get_by_field("users", "email", email):
-        raise HTTPException(status_code=400, detail="A user with this email already exists")
+            email = employee["email"]
+            if tx.get_by_field("users", "email", email):
+                raise HTTPException(status_code=400, detail="A user with this email already exists")
 
-    user_dict = {
-        "email": email,
-        "password": get_password_hash(payload.password),
-        "role": payload.role,
-        "is_active": True,
-        "created_at": datetime.now().isoformat(),
-    }
-    created_user = db.add("users", user_dict)
-    db.update("employees", employee_id, {"user_id": created_user["id"]})
+            user_dict = {
+                "email": email,
+                "password": get_password_hash(payload.password),
+                "role": payload.role,
+                "is_active": True,
+                "location": current_location.get(),
+                "created_at": datetime.now().isoformat(),
+            }
+            created_user = tx.add("users", user_dict)
+            tx.update("employees", employee_id, {"user_id": created_user["id"]})
+    except TransactionConflict:
+        raise HTTPException(status_code=409, detail="Employee was modified concurrently, please retry")
     return {"message": "Employee login created successfully", "email": email}
@@ -1,11 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List, Dict, Any
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Dict, Any, Optional
 from datetime import date, datetime, timedelta
 
 from app.auth import check_role
-from app.db import db
+from app.cache import cached_response
+from app.dashboard_feed import publish_leave_applied, publish_leave_decision
+from app.etag import conditional_get
+from app.projection import sparse_fields
+from app.db import db, TransactionConflict
+from app.indexes import leave_status_index
 from app.models import Role, User
-from app.models_leave import LeaveRequest, LeaveRequestCreate, LeaveType, LeaveStatus, LeaveBalance, Holiday
+from app.models_leave import (
+    LeaveRequest, LeaveRequestCreate, LeaveType, LeaveStatus, LeaveBalance, Holiday,
+    PendingLeaveQueue, LeaveDecision, BulkLeaveDecision, BulkLeaveDecisionResult,
+)
+from app.routers.attendance import employee_summary
 
 
 router = APIRouter(prefix="/leaves", tags=["leaves"])
@@ -67,6 +76,15 @@ def _reserved_or_used_days(employee_id: str, leave_type: LeaveType) -> float:
     return float(total)
 
 
+def _review_updates(leave_status: LeaveStatus, current_user: User, review_notes: str) -> Dict[str, Any]:
+    return {
+        "status": leave_status.value,
+        "reviewed_by": current_user.id,
+        "reviewed_at": datetime.now().isoformat(),
+        "review_notes": review_notes,
+    }
+
+
 def _get_total_allowance(employee_id: str, leave_type: LeaveType) -> float:
     balances = db.get_all("leave_balances")
     for b in balances:
@@ -79,15 +97,18 @@ def _get_total_allowance(employee_id: str, leave_type: LeaveType) -> float:
 
 
 @router.get("/holidays", response_model=List[Holiday])
+@cached_response("holidays")
 def list_holidays(
-    current_user: User = Depends(check_role([Role.SUPER_ADMIN, Role.ADMIN, Role.MANAGER, Role.STAFF]))
+    current_user: User = Depends(check_role([Role.SUPER_ADMIN, Role.ADMIN, Role.MANAGER, Role.STAFF])),
+    etag: str = Depends(conditional_get("holidays")),
 ):
     return db.get_all("holidays")
 
 
 @router.get("/balance", response_model=List[LeaveBalance])
 def get_leave_balance(
-    current_user: User = Depends(check_role([Role.STAFF]))
+    current_user: User = Depends(check_role([Role.STAFF])),
+    etag: str = Depends(conditional_get("employees", "leave_requests", "leave_balances")),
 ):
     emp = _get_employee_for_user(current_user.id)
     employee_id = emp["id"]
@@ -102,8 +123,10 @@ def get_leave_balance(
 
 
 @router.get("/history", response_model=List[LeaveRequest])
+@sparse_fields(LeaveRequest)
 def get_leave_history(
-    current_user: User = Depends(check_role([Role.STAFF]))
+    current_user: User = Depends(check_role([Role.STAFF])),
+    etag: str = Depends(conditional_get("employees", "leave_requests")),
 ):
     emp = _get_employee_for_user(current_user.id)
     employee_id = emp["id"]
@@ -164,9 +187,64 @@ def apply_leave(
         "review_notes": None,
     }
     created = db.add("leave_requests", req_dict)
+    publish_leave_applied(created)
     return created
 
 
+@router.get("/pending", response_model=PendingLeaveQueue)
+def list_pending_leaves(
+    department: Optional[str] = None,
+    leave_type: Optional[LeaveType] = None,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    current_user: User = Depends(check_role([Role.SUPER_ADMIN, Role.ADMIN, Role.MANAGER]))
+):
+    pending = leave_status_index.rows(LeaveStatus.PENDING.value)
+    if leave_type:
+        pending = [r for r in pending if r.get("leave_type") == leave_type.value]
+
+    employees_by_id: Dict[str, Dict[str, Any]] = {}
+    if pending:
+        employees_by_id = {e.get("id"): e for e in db.get_all("employees") if e.get("id")}
+    if department:
+        pending = [r for r in pending if employees_by_id.get(r.get("employee_id"), {}).get("department") == department]
+
+    pending.sort(key=lambda r: (str(r.get("applied_at") or ""), str(r.get("id"))))
+    page = pending[offset:offset + limit]
+    items = []
+    for r in page:
+        employee = employees_by_id.get(r.get("employee_id"))
+        items.append({**r, "employee": employee_summary(employee) if employee else None})
+    return {"total": len(pending), "offset": offset, "limit": limit, "items": items}
+
+
+@router.post("/bulk-decision", response_model=BulkLeaveDecisionResult)
+def bulk_decide_leaves(
+    payload: BulkLeaveDecision,
+    current_user: User = Depends(check_role([Role.SUPER_ADMIN, Role.ADMIN, Role.MANAGER]))
+):
+    new_status = LeaveStatus.APPROVED if payload.decision == LeaveDecision.APPROVE else LeaveStatus.REJECTED
+    updates = _review_updates(new_status, current_user, payload.review_notes)
+    updated: List[Dict[str, Any]] = []
+    skipped: Dict[str, str] = {}
+    try:
+        with db.transaction() as tx:
+            for leave_id in dict.fromkeys(payload.leave_ids):
+                leave_req = tx.get_by_id("leave_requests", leave_id)
+                if not leave_req:
+                    skipped[leave_id] = "Leave request not found"
+                elif leave_req.get("status") != LeaveStatus.PENDING.value:
+                    skipped[leave_id] = f"Leave request is {leave_req.get('status')}"
+                else:
+                    updated.append(dict(tx.update("leave_requests", leave_id, updates)))
+    except TransactionConflict:
+        raise HTTPException(status_code=409, detail="Leave requests changed concurrently, please retry")
+
+    for leave_req in updated:
+        publish_leave_decision(leave_req)
+    return {"updated": updated, "skipped": skipped}
+
+
 @router.post("/{leave_id}/cancel", response_model=LeaveRequest)
 def cancel_leave(
     leave_id: str,
@@ -179,7 +257,12 @@ def cancel_leave(
         raise HTTPException(status_code=404, detail="Leave request not found")
     if leave_req.get("status") != LeaveStatus.PENDING.value:
         raise HTTPException(status_code=400, detail="Only pending leave requests can be cancelled")
-    updated = db.update("leave_requests", leave_id, {"status": LeaveStatus.CANCELLED.value})
+    updated = db.update_if(
+        "leave_requests", leave_id, {"status": LeaveStatus.PENDING.value}, {"status": LeaveStatus.CANCELLED.value}
+    )
+    if not updated:
+        raise HTTPException(status_code=409, detail="Leave request was decided concurrently, please reload")
+    publish_leave_decision(updated)
     return updated
 
 
@@ -194,16 +277,13 @@ def approve_leave(
         raise HTTPException(status_code=404, detail="Leave request not found")
     if leave_req.get("status") != LeaveStatus.PENDING.value:
         raise HTTPException(status_code=400, detail="Only pending leave requests can be approved")
-    updated = db.update(
-        "leave_requests",
-        leave_id,
-        {
-            "status": LeaveStatus.APPROVED.value,
-            "reviewed_by": current_user.id,
-            "reviewed_at": datetime.now().isoformat(),
-            "review_notes": review_notes,
-        },
+    updated = db.update_if(
+        "leave_requests", leave_id, {"status": LeaveStatus.PENDING.value},
+        _review_updates(LeaveStatus.APPROVED, current_user, review_notes),
     )
+    if not updated:
+        raise HTTPException(status_code=409, detail="Leave request was decided concurrently, please reload")
+    publish_leave_decision(updated)
     return updated
 
 
@@ -218,14 +298,11 @@ def reject_leave(
         raise HTTPException(status_code=404, detail="Leave request not found")
     if leave_req.get("status") != LeaveStatus.PENDING.value:
         raise HTTPException(status_code=400, detail="Only pending leave requests can be rejected")
-    updated = db.update(
-        "leave_requests",
-        leave_id,
-        {
-            "status": LeaveStatus.REJECTED.value,
-            "reviewed_by": current_user.id,
-            "reviewed_at": datetime.now().isoformat(),
-            "review_notes": review_notes,
-        },
+    updated = db.update_if(
+        "leave_requests", leave_id, {"status": LeaveStatus.PENDING.value},
+        _review_updates(LeaveStatus.REJECTED, current_user, review_notes),
     )
+    if not updated:
+        raise HTTPException(status_code=409, detail="Leave request was decided concurrently, please reload")
+    publish_leave_decision(updated)
     return updated
@@ -0,0 +1,61 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from typing import List
+
+from app.cache import response_cache
+from app.db import db
+from app.metrics import format_labels, operation_latency, request_latency
+
+
+router = APIRouter(tags=["metrics"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+JSONDB_COUNTERS = [
+    ("reads", "jsondb_file_reads_total", "Collection files read and parsed."),
+    ("writes", "jsondb_file_writes_total", "Collection files rewritten."),
+    ("bytes_read", "jsondb_read_bytes_total", "Bytes read from collection files."),
+    ("bytes_written", "jsondb_written_bytes_total", "Bytes written to collection files."),
+    ("read_seconds", "jsondb_read_seconds_total", "Time spent reading collection files."),
+    ("parse_seconds", "jsondb_parse_seconds_total", "Time spent parsing collection JSON."),
+    ("write_seconds", "jsondb_write_seconds_total", "Time spent serializing and writing collection files."),
+    ("cache_hits", "jsondb_cache_hits_total", "Reads served from a cache instead of the collection file."),
+]
+
+
+def _jsondb_lines() -> List[str]:
+    stats = {location: partition.stats() for location, partition in sorted(db.partitions().items())}
+    lines: List[str] = []
+    for field, name, help_text in JSONDB_COUNTERS:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for location, location_stats in stats.items():
+            for collection in sorted(location_stats):
+                value = location_stats[collection][field]
+                labels = format_labels((("location", location), ("collection", collection)))
+                lines.append(f"{name}{labels} {value:.6f}" if isinstance(value, float) else f"{name}{labels} {value}")
+    return lines
+
+
+def _response_cache_lines() -> List[str]:
+    stats = response_cache.stats()
+    return [
+        "# HELP response_cache_hits_total Responses served from the response cache.",
+        "# TYPE response_cache_hits_total counter",
+        f"response_cache_hits_total {stats['hits']}",
+        "# HELP response_cache_misses_total Response cache lookups that had to run the endpoint.",
+        "# TYPE response_cache_misses_total counter",
+        f"response_cache_misses_total {stats['misses']}",
+        "# HELP response_cache_evictions_total Entries evicted to respect the size bound.",
+        "# TYPE response_cache_evictions_total counter",
+        f"response_cache_evictions_total {stats['evictions']}",
+        "# HELP response_cache_entries Entries currently held in the response cache.",
+        "# TYPE response_cache_entries gauge",
+        f"response_cache_entries {stats['entries']}",
+    ]
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def get_metrics():
+    lines = request_latency.render() + operation_latency.render() + _jsondb_lines() + _response_cache_lines()
+    return PlainTextResponse("\n".join(lines) + "\n", media_type=PROMETHEUS_CONTENT_TYPE)
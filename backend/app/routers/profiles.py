@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import PlainTextResponse
+from typing import List
+from app.models import User, Role
+from app.models_profiles import Profile, ProfileSummary
+from app.auth import check_role
+from app.profiler import profile_store
+
+router = APIRouter(prefix="/profiles", tags=["profiles"])
+
+ADMIN_ROLES = [Role.SUPER_ADMIN, Role.ADMIN]
+
+
+def _get_profile(profile_id: str):
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile
+
+
+@router.get("/", response_model=List[ProfileSummary])
+def list_profiles(current_user: User = Depends(check_role(ADMIN_ROLES))):
+    return profile_store.list()
+
+
+@router.get("/{profile_id}", response_model=Profile)
+def get_profile(profile_id: str, current_user: User = Depends(check_role(ADMIN_ROLES))):
+    return _get_profile(profile_id)
+
+
+# One "stack count" line per stack, the input flamegraph.pl and speedscope
+# take.
+@router.get("/{profile_id}/folded", response_class=PlainTextResponse)
+def download_folded(profile_id: str, current_user: User = Depends(check_role(ADMIN_ROLES))):
+    profile = _get_profile(profile_id)
+    body = "".join(f"{stack} {count}\n" for stack, count in profile["stacks"].items())
+    return PlainTextResponse(
+        body,
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.folded"'},
+    )
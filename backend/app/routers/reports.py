@@ -0,0 +1,62 @@
+import os
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from typing import Optional
+from app.db import current_location
+from app.models import User, Role
+from app.models_reports import ReportJob, ReportStatus
+from app.auth import check_role
+from app.report_builder import month_range
+from app.reports import ReportQueueFull, report_jobs
+
+router = APIRouter(prefix="/reports", tags=["reports"])
+
+REPORT_ROLES = [Role.SUPER_ADMIN, Role.ADMIN, Role.MANAGER]
+
+
+def _get_job(job_id: str, current_user: User):
+    job = report_jobs.get(job_id)
+    if (not job or job.location != current_location.get()
+            or (job.owner_id != current_user.id and current_user.role not in (Role.SUPER_ADMIN, Role.ADMIN))):
+        raise HTTPException(status_code=404, detail="Report job not found")
+    return job
+
+
+@router.post("/attendance", response_model=ReportJob, status_code=202)
+def submit_attendance_report(
+    month: str,
+    employee_id: Optional[str] = None,
+    department: Optional[str] = None,
+    current_user: User = Depends(check_role(REPORT_ROLES))
+):
+    try:
+        month_range(month)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid month format. Use YYYY-MM")
+    try:
+        job = report_jobs.submit_attendance(current_user.id, month, employee_id, department)
+    except ReportQueueFull:
+        raise HTTPException(status_code=429, detail="Too many reports in progress, try again shortly")
+    return job.view()
+
+
+@router.get("/{job_id}", response_model=ReportJob)
+def get_report_job(
+    job_id: str,
+    current_user: User = Depends(check_role(REPORT_ROLES))
+):
+    return _get_job(job_id, current_user).view()
+
+
+@router.get("/{job_id}/download")
+def download_report(
+    job_id: str,
+    current_user: User = Depends(check_role(REPORT_ROLES))
+):
+    job = _get_job(job_id, current_user)
+    if job.status != ReportStatus.DONE:
+        raise HTTPException(status_code=409, detail=f"Report is {job.status.value}")
+    if not os.path.exists(job.path):
+        raise HTTPException(status_code=410, detail="Report has expired, submit it again")
+    filename = f"{job.report}_{job.params['month'].replace('/', '-')}.csv"
+    return FileResponse(job.path, media_type="text/csv", filename=filename)
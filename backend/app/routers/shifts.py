@@ -0,0 +1,109 @@
+from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Optional
+from datetime import datetime
+from app.db import db, TransactionConflict
+from app.models import User, Role
+from app.models_shifts import ShiftRoster, ShiftRosterUpdate, ExpectedShift, SweepResult
+from app.auth import check_role
+from app.etag import conditional_get
+from app.roster import shift_roster, sweep_stale_punches
+
+router = APIRouter(prefix="/shifts", tags=["shifts"])
+
+MANAGER_ROLES = [Role.SUPER_ADMIN, Role.ADMIN, Role.MANAGER]
+
+
+def _get_employee_for_user(user_id: str):
+    for emp in db.get_all("employees"):
+        if emp.get("user_id") == user_id:
+            return emp
+    raise HTTPException(status_code=404, detail="Employee profile not found for this user")
+
+
+def _get_roster(employee_id: str):
+    roster = db.get_by_field("shift_rosters", "employee_id", employee_id)
+    if not roster:
+        raise HTTPException(status_code=404, detail="No roster for this employee")
+    return roster
+
+
+@router.get("/roster", response_model=List[ShiftRoster])
+def list_rosters(
+    current_user: User = Depends(check_role(MANAGER_ROLES)),
+    etag: str = Depends(conditional_get("shift_rosters")),
+):
+    return db.get_all("shift_rosters")
+
+
+@router.get("/me", response_model=ShiftRoster)
+def get_my_roster(
+    current_user: User = Depends(check_role([Role.STAFF])),
+    etag: str = Depends(conditional_get("employees", "shift_rosters")),
+):
+    return _get_roster(_get_employee_for_user(current_user.id)["id"])
+
+
+@router.get("/expected", response_model=Optional[ExpectedShift])
+def get_expected_shift(
+    employee_id: Optional[str] = None,
+    at: Optional[datetime] = None,
+    current_user: User = Depends(check_role(MANAGER_ROLES + [Role.STAFF])),
+):
+    if current_user.role == Role.STAFF:
+        employee_id = _get_employee_for_user(current_user.id)["id"]
+    elif not employee_id:
+        raise HTTPException(status_code=400, detail="employee_id is required")
+    shift = shift_roster.expected_shift(employee_id, at or datetime.now())
+    if shift is None:
+        return None
+    return {"employee_id": employee_id, "start": shift[0], "end": shift[1]}
+
+
+@router.get("/roster/{employee_id}", response_model=ShiftRoster)
+def get_roster(
+    employee_id: str,
+    current_user: User = Depends(check_role(MANAGER_ROLES)),
+    etag: str = Depends(conditional_get("shift_rosters")),
+):
+    return _get_roster(employee_id)
+
+
+@router.put("/roster/{employee_id}", response_model=ShiftRoster)
+def set_roster(
+    employee_id: str,
+    payload: ShiftRosterUpdate,
+    current_user: User = Depends(check_role(MANAGER_ROLES))
+):
+    if not db.get_by_id("employees", employee_id):
+        raise HTTPException(status_code=404, detail="Employee not found")
+    values = {**payload.model_dump(mode="json"), "updated_at": datetime.now()}
+    try:
+        with db.transaction() as tx:
+            existing = tx.get_by_field("shift_rosters", "employee_id", employee_id)
+            if existing:
+                roster = tx.update("shift_rosters", existing["id"], values)
+            else:
+                roster = tx.add("shift_rosters", {"employee_id": employee_id, **values})
+    except TransactionConflict:
+        raise HTTPException(status_code=409, detail="Roster changed concurrently, please retry")
+    return roster
+
+
+@router.delete("/roster/{employee_id}")
+def delete_roster(
+    employee_id: str,
+    current_user: User = Depends(check_role(MANAGER_ROLES))
+):
+    db.delete("shift_rosters", _get_roster(employee_id)["id"])
+    return {"message": "Roster deleted successfully"}
+
+
+@router.post("/sweep", response_model=SweepResult)
+def sweep_open_punches(
+    current_user: User = Depends(check_role([Role.SUPER_ADMIN, Role.ADMIN]))
+):
+    try:
+        closed = sweep_stale_punches()
+    except TransactionConflict:
+        raise HTTPException(status_code=409, detail="Attendance changed during the sweep, please retry")
+    return {"closed": closed}
@@ -0,0 +1,246 @@
+import heapq
+import re
+import threading
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.db import Change, JsonDB, LocationLocal, db
+
+SEARCH_FIELDS = ("first_name", "last_name", "email", "phone", "position", "department")
+FACET_FIELDS = ("department", "position")
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(value: Any) -> List[str]:
+    text = str(value or "").lower()
+    tokens = _TOKEN_RE.findall(text)
+    # Phone numbers are searched as one run of digits however they were typed.
+    digits = "".join(ch for ch in text if ch.isdigit())
+    if len(digits) > 1 and digits not in tokens:
+        tokens.append(digits)
+    return tokens
+
+
+def _trigrams(token: str) -> Set[str]:
+    padded = f"  {token}"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _allowed_typos(term: str) -> int:
+    if len(term) < 3:
+        return 0
+    return 1 if len(term) < 6 else 2
+
+
+def _prefix_distance(term: str, token: str, limit: int) -> int:
+    # Edit distance between `term` and the closest prefix of `token`, giving
+    # up once it exceeds `limit`.
+    previous = list(range(len(token) + 1))
+    for i, ch in enumerate(term, 1):
+        current = [i] + [0] * len(token)
+        for j, other in enumerate(token, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ch != other))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return min(previous)
+
+
+class EmployeeSearchIndex:
+    def __init__(self, database: JsonDB):
+        self._db = database
+        self._lock = threading.RLock()
+        self._docs: Dict[str, Dict[str, Any]] = {}
+        self._doc_tokens: Dict[str, Set[str]] = {}
+        self._postings: Dict[str, Set[str]] = {}
+        self._sorted_tokens: List[str] = []
+        self._trigram_tokens: Dict[str, Set[str]] = {}
+        self._facet_postings: Dict[str, Dict[str, Set[str]]] = {field: {} for field in FACET_FIELDS}
+        self._sort_keys: Dict[str, Tuple[str, str, str]] = {}
+        self._built = False
+        database.add_change_listener(self._on_change)
+
+    def _on_change(self, collection: str, changes: Optional[List[Change]]):
+        if collection != "employees":
+            return
+        with self._lock:
+            if not self._built:
+                return
+            if changes is None:
+                self._built = False
+                return
+            for change in changes:
+                self._remove(change.id)
+                if change.after is not None:
+                    self._add(change.after)
+
+    def _ensure_built(self):
+        if self._built:
+            return
+        self._docs.clear()
+        self._doc_tokens.clear()
+        self._postings.clear()
+        self._sorted_tokens.clear()
+        self._trigram_tokens.clear()
+        for postings in self._facet_postings.values():
+            postings.clear()
+        self._sort_keys.clear()
+        for employee in self._db.get_all("employees"):
+            if employee.get("id"):
+                self._add(employee)
+        self._built = True
+
+    def warm(self):
+        with self._lock:
+            self._ensure_built()
+
+    def _add(self, employee: Dict[str, Any]):
+        employee_id = str(employee["id"])
+        tokens: Set[str] = set()
+        for field in SEARCH_FIELDS:
+            tokens.update(tokenize(employee.get(field)))
+        self._docs[employee_id] = dict(employee)
+        self._doc_tokens[employee_id] = tokens
+        self._sort_keys[employee_id] = (
+            str(employee.get("last_name") or "").lower(),
+            str(employee.get("first_name") or "").lower(),
+            employee_id,
+        )
+        for field in FACET_FIELDS:
+            self._facet_postings[field].setdefault(str(employee.get(field) or ""), set()).add(employee_id)
+        for token in tokens:
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = set()
+                self._postings[token] = postings
+                insort(self._sorted_tokens, token)
+                for gram in _trigrams(token):
+                    self._trigram_tokens.setdefault(gram, set()).add(token)
+            postings.add(employee_id)
+
+    def _remove(self, employee_id: str):
+        employee = self._docs.pop(employee_id, None)
+        self._sort_keys.pop(employee_id, None)
+        if employee is not None:
+            for field in FACET_FIELDS:
+                value = str(employee.get(field) or "")
+                ids = self._facet_postings[field].get(value)
+                if ids is not None:
+                    ids.discard(employee_id)
+                    if not ids:
+                        del self._facet_postings[field][value]
+        for token in self._doc_tokens.pop(employee_id, ()):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.discard(employee_id)
+            if postings:
+                continue
+            del self._postings[token]
+            index = bisect_left(self._sorted_tokens, token)
+            if index < len(self._sorted_tokens) and self._sorted_tokens[index] == token:
+                del self._sorted_tokens[index]
+            for gram in _trigrams(token):
+                grams = self._trigram_tokens.get(gram)
+                if grams is not None:
+                    grams.discard(token)
+                    if not grams:
+                        del self._trigram_tokens[gram]
+
+    def _prefix_tokens(self, term: str) -> Iterable[str]:
+        index = bisect_left(self._sorted_tokens, term)
+        while index < len(self._sorted_tokens) and self._sorted_tokens[index].startswith(term):
+            yield self._sorted_tokens[index]
+            index += 1
+
+    def _fuzzy_tokens(self, term: str) -> Iterable[Tuple[str, int]]:
+        limit = _allowed_typos(term)
+        if not limit:
+            return []
+        candidates: Set[str] = set()
+        for gram in _trigrams(term):
+            candidates.update(self._trigram_tokens.get(gram, ()))
+        matches = []
+        for token in candidates:
+            if len(token) < len(term) - limit:
+                continue
+            distance = _prefix_distance(term, token, limit)
+            if distance <= limit:
+                matches.append((token, distance))
+        return matches
+
+    def _term_tiers(self, term: str) -> List[Tuple[float, Set[str]]]:
+        # Matching employees for one term, best tier first: exact token 3,
+        # prefix 2, and only when neither matches, typo-tolerant prefixes at
+        # 1 minus a penalty per edit.
+        tiers: List[Tuple[float, Set[str]]] = []
+        exact = self._postings.get(term)
+        if exact:
+            tiers.append((3.0, exact))
+        prefixed = [self._postings[t] for t in self._prefix_tokens(term) if t != term]
+        if prefixed:
+            tiers.append((2.0, set().union(*prefixed)))
+        if tiers:
+            return tiers
+        by_distance: Dict[int, List[Set[str]]] = {}
+        for token, distance in self._fuzzy_tokens(term):
+            by_distance.setdefault(distance, []).append(self._postings[token])
+        for distance in sorted(by_distance):
+            tiers.append((1.0 - 0.25 * distance, set().union(*by_distance[distance])))
+        return tiers
+
+    def search(self, query: str = "", department: Optional[str] = None, position: Optional[str] = None,
+               limit: int = 20) -> Dict[str, Any]:
+        with self._lock:
+            self._ensure_built()
+            matched: Optional[Set[str]] = None
+            term_tiers: List[List[Tuple[float, Set[str]]]] = []
+            for term in dict.fromkeys(tokenize(query)):
+                tiers = self._term_tiers(term)
+                term_ids: Set[str] = set().union(*(ids for _, ids in tiers))
+                matched = term_ids if matched is None else matched & term_ids
+                term_tiers.append(tiers)
+                if not matched:
+                    break
+            if matched is None:
+                matched = set(self._docs)
+            if department:
+                matched &= self._facet_postings["department"].get(department, set())
+            if position:
+                matched &= self._facet_postings["position"].get(position, set())
+
+            facets: Dict[str, Dict[str, int]] = {}
+            for field in FACET_FIELDS:
+                counts = {value: len(matched.intersection(ids)) for value, ids in self._facet_postings[field].items()}
+                facets[field] = {value: n for value, n in counts.items() if n}
+
+            # Rank by score, then name: fill the result from the best score
+            # bucket down, sorting only within the buckets that are used.
+            buckets: Dict[float, Set[str]] = {0.0: matched}
+            for tiers in term_tiers:
+                next_buckets: Dict[float, Set[str]] = {}
+                for score, ids in buckets.items():
+                    remaining = ids
+                    for weight, tier_ids in tiers:
+                        hit = remaining & tier_ids
+                        if hit:
+                            next_buckets.setdefault(score + weight, set()).update(hit)
+                            remaining = remaining - hit
+                        if not remaining:
+                            break
+                buckets = next_buckets
+
+            top: List[str] = []
+            for score in sorted(buckets, reverse=True):
+                top.extend(heapq.nsmallest(limit - len(top), buckets[score], key=self._sort_keys.__getitem__))
+                if len(top) >= limit:
+                    break
+            return {
+                "total": len(matched),
+                "results": [dict(self._docs[eid]) for eid in top],
+                "facets": facets,
+            }
+
+
+employee_search = LocationLocal(db, EmployeeSearchIndex)
@@ -0,0 +1,100 @@
+import typing
+from typing import Any, Dict, List, Optional, Type
+
+from pydantic import BaseModel, EmailStr, Field, TypeAdapter
+from pydantic_core import PydanticUndefined
+from typing_extensions import Annotated, TypedDict
+
+_mirrors: Dict[Type[BaseModel], Optional[type]] = {}
+
+
+class _Unsupported(Exception):
+    pass
+
+
+def _mirror_annotation(annotation: Any) -> Any:
+    if annotation is EmailStr:
+        # Already normalised by EmailStr when the row was written.
+        return str
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        mirror = _mirror(annotation)
+        if mirror is None:
+            raise _Unsupported
+        return mirror
+    origin, args = typing.get_origin(annotation), typing.get_args(annotation)
+    if not args:
+        return annotation
+    mapped = tuple(_mirror_annotation(arg) for arg in args)
+    if mapped == args:
+        return annotation
+    if origin is typing.Union:
+        return typing.Union[mapped]
+    if origin is list:
+        return List[mapped[0]]
+    if origin is dict:
+        return Dict[mapped[0], mapped[1]]
+    raise _Unsupported
+
+
+def _mirror_field(field) -> Any:
+    annotation = _mirror_annotation(field.annotation)
+    if field.default_factory is not None:
+        info = Field(default_factory=field.default_factory)
+    elif field.default is not PydanticUndefined:
+        info = Field(default=field.default)
+    else:
+        return Annotated[(annotation, *field.metadata)] if field.metadata else annotation
+    return Annotated[(annotation, *field.metadata, info)]
+
+
+# A TypedDict with the model's fields, types, constraints and defaults.
+# Validating rows against it produces plain dicts that serialise exactly like
+# the model, without building model instances. None when the model has
+# behaviour a TypedDict can't carry (validators, serializers, aliases).
+def _mirror(model: Type[BaseModel]) -> Optional[type]:
+    if model in _mirrors:
+        return _mirrors[model]
+    decorators = model.__pydantic_decorators__
+    mirror = None
+    if not (decorators.validators or decorators.field_validators or decorators.root_validators
+            or decorators.model_validators or decorators.field_serializers or decorators.model_serializers
+            or decorators.computed_fields
+            or any(f.alias or f.serialization_alias for f in model.model_fields.values())):
+        try:
+            fields = {name: _mirror_field(field) for name, field in model.model_fields.items()}
+        except _Unsupported:
+            fields = None
+        if fields is not None:
+            mirror = TypedDict(f"{model.__name__}Row", fields)
+            mirror.__pydantic_config__ = model.model_config
+    _mirrors[model] = mirror
+    return mirror
+
+
+# Renders rows read from JsonDB for a List[model] response. Rows were
+# validated against the model when they were written, so they go through the
+# model's TypedDict mirror instead: the same checks and output, but no model
+# instance per row and no second EmailStr round trip.
+class RowSerializer:
+    def __init__(self, model: Type[BaseModel]):
+        self.model = model
+        mirror = _mirror(model)
+        self._validated = TypeAdapter(List[model])
+        self._trusted = TypeAdapter(List[mirror]) if mirror is not None else self._validated
+
+    def render(self, rows: List[Any]) -> bytes:
+        return self._trusted.dump_json(self._trusted.validate_python(rows))
+
+    def render_validated(self, rows: List[Any]) -> bytes:
+        return self._validated.dump_json(self._validated.validate_python(rows))
+
+
+_serializers: Dict[Any, RowSerializer] = {}
+
+
+def serializer_for(model: Type[BaseModel]) -> RowSerializer:
+    serializer = _serializers.get(model)
+    if serializer is None:
+        serializer = RowSerializer(model)
+        _serializers[model] = serializer
+    return serializer
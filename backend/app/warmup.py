@@ -0,0 +1,67 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Callable, Dict, List
+
+from fastapi.concurrency import run_in_threadpool
+
+# Comma separated hooks to run in the background once the app has started;
+# "off" runs none.
+WARMUP = [n.strip() for n in os.getenv("WARMUP", "routers,auth,indexes").split(",") if n.strip() not in ("", "off")]
+WARMUP_DELAY = float(os.getenv("WARMUP_DELAY_MS", "250")) / 1000.0
+
+logger = logging.getLogger(__name__)
+
+_hooks: Dict[str, Callable[[], None]] = {}
+
+
+def warmup_hook(name: str):
+    def decorator(func: Callable[[], None]):
+        _hooks[name] = func
+        return func
+    return decorator
+
+
+@warmup_hook("auth")
+def _warm_auth():
+    from app.auth import warm_up
+    warm_up()
+
+
+@warmup_hook("indexes")
+def _warm_indexes():
+    from app.db import db
+    from app.indexes import leave_status_index
+    from app.presence import presence_index
+    from app.roster import shift_roster
+    from app.search import employee_search
+    for location in db.locations():
+        for index in (employee_search, leave_status_index, shift_roster, presence_index):
+            index.get(location).warm()
+
+
+@warmup_hook("dashboard")
+def _warm_dashboard():
+    from app.db import db
+    from app.routers.dashboard import location_summary
+    for location in db.locations():
+        location_summary(location)
+
+
+# Runs the hooks one after another on the threadpool, so requests arriving
+# meanwhile are served; whatever a request needs first it loads itself.
+async def run_warmups(names: List[str] = WARMUP):
+    await asyncio.sleep(WARMUP_DELAY)
+    for name in names:
+        hook = _hooks.get(name)
+        if hook is None:
+            logger.warning("Unknown warm-up hook: %s", name)
+            continue
+        started = time.perf_counter()
+        try:
+            await run_in_threadpool(hook)
+        except Exception:
+            logger.exception("Warm-up %s failed", name)
+            continue
+        logger.info("Warm-up %s took %.1fms", name, (time.perf_counter() - started) * 1000.0)
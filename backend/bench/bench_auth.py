@@ -0,0 +1,58 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+
+def _rate(count: int, elapsed: float) -> Dict[str, float]:
+    return {
+        "count": count,
+        "per_second": round(count / elapsed, 1),
+        "mean_ms": round(elapsed / count * 1000.0, 3),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="Password logins per second against refresh-token exchanges.")
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--refreshes", type=int, default=500)
+    parser.add_argument("--out", default=None, help="optional JSON results file")
+    args = parser.parse_args(argv)
+
+    os.environ["DB_PATH"] = tempfile.mkdtemp(prefix="resto-auth-")
+    from fastapi.testclient import TestClient
+    import main as app_main
+
+    client = TestClient(app_main.app)
+    client.post("/auth/register", json={"email": "bench@restaurant.com", "password": "bench-password"})
+    form = {"username": "bench@restaurant.com", "password": "bench-password"}
+
+    started = time.perf_counter()
+    for _ in range(args.logins):
+        response = client.post("/auth/login", data=form)
+        assert response.status_code == 200, response.text
+    logins = _rate(args.logins, time.perf_counter() - started)
+
+    refresh_token = client.post("/auth/login", data=form).json()["refresh_token"]
+    started = time.perf_counter()
+    for _ in range(args.refreshes):
+        response = client.post("/auth/refresh", json={"refresh_token": refresh_token})
+        assert response.status_code == 200, response.text
+        refresh_token = response.json()["refresh_token"]
+    refreshes = _rate(args.refreshes, time.perf_counter() - started)
+
+    results = {"login": logins, "refresh": refreshes, "speedup": round(refreshes["per_second"] / logins["per_second"], 1)}
+    print(f"login    {logins['per_second']:>9.1f}/s  mean {logins['mean_ms']:>8.3f}ms")
+    print(f"refresh  {refreshes['per_second']:>9.1f}/s  mean {refreshes['mean_ms']:>8.3f}ms")
+    print(f"refresh is {results['speedup']}x faster")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=4)
+    return results
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,107 @@
+import argparse
+import json
+import multiprocessing
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from app.db import JsonDB
+from app.indexes import FieldIndex
+
+PROBE = "coherence_probe"
+
+
+# Runs in its own process, standing in for another uvicorn worker.
+def _writer(db_path: str, writes: int, gap: float, results):
+    database = JsonDB(db_path, group_commit_window=None, watch_interval=None)
+    for i in range(writes):
+        time.sleep(gap)
+        database.add(PROBE, {"id": f"probe-{i}", "n": i})
+        results.put((i, time.time()))
+    results.put(None)
+
+
+def run(interval: float, writes: int, gap: float, timeout: float) -> Dict[str, Any]:
+    db_path = tempfile.mkdtemp(prefix="resto-coherence-")
+    database = JsonDB(db_path, group_commit_window=None, watch_interval=interval)
+    index = FieldIndex(database, PROBE, "n")
+    index.count(-1)
+
+    seen: Dict[int, float] = {}
+    stale_index: List[int] = []
+
+    # Registered after the index, so it runs once the index has been told.
+    def on_change(collection: str, changes):
+        if collection != PROBE:
+            return
+        now = time.time()
+        for row in database.get_all(PROBE):
+            if row["n"] not in seen:
+                seen[row["n"]] = now
+                if index.count(row["n"]) != 1:
+                    stale_index.append(row["n"])
+
+    database.add_change_listener(on_change)
+
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    writer = ctx.Process(target=_writer, args=(db_path, writes, gap, results))
+    writer.start()
+    written: Dict[int, float] = {}
+    while True:
+        item = results.get(timeout=timeout + writes * gap)
+        if item is None:
+            break
+        written[item[0]] = item[1]
+    writer.join()
+
+    deadline = time.time() + timeout
+    while len(seen) < writes and time.time() < deadline:
+        time.sleep(0.005)
+
+    latencies = sorted(max(0.0, seen[i] - written[i]) for i in written if i in seen)
+
+    def pct(p: float) -> float:
+        return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000.0, 2) if latencies else 0.0
+
+    return {
+        "watch_interval_ms": interval * 1000.0,
+        "writes": writes,
+        "visible": len(latencies),
+        "stale_index": len(stale_index),
+        "p50_ms": pct(0.5),
+        "p95_ms": pct(0.95),
+        "max_ms": pct(1.0),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Read-after-write visibility of another process's writes, and of indexes built on them."
+    )
+    parser.add_argument("--writes", type=int, default=200)
+    parser.add_argument("--gap-ms", type=float, default=10.0, help="pause between the other process's writes")
+    parser.add_argument("--intervals", default="10,50,100", help="comma-separated watch intervals in ms")
+    parser.add_argument("--timeout", type=float, default=5.0, help="seconds to wait for a write to become visible")
+    parser.add_argument("--out", default=None, help="optional JSON results file")
+    args = parser.parse_args(argv)
+
+    results = []
+    failed = False
+    for value in args.intervals.split(","):
+        result = run(float(value) / 1000.0, args.writes, args.gap_ms / 1000.0, args.timeout)
+        results.append(result)
+        failed = failed or result["visible"] < result["writes"] or result["stale_index"] > 0
+        print(f"watch={value + 'ms':<7} visible={result['visible']}/{result['writes']} "
+              f"stale_index={result['stale_index']} p50={result['p50_ms']:>7.2f}ms "
+              f"p95={result['p95_ms']:>7.2f}ms max={result['max_ms']:>7.2f}ms")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=4)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
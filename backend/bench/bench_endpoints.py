@@ -0,0 +1,248 @@
+import argparse
+import itertools
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from bench.synthetic import (
+    ADMIN_EMAIL, ADMIN_PASSWORD, MANAGER_EMAIL, MANAGER_PASSWORD, STAFF_PASSWORD,
+    generate, parse_scale,
+)
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# bcrypt dominates these, so they get fewer iterations.
+SLOW_SCENARIOS = {"auth.login"}
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Scenario:
+    def __init__(self, name: str, call: Callable[[int], Any]):
+        self.name = name
+        self.call = call
+
+
+def build_scenarios(client, db_path: str) -> List[Scenario]:
+    def login(email: str, password: str) -> Dict[str, str]:
+        resp = client.post("/auth/login", data={"username": email, "password": password})
+        resp.raise_for_status()
+        return {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+    with open(os.path.join(db_path, "employees.json")) as f:
+        employees = json.load(f)
+    active = [e for e in employees if e.get("is_active", True)]
+    staff_employee = active[0]
+
+    admin = login(ADMIN_EMAIL, ADMIN_PASSWORD)
+    manager = login(MANAGER_EMAIL, MANAGER_PASSWORD)
+    staff = login(staff_employee["email"], STAFF_PASSWORD)
+
+    month = date.today().strftime("%Y-%m")
+    employee_ids = itertools.cycle(e["id"] for e in active)
+    far_future = date.today() + timedelta(days=400)
+
+    def next_weekday(i: int) -> str:
+        day = far_future + timedelta(days=i * 7)
+        while day.weekday() >= 5:
+            day += timedelta(days=1)
+        return day.isoformat()
+
+    def punch_cycle(i: int):
+        employee_id = next(employee_ids)
+        client.post(f"/attendance/punch-out?employee_id={employee_id}", headers=admin)
+        resp = client.post(f"/attendance/punch-in?employee_id={employee_id}", headers=admin)
+        client.post(f"/attendance/punch-out?employee_id={employee_id}", headers=admin)
+        return resp
+
+    def apply_and_cancel(i: int):
+        day = next_weekday(i)
+        resp = client.post("/leaves/apply", headers=staff, json={
+            "leave_type": "casual", "start_date": day, "end_date": day, "reason": "bench",
+        })
+        if resp.status_code == 200:
+            client.post(f"/leaves/{resp.json()['id']}/cancel", headers=staff)
+        return resp
+
+    def apply_and_reject(i: int):
+        day = next_weekday(i + 10_000)
+        created = client.post("/leaves/apply", headers=staff, json={
+            "leave_type": "casual", "start_date": day, "end_date": day, "reason": "bench",
+        })
+        if created.status_code != 200:
+            return created
+        return client.post(f"/leaves/{created.json()['id']}/reject", headers=manager)
+
+    def create_employee(i: int):
+        return client.post("/employees/", headers=admin, json={
+            "first_name": "Bench", "last_name": f"Hire{i}",
+            "email": f"bench.{i}.{time.time_ns()}@restaurant.com",
+            "phone": "9000000000", "position": "Waiter", "department": "Service", "salary": 2500.0,
+        })
+
+    def update_employee(i: int):
+        body = {k: staff_employee[k] for k in ("first_name", "last_name", "email", "phone", "position", "department")}
+        body["salary"] = float(staff_employee["salary"]) + (i % 2)
+        return client.put(f"/employees/{staff_employee['id']}", headers=admin, json=body)
+
+    return [
+        Scenario("auth.login", lambda i: client.post("/auth/login", data={"username": ADMIN_EMAIL, "password": ADMIN_PASSWORD})),
+        Scenario("auth.me", lambda i: client.get("/auth/me", headers=staff)),
+        Scenario("employees.list", lambda i: client.get("/employees/", headers=manager)),
+        Scenario("employees.get", lambda i: client.get(f"/employees/{staff_employee['id']}", headers=manager)),
+        Scenario("employees.me", lambda i: client.get("/employees/me", headers=staff)),
+        Scenario("employees.search", lambda i: client.get(f"/employees/search?q={staff_employee['last_name'][:4]}", headers=manager)),
+        Scenario("employees.create", create_employee),
+        Scenario("employees.update", update_employee),
+        Scenario("attendance.punch_cycle", punch_cycle),
+        Scenario("attendance.list", lambda i: client.get("/attendance/", headers=manager)),
+        Scenario("attendance.list_employee", lambda i: client.get(f"/attendance/?employee_id={staff_employee['id']}", headers=manager)),
+        Scenario("attendance.me", lambda i: client.get(f"/attendance/me?month={month}", headers=staff)),
+        Scenario("attendance.me_today", lambda i: client.get("/attendance/me/today", headers=staff)),
+        Scenario("attendance.admin", lambda i: client.get(f"/attendance/admin?month={month}", headers=manager)),
+        Scenario("attendance.report_csv", lambda i: client.get(f"/attendance/admin/report.csv?month={month}", headers=manager)),
+        Scenario("leaves.holidays", lambda i: client.get("/leaves/holidays", headers=staff)),
+        Scenario("leaves.balance", lambda i: client.get("/leaves/balance", headers=staff)),
+        Scenario("leaves.history", lambda i: client.get("/leaves/history", headers=staff)),
+        Scenario("leaves.apply_cancel", apply_and_cancel),
+        Scenario("leaves.apply_reject", apply_and_reject),
+        Scenario("dashboard.summary", lambda i: client.get("/dashboard/summary", headers=manager)),
+    ]
+
+
+def run_scenario(scenario: Scenario, iterations: int, before_each: Optional[Callable[[], None]]) -> Dict[str, Any]:
+    statuses: Dict[str, int] = {}
+    samples: List[float] = []
+
+    # One traced call for the allocation peak; tracemalloc distorts timings,
+    # so latency is measured in separate untraced calls.
+    if before_each:
+        before_each()
+    tracemalloc.start()
+    scenario.call(0)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    for i in range(1, iterations + 1):
+        if before_each:
+            before_each()
+        started = time.perf_counter()
+        resp = scenario.call(i)
+        samples.append((time.perf_counter() - started) * 1000.0)
+        key = str(resp.status_code)
+        statuses[key] = statuses.get(key, 0) + 1
+
+    errors = sum(n for code, n in statuses.items() if int(code) >= 400)
+    return {
+        "iterations": iterations,
+        "p50_ms": round(percentile(samples, 50), 3),
+        "p95_ms": round(percentile(samples, 95), 3),
+        "p99_ms": round(percentile(samples, 99), 3),
+        "mean_ms": round(sum(samples) / len(samples), 3) if samples else 0.0,
+        "max_ms": round(max(samples), 3) if samples else 0.0,
+        "peak_alloc_kib": round(peak / 1024.0, 1),
+        "errors": errors,
+        "statuses": statuses,
+    }
+
+
+def compare(current: Dict[str, Any], previous: Dict[str, Any]) -> List[str]:
+    lines = [f"{'scenario':<28}{'p50 ms':>12}{'Δp50':>9}{'p95 ms':>12}{'Δp95':>9}"]
+    for name, result in current["results"].items():
+        before = previous.get("results", {}).get(name)
+        row = f"{name:<28}{result['p50_ms']:>12.2f}"
+        if before and before["p50_ms"]:
+            row += f"{(result['p50_ms'] / before['p50_ms'] - 1) * 100:>+8.1f}%"
+        else:
+            row += f"{'n/a':>9}"
+        row += f"{result['p95_ms']:>12.2f}"
+        if before and before["p95_ms"]:
+            row += f"{(result['p95_ms'] / before['p95_ms'] - 1) * 100:>+8.1f}%"
+        else:
+            row += f"{'n/a':>9}"
+        lines.append(row)
+    return lines
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="Benchmark every router against a synthetic dataset.")
+    parser.add_argument("--scale", default="10k", help="1k, 10k, 100k, 1m or an attendance record count")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--only", default="", help="comma-separated scenario name prefixes")
+    parser.add_argument("--cold", action="store_true", help="clear the response cache before every call")
+    parser.add_argument("--db-path", default=None, help="reuse an existing dataset instead of generating one")
+    parser.add_argument("--out", default=None, help="results file (default: bench/results/endpoints-<scale>-<time>.json)")
+    parser.add_argument("--compare", default=None, help="previous results file to diff against")
+    args = parser.parse_args(argv)
+
+    scale = parse_scale(args.scale)
+    db_path = args.db_path or tempfile.mkdtemp(prefix="resto-bench-")
+    # The app binds its JsonDB to DB_PATH at import time, and generating the
+    # dataset already imports it for password hashing.
+    os.environ["DB_PATH"] = db_path
+    if not args.db_path:
+        generate(db_path, scale, seed=args.seed, log=sys.stdout)
+
+    from fastapi.testclient import TestClient
+    import main as app_main
+    from app.cache import response_cache
+
+    client = TestClient(app_main.app)
+    scenarios = build_scenarios(client, db_path)
+    prefixes = [p for p in args.only.split(",") if p]
+    if prefixes:
+        scenarios = [s for s in scenarios if any(s.name.startswith(p) for p in prefixes)]
+
+    results: Dict[str, Any] = {}
+    for scenario in scenarios:
+        iterations = min(args.iterations, 10) if scenario.name in SLOW_SCENARIOS else args.iterations
+        results[scenario.name] = run_scenario(scenario, iterations, response_cache.clear if args.cold else None)
+        r = results[scenario.name]
+        print(f"{scenario.name:<28} p50={r['p50_ms']:>9.2f}ms p95={r['p95_ms']:>9.2f}ms "
+              f"p99={r['p99_ms']:>9.2f}ms peak={r['peak_alloc_kib']:>9.1f}KiB errors={r['errors']}")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "scale": scale,
+            "seed": args.seed,
+            "iterations": args.iterations,
+            "cold": args.cold,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "max_rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        },
+        "results": results,
+    }
+
+    out = args.out
+    if out is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        out = os.path.join(RESULTS_DIR, f"endpoints-{args.scale}-{datetime.now():%Y%m%d-%H%M%S}.json")
+    with open(out, "w") as f:
+        json.dump(report, f, indent=4)
+    print(f"Results written to {out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+        print("\n".join(compare(report, previous)))
+    return report
+
+
+if __name__ == "__main__":
+    main()
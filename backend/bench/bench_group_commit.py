@@ -0,0 +1,92 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.db import JsonDB
+
+
+def _seed(db_path: str, existing: int):
+    now = datetime.now()
+    rows = [
+        {
+            "employee_id": f"emp-{i % 500}",
+            "punch_in": now.isoformat(sep=" "),
+            "punch_out": now.isoformat(sep=" "),
+            "status": "present",
+            "notes": "",
+            "id": f"seed-{i}",
+        }
+        for i in range(existing)
+    ]
+    with open(os.path.join(db_path, "attendance_records.json"), "w") as f:
+        json.dump(rows, f, indent=4)
+
+
+def run(window: Optional[float], punches: int, workers: int, existing: int) -> Dict[str, Any]:
+    db_path = tempfile.mkdtemp(prefix="resto-group-commit-")
+    _seed(db_path, existing)
+    db = JsonDB(db_path, group_commit_window=window)
+
+    def punch(i: int) -> float:
+        started = time.perf_counter()
+        db.add("attendance_records", {
+            "employee_id": f"emp-{i}",
+            "punch_in": datetime.now(),
+            "punch_out": None,
+            "status": "present",
+            "notes": "",
+        })
+        return time.perf_counter() - started
+
+    # Same default size as the threadpool FastAPI runs sync endpoints on.
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        started = time.perf_counter()
+        latencies: List[float] = sorted(pool.map(punch, range(punches)))
+        elapsed = time.perf_counter() - started
+
+    stored = len(db.get_all("attendance_records"))
+    assert stored == existing + punches, f"lost writes: {stored} != {existing + punches}"
+    return {
+        "window_ms": None if window is None else window * 1000.0,
+        "punches": punches,
+        "workers": workers,
+        "existing_records": existing,
+        "punches_per_second": round(punches / elapsed, 1),
+        "file_writes": db.stats()["attendance_records"]["writes"],
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000.0, 2),
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000.0, 2),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    parser = argparse.ArgumentParser(description="Punch-in throughput with and without group commit.")
+    parser.add_argument("--punches", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=40)
+    parser.add_argument("--existing", type=int, default=10_000, help="attendance records already on disk")
+    parser.add_argument("--windows", default="off,0,2,5", help="comma-separated commit windows in ms, 'off' disables")
+    parser.add_argument("--out", default=None, help="optional JSON results file")
+    args = parser.parse_args(argv)
+
+    results = []
+    for value in args.windows.split(","):
+        window = None if value == "off" else float(value) / 1000.0
+        result = run(window, args.punches, args.workers, args.existing)
+        results.append(result)
+        label = "off" if window is None else f"{value}ms"
+        print(f"window={label:<6} {result['punches_per_second']:>9.1f} punches/s "
+              f"writes={result['file_writes']:<5} p50={result['p50_ms']:>8.2f}ms p99={result['p99_ms']:>8.2f}ms")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=4)
+    return results
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
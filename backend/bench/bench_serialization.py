@@ -0,0 +1,148 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel
+
+from bench.synthetic import generate, parse_scale
+
+
+def _datasets(db_path: str, rows: int) -> List[Tuple[str, Type[BaseModel], List[Dict[str, Any]]]]:
+    from app.db import JsonDB
+    from app.models import Employee
+    from app.models_attendance import AttendanceAdminRecord, AttendanceRecord
+    from app.models_leave import LeaveRequest
+
+    db = JsonDB(db_path)
+    employees = db.get_all("employees")
+    by_id = {e["id"]: e for e in employees}
+    attendance = db.get_all("attendance_records")[:rows]
+    admin = [
+        {**r, "employee": {k: by_id[r["employee_id"]].get(k, "") for k in AttendanceAdminRecord.model_fields["employee"].annotation.model_fields}}
+        for r in attendance if r.get("employee_id") in by_id
+    ]
+    leaves = db.get_all("leave_requests")
+    leaves = (leaves * (rows // max(len(leaves), 1) + 1))[:rows]
+    employees = (employees * (rows // max(len(employees), 1) + 1))[:rows]
+    return [
+        ("attendance", AttendanceRecord, attendance),
+        ("attendance_admin", AttendanceAdminRecord, admin),
+        ("leave_requests", LeaveRequest, leaves),
+        ("employees", Employee, employees),
+    ]
+
+
+# Rows in shapes the app has written at one time or another, plus a few the
+# fast path must hand to full validation.
+def _edge_rows() -> List[Tuple[Type[BaseModel], List[Dict[str, Any]]]]:
+    from app.models import Employee
+    from app.models_attendance import AttendanceRecord, AttendanceStatus
+    from app.models_leave import LeaveRequest
+
+    base = {"employee_id": "e1", "punch_out": None, "status": "present", "notes": "", "id": "a1",
+            "created_at": "2026-01-02 08:00:00"}
+    leave = {"id": "l1", "employee_id": "e1", "user_id": "u1", "leave_type": "casual",
+             "start_date": "2026-02-05", "end_date": "2026-02-06", "total_days": 2, "status": "pending",
+             "reason": "r", "applied_at": "2026-02-06T00:14:20.777519"}
+    employee = {"id": "e1", "first_name": "A", "last_name": "B", "email": "a@b.co", "phone": "1",
+                "position": "Chef", "department": "Kitchen", "salary": 2500, "joining_date": "2025-01-01T08:00:00"}
+    return [
+        (AttendanceRecord, [
+            {**base, "punch_in": "2026-02-05 00:22:17.030305"},
+            {**base, "punch_in": "2026-02-05T09:00:00"},
+            {**base, "punch_in": datetime(2026, 2, 5, 9, 30, 0, 5)},
+            {**base, "punch_in": "2026-02-05 09:00:00", "status": AttendanceStatus.LATE, "extra": 1},
+            {**base, "punch_in": "2026-02-05 09:00:00.000000"},
+            {**base, "punch_in": "2026-02-05T09:00:00Z"},
+            {**base, "punch_in": "2026-02-05 09:00:00.5"},
+            {**base, "punch_in": "2026-02-05 09:00", "notes": None},
+            {k: v for k, v in {**base, "punch_in": "2026-02-05 09:00:00"}.items() if k not in ("notes", "status")},
+        ]),
+        (LeaveRequest, [
+            leave,
+            {**leave, "start_date": date(2026, 2, 5), "total_days": 0.5, "reviewed_at": "2026-02-07 10:00:00"},
+            {**leave, "total_days": "1.5"},
+            {**leave, "start_date": "2026-02-05T00:00:00"},
+        ]),
+        (Employee, [
+            employee,
+            {**employee, "salary": 2500.5, "is_active": False, "user_id": "u1"},
+            {**employee, "is_active": 1},
+        ]),
+    ]
+
+
+def _factory_fields(model: Type[BaseModel]) -> List[str]:
+    return [name for name, field in model.model_fields.items() if field.default_factory is not None]
+
+
+def check_equivalence(serializer, model: Type[BaseModel], rows: List[Dict[str, Any]]) -> Optional[str]:
+    # Fields filled from a default factory (datetime.now) differ between any
+    # two renders, so byte equality is checked on complete rows and the rest
+    # are compared without those fields.
+    factory = _factory_fields(model)
+    complete = [r for r in rows if isinstance(r, dict) and all(f in r for f in factory)]
+    if serializer.render(complete) != serializer.render_validated(complete):
+        return "rendered bytes differ"
+    fast = json.loads(serializer.render(rows))
+    validated = json.loads(serializer.render_validated(rows))
+    for row, a, b in zip(rows, fast, validated):
+        for name in factory:
+            if name not in row:
+                a.pop(name, None)
+                b.pop(name, None)
+        if a != b:
+            return f"row differs: {a} != {b}"
+    return None
+
+
+def _time(func, repeat: int) -> float:
+    func()
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Validated vs trusted-row list serialization.")
+    parser.add_argument("--rows", type=parse_scale, default=parse_scale("10k"))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--data", default=None, help="also check equivalence against an existing DB_PATH (read only)")
+    args = parser.parse_args(argv)
+
+    db_path = tempfile.mkdtemp(prefix="resto-serialization-")
+    os.environ["DB_PATH"] = db_path
+    generate(db_path, args.rows, log=sys.stdout)
+
+    from app.serialization import serializer_for
+
+    failures = 0
+    checks = [(model, rows) for _, model, rows in _datasets(db_path, args.rows)] + _edge_rows()
+    if args.data:
+        checks += [(model, rows) for _, model, rows in _datasets(args.data, args.rows)]
+    for model, rows in checks:
+        problem = check_equivalence(serializer_for(model), model, rows)
+        if problem:
+            failures += 1
+            print(f"MISMATCH {model.__name__}: {problem}")
+    print(f"equivalence: {len(checks) - failures}/{len(checks)} row sets identical")
+
+    for name, model, rows in _datasets(db_path, args.rows):
+        serializer = serializer_for(model)
+        validated = _time(lambda: serializer.render_validated(rows), args.repeat)
+        fast = _time(lambda: serializer.render(rows), args.repeat)
+        print(f"{name:<18} rows={len(rows):<7} validated={validated * 1000:8.2f}ms "
+              f"fast={fast * 1000:8.2f}ms  x{validated / fast:.1f}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,253 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from bench.synthetic import MANAGER_EMAIL, MANAGER_PASSWORD, STAFF_PASSWORD, generate, parse_scale
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _staff_emails(db_path: str, count: int) -> List[str]:
+    with open(os.path.join(db_path, "users.json")) as f:
+        users = json.load(f)
+    return [u["email"] for u in users if u.get("role") == "staff"][:count]
+
+
+def _wait_ready(server: subprocess.Popen, base_url: str, timeout: float):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("uvicorn exited during startup")
+        try:
+            if httpx.get(base_url + "/", timeout=1.0).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.05)
+    raise RuntimeError("uvicorn did not answer in time")
+
+
+# Latencies and outcomes per route, keyed by "METHOD /path".
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, Dict[str, int]] = {}
+
+    async def call(self, client: httpx.AsyncClient, method: str, path: str, **kwargs) -> Optional[httpx.Response]:
+        route = f"{method} {path}"
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, path, **kwargs)
+        except httpx.HTTPError as exc:
+            response = None
+            outcome = type(exc).__name__
+        else:
+            outcome = None if response.status_code < 400 else str(response.status_code)
+        self.latencies.setdefault(route, []).append((time.perf_counter() - started) * 1000.0)
+        if outcome is not None:
+            counts = self.errors.setdefault(route, {})
+            counts[outcome] = counts.get(outcome, 0) + 1
+        return response
+
+    def summary(self, wall: float) -> Dict[str, Dict[str, Any]]:
+        routes: Dict[str, Dict[str, Any]] = {}
+        for route, samples in sorted(self.latencies.items()):
+            samples = sorted(samples)
+
+            def pct(p: float) -> float:
+                return round(samples[min(len(samples) - 1, int(len(samples) * p))], 1)
+
+            failed = sum(self.errors.get(route, {}).values())
+            routes[route] = {
+                "requests": len(samples),
+                "rps": round(len(samples) / wall, 1),
+                "p50_ms": pct(0.5),
+                "p95_ms": pct(0.95),
+                "p99_ms": pct(0.99),
+                "max_ms": round(samples[-1], 1),
+                "error_rate": round(failed / len(samples), 4),
+                "errors": self.errors.get(route, {}),
+            }
+        return routes
+
+
+async def _login(recorder: Recorder, client: httpx.AsyncClient, email: str, password: str) -> Optional[Dict[str, str]]:
+    response = await recorder.call(client, "POST", "/auth/login", data={"username": email, "password": password})
+    if response is None or response.status_code != 200:
+        return None
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+# One staff member at shift change: log in, punch in, then keep checking
+# that today's record is there. A check that comes back without the record
+# this member just punched in is a stale read.
+async def _staff(recorder: Recorder, client: httpx.AsyncClient, email: str, start: float,
+                 checks: int, think: float, punched: Dict[str, str], stale: List[str]):
+    await asyncio.sleep(start)
+    headers = await _login(recorder, client, email, STAFF_PASSWORD)
+    if headers is None:
+        return
+    response = await recorder.call(client, "POST", "/attendance/punch-in", headers=headers)
+    if response is None or response.status_code != 200:
+        return
+    record_id = response.json()["id"]
+    punched[email] = record_id
+    for _ in range(checks):
+        await asyncio.sleep(random.uniform(0, 2 * think))
+        response = await recorder.call(client, "GET", "/attendance/me/today", headers=headers)
+        if response is not None and response.status_code == 200:
+            body = response.json()
+            if not body or body.get("id") != record_id:
+                stale.append(email)
+
+
+async def _manager(recorder: Recorder, client: httpx.AsyncClient, email: str, password: str,
+                   refresh: float, stop: asyncio.Event):
+    headers = await _login(recorder, client, email, password)
+    if headers is None:
+        return
+    while not stop.is_set():
+        await recorder.call(client, "GET", "/dashboard/summary", headers=headers)
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=random.uniform(0.5 * refresh, 1.5 * refresh))
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run_scenario(base_url: str, staff: List[str], managers: int, ramp: float, checks: int,
+                       think: float, refresh: float) -> Dict[str, Any]:
+    recorder = Recorder()
+    punched: Dict[str, str] = {}
+    stale: List[str] = []
+    limits = httpx.Limits(max_connections=len(staff) + managers, max_keepalive_connections=len(staff) + managers)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120.0) as client:
+        stop = asyncio.Event()
+        manager_tasks = [
+            asyncio.create_task(_manager(recorder, client, MANAGER_EMAIL, MANAGER_PASSWORD, refresh, stop))
+            for _ in range(managers)
+        ]
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            _staff(recorder, client, email, random.uniform(0, ramp), checks, think, punched, stale)
+            for email in staff
+        ))
+        wall = time.perf_counter() - started
+        stop.set()
+        await asyncio.gather(*manager_tasks)
+    return {"recorder": recorder, "wall": wall, "punched": punched, "stale": stale}
+
+
+# Punch-ins the server acknowledged but that are not on disk once it has
+# shut down: another write to attendance_records replaced them.
+def count_lost_updates(db_path: str, punched: Dict[str, str]) -> int:
+    records = []
+    for root, _, files in os.walk(db_path):
+        if "attendance_records.json" in files:
+            with open(os.path.join(root, "attendance_records.json")) as f:
+                records.extend(json.load(f))
+    stored = {r.get("id") for r in records}
+    return sum(1 for record_id in punched.values() if record_id not in stored)
+
+
+def run(args: argparse.Namespace, workers: int) -> Dict[str, Any]:
+    db_path = tempfile.mkdtemp(prefix="resto-shift-change-")
+    # History ends yesterday so nobody is already punched in.
+    generate(db_path, args.scale, end_date=date.today() - timedelta(days=1),
+             employees=args.staff, log=sys.stdout)
+    staff = _staff_emails(db_path, args.staff)
+
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--workers", str(workers),
+         "--timeout-keep-alive", "120", "--log-level", "warning"],
+        cwd=BACKEND_DIR, env={**os.environ, "DB_PATH": db_path},
+    )
+    try:
+        _wait_ready(server, base_url, timeout=60.0)
+        outcome = asyncio.run(run_scenario(base_url, staff, args.managers, args.ramp, args.checks,
+                                           args.think, args.refresh))
+    finally:
+        server.terminate()
+        server.wait()
+
+    recorder: Recorder = outcome["recorder"]
+    wall = outcome["wall"]
+    routes = recorder.summary(wall)
+    total = sum(r["requests"] for r in routes.values())
+    failed = sum(sum(r["errors"].values()) for r in routes.values())
+    return {
+        "workers": workers,
+        "staff": len(staff),
+        "managers": args.managers,
+        "wall_s": round(wall, 2),
+        "requests": total,
+        "rps": round(total / wall, 1),
+        "error_rate": round(failed / total, 4) if total else 0.0,
+        "punch_ins": len(outcome["punched"]),
+        "lost_updates": count_lost_updates(db_path, outcome["punched"]),
+        "stale_reads": len(outcome["stale"]),
+        "routes": routes,
+    }
+
+
+def _print(result: Dict[str, Any]):
+    print(f"workers={result['workers']} staff={result['staff']} managers={result['managers']} "
+          f"wall={result['wall_s']}s requests={result['requests']} rps={result['rps']} "
+          f"errors={result['error_rate'] * 100:.2f}% punch_ins={result['punch_ins']} "
+          f"lost_updates={result['lost_updates']} stale_reads={result['stale_reads']}")
+    for route, r in result["routes"].items():
+        print(f"  {route:<28} n={r['requests']:>5} rps={r['rps']:>7.1f} p50={r['p50_ms']:>7.1f}ms "
+              f"p95={r['p95_ms']:>7.1f}ms p99={r['p99_ms']:>7.1f}ms max={r['max_ms']:>7.1f}ms "
+              f"errors={r['error_rate'] * 100:.2f}%")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Shift change under uvicorn: staff log in, punch in and check today's record "
+                    "while managers refresh the dashboard."
+    )
+    parser.add_argument("--workers", default="1,4", help="comma-separated uvicorn worker counts")
+    parser.add_argument("--staff", type=int, default=200)
+    parser.add_argument("--managers", type=int, default=5)
+    parser.add_argument("--scale", type=parse_scale, default=parse_scale("10k"))
+    parser.add_argument("--ramp", type=float, default=10.0, help="seconds over which staff arrive")
+    parser.add_argument("--checks", type=int, default=3, help="/attendance/me/today checks per staff member")
+    parser.add_argument("--think", type=float, default=1.0, help="mean seconds between a member's checks")
+    parser.add_argument("--refresh", type=float, default=2.0, help="mean seconds between dashboard refreshes")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default=None, help="optional JSON results file")
+    args = parser.parse_args(argv)
+    random.seed(args.seed)
+
+    results = []
+    for value in args.workers.split(","):
+        result = run(args, int(value))
+        results.append(result)
+        _print(result)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=4)
+    return 1 if any(r["lost_updates"] or r["error_rate"] for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+import argparse
+import http.client
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from bench.synthetic import ADMIN_EMAIL, generate, parse_scale
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = {
+    "lazy": {"LAZY_ROUTERS": "on"},
+    "lazy-nowarm": {"LAZY_ROUTERS": "on", "WARMUP": "off"},
+    "eager": {"LAZY_ROUTERS": "off", "WARMUP": "off"},
+}
+
+
+def _env(db_path: str, mode: str) -> Dict[str, str]:
+    return {**os.environ, "DB_PATH": db_path, **MODES[mode]}
+
+
+def import_seconds(db_path: str, mode: str) -> float:
+    code = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, env=_env(db_path, mode),
+                         capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _get(port: int, path: str, token: Optional[str] = None) -> int:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    try:
+        conn.request("GET", path, headers={"Authorization": f"Bearer {token}"} if token else {})
+        response = conn.getresponse()
+        response.read()
+        return response.status
+    finally:
+        conn.close()
+
+
+# Starts uvicorn and times, from process start: the first answered request,
+# then the first and second authenticated list requests.
+def serve_timings(db_path: str, mode: str, token: str) -> Dict[str, float]:
+    port = _free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=_env(db_path, mode),
+    )
+    try:
+        while True:
+            try:
+                assert _get(port, "/") == 200
+                break
+            except (ConnectionRefusedError, http.client.RemoteDisconnected):
+                if server.poll() is not None:
+                    raise RuntimeError("uvicorn exited during startup")
+                time.sleep(0.002)
+        first_response = time.perf_counter() - started
+        timings = {"first_response_ms": first_response * 1000.0}
+        for label in ("first_employees_ms", "second_employees_ms"):
+            request_started = time.perf_counter()
+            assert _get(port, "/employees/", token) == 200
+            timings[label] = (time.perf_counter() - request_started) * 1000.0
+        return timings
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="Import time and time to first response, lazy vs eager startup.")
+    parser.add_argument("--scale", type=parse_scale, default=parse_scale("1k"))
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--out", default=None, help="optional JSON results file")
+    args = parser.parse_args(argv)
+
+    db_path = tempfile.mkdtemp(prefix="resto-startup-")
+    generate(db_path, args.scale, log=sys.stdout)
+    from app.auth import create_access_token
+    token = create_access_token({"sub": ADMIN_EMAIL, "role": "super_admin"})
+
+    results: Dict[str, Any] = {}
+    for mode in MODES:
+        imports = [import_seconds(db_path, mode) * 1000.0 for _ in range(args.runs)]
+        serves = [serve_timings(db_path, mode, token) for _ in range(args.runs)]
+        result = {"import_ms": round(statistics.median(imports), 1)}
+        for key in serves[0]:
+            result[key] = round(statistics.median(s[key] for s in serves), 1)
+        results[mode] = result
+        print(f"{mode:<11} import={result['import_ms']:>7.1f}ms first_response={result['first_response_ms']:>7.1f}ms "
+              f"first /employees/={result['first_employees_ms']:>7.1f}ms "
+              f"second={result['second_employees_ms']:>6.1f}ms  (median of {args.runs})")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=4)
+    return results
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,292 @@
+import argparse
+import json
+import math
+import os
+import random
+import textwrap
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, IO, Iterable, List, Optional
+from uuid import UUID
+
+SCALES: Dict[str, int] = {
+    "1k": 1_000,
+    "10k": 10_000,
+    "100k": 100_000,
+    "1m": 1_000_000,
+}
+
+ADMIN_EMAIL = "admin@restaurant.com"
+ADMIN_PASSWORD = "admin"
+MANAGER_EMAIL = "manager@restaurant.com"
+MANAGER_PASSWORD = "manager"
+STAFF_PASSWORD = "password"
+
+FIRST_NAMES = [
+    "Aarav", "Aisha", "Arjun", "Bianca", "Carlos", "Chloe", "Dev", "Elena", "Farah", "Gabriel",
+    "Hana", "Ibrahim", "Isla", "Jamal", "Kavya", "Leo", "Maya", "Mohammed", "Nina", "Omar",
+    "Priya", "Quinn", "Rahul", "Sara", "Tariq", "Uma", "Victor", "Wen", "Yusuf", "Zara",
+]
+LAST_NAMES = [
+    "Ahmed", "Bauer", "Chen", "Das", "Evans", "Fernandes", "Garcia", "Haddad", "Iyer", "Jones",
+    "Khan", "Lopez", "Menon", "Nair", "Okafor", "Patel", "Qureshi", "Rahman", "Silva", "Tanaka",
+    "Usman", "Varma", "Williams", "Xu", "Yilmaz", "Zhang",
+]
+POSITIONS_BY_DEPARTMENT: Dict[str, List[str]] = {
+    "Kitchen": ["Head Chef", "Sous Chef", "Line Cook", "Prep Cook", "Dishwasher"],
+    "Service": ["Waiter", "Host", "Bartender", "Runner"],
+    "Management": ["Manager", "Assistant Manager"],
+    "Housekeeping": ["Cleaner"],
+}
+DEPARTMENT_WEIGHTS = {"Kitchen": 40, "Service": 45, "Management": 5, "Housekeeping": 10}
+SALARY_BY_POSITION = {
+    "Head Chef": 6500.0, "Sous Chef": 4800.0, "Line Cook": 3200.0, "Prep Cook": 2800.0,
+    "Dishwasher": 2200.0, "Waiter": 2500.0, "Host": 2400.0, "Bartender": 3000.0,
+    "Runner": 2200.0, "Manager": 7000.0, "Assistant Manager": 5000.0, "Cleaner": 2000.0,
+}
+
+# (start, length in hours)
+SHIFTS: Dict[str, tuple[time, int]] = {
+    "morning": (time(7, 0), 8),
+    "day": (time(11, 0), 8),
+    "evening": (time(16, 0), 8),
+}
+
+HOLIDAYS = [
+    ("01-01", "New Year's Day"),
+    ("01-26", "Republic Day"),
+    ("05-01", "Labour Day"),
+    ("08-15", "Independence Day"),
+    ("10-02", "Gandhi Jayanti"),
+    ("12-25", "Christmas Day"),
+]
+
+LEAVE_REASONS = {
+    "casual": ["Family function", "Personal errand", "Travel", "Moving house"],
+    "sick": ["Fever", "Flu", "Doctor appointment", "Back pain"],
+    "earned": ["Vacation", "Visiting family", "Wedding"],
+}
+
+
+class SyntheticDataset:
+    def __init__(self, scale: int, seed: int = 42, end_date: Optional[date] = None,
+                 employees: Optional[int] = None, years: int = 2):
+        self.scale = scale
+        self.seed = seed
+        self.end_date = end_date or date.today()
+        self.years = years
+        self.rng = random.Random(seed)
+        # Attendance dominates the record count: size the staff so that each
+        # employee has roughly `years` of history, then fit the span to the
+        # requested scale.
+        self.employee_count = employees or max(10, scale // (260 * years))
+        per_employee = max(1, scale // self.employee_count)
+        self.history_days = math.ceil(per_employee / (5 / 7 * 0.95))
+        self.start_date = self.end_date - timedelta(days=self.history_days - 1)
+
+    def _uuid(self) -> str:
+        return str(UUID(int=self.rng.getrandbits(128), version=4))
+
+    def build_employees(self, password_hash: str) -> tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        rng = self.rng
+        departments = list(DEPARTMENT_WEIGHTS)
+        weights = [DEPARTMENT_WEIGHTS[d] for d in departments]
+        employees: List[Dict[str, Any]] = []
+        users: List[Dict[str, Any]] = []
+        for i in range(self.employee_count):
+            first = rng.choice(FIRST_NAMES)
+            last = rng.choice(LAST_NAMES)
+            department = rng.choices(departments, weights)[0]
+            position = rng.choice(POSITIONS_BY_DEPARTMENT[department])
+            email = f"{first.lower()}.{last.lower()}.{i}@restaurant.com"
+            joined = datetime.combine(self.start_date - timedelta(days=rng.randint(0, 900)), time(9))
+            user_id = self._uuid()
+            users.append({
+                "email": email,
+                "password": password_hash,
+                "role": "staff",
+                "is_active": True,
+                "created_at": joined.isoformat(),
+                "id": user_id,
+            })
+            employees.append({
+                "first_name": first,
+                "last_name": last,
+                "email": email,
+                "phone": f"9{rng.randint(100000000, 999999999)}",
+                "position": position,
+                "department": department,
+                "salary": SALARY_BY_POSITION[position] + rng.randint(0, 20) * 50.0,
+                "id": self._uuid(),
+                "user_id": user_id,
+                "joining_date": joined.isoformat(),
+                "is_active": rng.random() > 0.03,
+                "shift": rng.choice(list(SHIFTS)),
+                "day_off": rng.randint(0, 6),
+            })
+        return employees, users
+
+    def build_holidays(self) -> List[Dict[str, Any]]:
+        holidays: List[Dict[str, Any]] = []
+        for year in range(self.start_date.year, self.end_date.year + 2):
+            for month_day, name in HOLIDAYS:
+                holidays.append({"id": self._uuid(), "date": f"{year}-{month_day}", "name": name})
+        return holidays
+
+    def iter_attendance(self, employees: List[Dict[str, Any]], holidays: Iterable[str]) -> Iterable[Dict[str, Any]]:
+        rng = self.rng
+        holiday_set = set(holidays)
+        now = datetime.now()
+        day = self.start_date
+        while day <= self.end_date:
+            is_holiday = day.isoformat() in holiday_set
+            for emp in employees:
+                # Each employee has one fixed weekly day off plus a second
+                # that rotates; holidays thin the roster instead of closing.
+                if day.weekday() == emp["day_off"] or day.weekday() == (emp["day_off"] + day.isocalendar()[1]) % 7:
+                    continue
+                if (is_holiday and rng.random() < 0.5) or rng.random() < 0.05:
+                    continue
+                shift_start, hours = SHIFTS[emp["shift"]]
+                scheduled = datetime.combine(day, shift_start)
+                late_minutes = rng.choice([0, 0, 0, 0, 0, 0, 2, 5, 8, 15, 25, 45])
+                punch_in = scheduled + timedelta(minutes=late_minutes - rng.randint(0, 10), seconds=rng.randint(0, 59))
+                if punch_in > now:
+                    continue
+                status = "late" if late_minutes > 10 else "present"
+                worked = timedelta(hours=hours, minutes=rng.randint(-20, 40))
+                if rng.random() < 0.03:
+                    worked = timedelta(hours=hours / 2)
+                    status = "half_day"
+                punch_out: Optional[datetime] = punch_in + worked
+                if punch_out > now or rng.random() < 0.002:
+                    punch_out = None
+                yield {
+                    "employee_id": emp["id"],
+                    "punch_in": punch_in.isoformat(sep=" "),
+                    "punch_out": punch_out.isoformat(sep=" ") if punch_out else None,
+                    "status": status,
+                    "notes": "",
+                    "id": self._uuid(),
+                }
+            day += timedelta(days=1)
+
+    def build_leave_requests(self, employees: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        rng = self.rng
+        requests: List[Dict[str, Any]] = []
+        today = self.end_date
+        per_employee = max(1, round(self.history_days / 365 * 4))
+        for emp in employees:
+            for _ in range(per_employee):
+                leave_type = rng.choices(["casual", "sick", "earned"], [5, 3, 2])[0]
+                start = self.start_date + timedelta(days=rng.randint(0, self.history_days + 30))
+                length = rng.choice([1, 1, 1, 2, 2, 3, 5])
+                end = start + timedelta(days=length - 1)
+                applied_at = datetime.combine(start - timedelta(days=rng.randint(1, 20)), time(rng.randint(8, 22), rng.randint(0, 59)))
+                if start > today:
+                    status = rng.choice(["pending", "pending", "approved"])
+                else:
+                    status = rng.choices(["approved", "rejected", "cancelled", "pending"], [80, 10, 7, 3])[0]
+                reviewed = status in ("approved", "rejected")
+                requests.append({
+                    "employee_id": emp["id"],
+                    "user_id": emp["user_id"],
+                    "leave_type": leave_type,
+                    "start_date": start.isoformat(),
+                    "end_date": end.isoformat(),
+                    "total_days": float(length),
+                    "status": status,
+                    "reason": rng.choice(LEAVE_REASONS[leave_type]),
+                    "attachment_name": None,
+                    "attachment_base64": None,
+                    "applied_at": applied_at.isoformat(),
+                    "reviewed_by": None,
+                    "reviewed_at": (applied_at + timedelta(hours=rng.randint(1, 48))).isoformat() if reviewed else None,
+                    "review_notes": "" if reviewed else None,
+                    "id": self._uuid(),
+                })
+        requests.sort(key=lambda r: r["applied_at"])
+        return requests
+
+
+def _write_collection(db_path: str, collection: str, records: Iterable[Dict[str, Any]]) -> int:
+    # Streams the same layout JsonDB._write_file produces so 1M-row
+    # collections never have to sit in memory at once.
+    count = 0
+    with open(os.path.join(db_path, f"{collection}.json"), "w") as f:
+        f.write("[")
+        for record in records:
+            f.write(",\n" if count else "\n")
+            f.write(textwrap.indent(json.dumps(record, indent=4, default=str), "    "))
+            count += 1
+        f.write("\n]" if count else "]")
+    return count
+
+
+def _hash_passwords() -> Dict[str, str]:
+    from app.auth import get_password_hash
+    return {
+        "admin": get_password_hash(ADMIN_PASSWORD),
+        "manager": get_password_hash(MANAGER_PASSWORD),
+        "staff": get_password_hash(STAFF_PASSWORD),
+    }
+
+
+def generate(db_path: str, scale: int, seed: int = 42, end_date: Optional[date] = None,
+             employees: Optional[int] = None, years: int = 2,
+             log: Optional[IO[str]] = None) -> Dict[str, int]:
+    os.makedirs(db_path, exist_ok=True)
+    dataset = SyntheticDataset(scale, seed=seed, end_date=end_date, employees=employees, years=years)
+    hashes = _hash_passwords()
+
+    employee_rows, user_rows = dataset.build_employees(hashes["staff"])
+    created_at = datetime.combine(dataset.start_date, time(8)).isoformat()
+    user_rows[:0] = [
+        {"email": ADMIN_EMAIL, "password": hashes["admin"], "role": "super_admin",
+         "is_active": True, "created_at": created_at, "id": dataset._uuid()},
+        {"email": MANAGER_EMAIL, "password": hashes["manager"], "role": "manager",
+         "is_active": True, "created_at": created_at, "id": dataset._uuid()},
+    ]
+    holidays = dataset.build_holidays()
+    leave_requests = dataset.build_leave_requests(employee_rows)
+
+    counts: Dict[str, int] = {}
+    counts["users"] = _write_collection(db_path, "users", user_rows)
+    counts["holidays"] = _write_collection(db_path, "holidays", holidays)
+    counts["attendance_records"] = _write_collection(
+        db_path, "attendance_records",
+        dataset.iter_attendance(employee_rows, (h["date"] for h in holidays)),
+    )
+    counts["leave_requests"] = _write_collection(db_path, "leave_requests", leave_requests)
+    # Shift metadata only drives generation; it is not part of the schema.
+    for emp in employee_rows:
+        emp.pop("shift")
+        emp.pop("day_off")
+    counts["employees"] = _write_collection(db_path, "employees", employee_rows)
+
+    if log is not None:
+        summary = ", ".join(f"{k}={v}" for k, v in counts.items())
+        print(f"Generated {dataset.start_date} .. {dataset.end_date} into {db_path}: {summary}", file=log)
+    return counts
+
+
+def parse_scale(value: str) -> int:
+    key = value.lower()
+    if key in SCALES:
+        return SCALES[key]
+    return int(value)
+
+
+if __name__ == "__main__":
+    import sys
+
+    parser = argparse.ArgumentParser(description="Generate a deterministic synthetic dataset.")
+    parser.add_argument("--scale", default="10k", help="1k, 10k, 100k, 1m or an attendance record count")
+    parser.add_argument("--out", default=os.getenv("DB_PATH", "data"), help="target DB_PATH directory")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--end-date", type=date.fromisoformat, default=None, help="last day of history (default: today)")
+    parser.add_argument("--employees", type=int, default=None)
+    parser.add_argument("--years", type=int, default=2)
+    args = parser.parse_args()
+    os.environ["DB_PATH"] = args.out
+    generate(args.out, parse_scale(args.scale), seed=args.seed, end_date=args.end_date,
+             employees=args.employees, years=args.years, log=sys.stdout)
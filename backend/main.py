@@ -1,9 +1,58 @@
+import asyncio
+import importlib
+import sys
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 import os
-from app.routers import auth, employees, attendance, leaves, dashboard
+from app.compression import CompressionMiddleware
+from app.lazy_routers import LazyRouterMiddleware, LazyRouters
+from app.metrics import MetricsMiddleware
+from app.profiler import PROFILING, ProfilerMiddleware
+from app.warmup import WARMUP, WARMUP_DELAY, run_warmups, warmup_hook
 
-app = FastAPI(title="Restaurant Employee Management System")
+# Imported on first use unless LAZY_ROUTERS=off; see app/lazy_routers.py.
+ROUTERS = {
+    "/auth": "app.routers.auth",
+    "/employees": "app.routers.employees",
+    "/attendance": "app.routers.attendance",
+    "/leaves": "app.routers.leaves",
+    "/dashboard": "app.routers.dashboard",
+    "/metrics": "app.routers.metrics",
+    "/changes": "app.routers.changes",
+    "/shifts": "app.routers.shifts",
+    "/reports": "app.routers.reports",
+    "/backup": "app.routers.backup",
+    "/profiles": "app.routers.profiles",
+}
+LAZY_ROUTERS = os.getenv("LAZY_ROUTERS", "on").strip().lower() not in ("0", "off", "false")
+
+
+# Starts alongside the warm-ups, importing app.roster on the threadpool, so
+# neither startup nor the first requests wait for it.
+async def _run_sweeper():
+    await asyncio.sleep(WARMUP_DELAY)
+    roster = await run_in_threadpool(importlib.import_module, "app.roster")
+    if roster.SHIFT_SWEEP_INTERVAL > 0:
+        await roster.run_sweeper()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    tasks = [asyncio.create_task(_run_sweeper())]
+    if WARMUP:
+        tasks.append(asyncio.create_task(run_warmups()))
+    yield
+    for task in tasks:
+        task.cancel()
+    # Only has workers to stop if a report was ever requested.
+    reports = sys.modules.get("app.reports")
+    if reports is not None:
+        reports.report_jobs.shutdown()
+
+
+app = FastAPI(title="Restaurant Employee Management System", lifespan=lifespan)
 
 # CORS
 cors_origins_env = os.getenv("CORS_ORIGINS", "").strip()
@@ -21,12 +70,16 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(MetricsMiddleware)
+if PROFILING:
+    app.add_middleware(ProfilerMiddleware)
 
-app.include_router(auth.router)
-app.include_router(employees.router)
-app.include_router(attendance.router)
-app.include_router(leaves.router)
-app.include_router(dashboard.router)
+routers = LazyRouters(ROUTERS)
+app.add_middleware(LazyRouterMiddleware, routers=routers)
+if not LAZY_ROUTERS:
+    routers.load(app)
+warmup_hook("routers")(lambda: routers.load(app))
 
 @app.get("/")
 def read_root():